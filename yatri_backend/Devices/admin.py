@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from . import heartbeat
 from .models import User, Vehicle, Device, Route
 
 
@@ -75,6 +76,12 @@ class DeviceAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_changelist_instance(self, request):
+        """Overlay unflushed heartbeats on the page's devices in one round trip"""
+        changelist = super().get_changelist_instance(request)
+        heartbeat.refresh_last_pings(changelist.result_list)
+        return changelist
+    
     def is_healthy(self, obj):
         """Display health status"""
         return obj.is_healthy()
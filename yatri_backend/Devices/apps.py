@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DevicesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Devices'
+
+    def ready(self):
+        # Registry invalidation on Device/Vehicle changes
+        from Devices import signals  # noqa: F401
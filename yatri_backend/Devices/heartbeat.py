@@ -0,0 +1,187 @@
+"""
+YatriConnect - Device Heartbeat Aggregator
+Coalesces Device.last_ping writes: pings are recorded in process memory
+and Redis, and flushed to the devices table periodically with a single
+bulk UPDATE instead of one UPDATE per telemetry sample
+
+A timer thread started by the first unflushed ping flushes
+heartbeat_flush_interval seconds later (never on the ingest request
+path), and pending pings are flushed at interpreter exit (recycled
+workers). A failed flush puts its pings back for the next one.
+"""
+
+import atexit
+import logging
+import threading
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Case, F, Q, Value, When
+
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_pending = {}  # device_pk -> latest ping not yet written to the database
+_timer = None  # Scheduled idle flush (threading.Timer)
+
+
+def _cache_key(device_pk):
+    return f"device_heartbeat_{device_pk}"
+
+
+def record_pings(device_pks, when):
+    """
+    Record a ping for each device
+
+    The fresh value is visible immediately through Redis (see
+    latest_pings); the database is updated on the next flush.
+    """
+    config = settings.TELEMETRY_INGEST_CONFIG
+    device_pks = list(device_pks)
+
+    with _lock:
+        for device_pk in device_pks:
+            _pending[device_pk] = when
+        _schedule_flush(config['heartbeat_flush_interval'])
+
+    cache.set_many(
+        {_cache_key(device_pk): when for device_pk in device_pks},
+        config['heartbeat_cache_ttl']
+    )
+
+
+def _schedule_flush(interval):
+    """Start the idle flush timer unless one is pending (call with _lock held)"""
+    global _timer
+
+    if _timer is None:
+        _timer = threading.Timer(interval, _timed_flush)
+        _timer.daemon = True
+        _timer.start()
+
+
+def _timed_flush():
+    """Timer thread: flush pending pings on its own DB connection"""
+    global _timer
+
+    with _lock:
+        _timer = None
+    try:
+        flush()
+    except Exception:
+        logger.exception("Heartbeat flush failed")
+    finally:
+        connection.close()
+
+
+def flush():
+    """
+    Write pending pings to the devices table in one statement,
+    never moving last_ping backwards
+
+    PostgreSQL: UPDATE ... FROM (VALUES ...)
+    Other backends: single UPDATE ... CASE with the same guard per row
+    """
+    global _pending
+
+    with _lock:
+        pending, _pending = _pending, {}
+
+    if not pending:
+        return 0
+
+    try:
+        _write(pending)
+    except Exception:
+        _restore(pending)
+        raise
+
+    return len(pending)
+
+
+def _restore(pending):
+    """Put the pings of a failed flush back, keeping the newer per device"""
+    with _lock:
+        for device_pk, when in pending.items():
+            current = _pending.get(device_pk)
+            if current is None or current < when:
+                _pending[device_pk] = when
+        _schedule_flush(settings.TELEMETRY_INGEST_CONFIG['heartbeat_flush_interval'])
+
+
+def _write(pending):
+    """Bulk UPDATE of last_ping from {device_pk: datetime}"""
+    if connection.vendor == 'postgresql':
+        values_sql = ', '.join(['(%s, %s::timestamptz)'] * len(pending))
+        params = [value for item in pending.items() for value in item]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                UPDATE devices AS d
+                SET last_ping = v.last_ping
+                FROM (VALUES {values_sql}) AS v(id, last_ping)
+                WHERE d.id = v.id
+                  AND (d.last_ping IS NULL OR d.last_ping < v.last_ping)
+                """,
+                params
+            )
+    else:
+        from Devices.models import Device
+        Device.objects.filter(pk__in=list(pending)).update(last_ping=Case(
+            *[
+                When(Q(pk=device_pk) & (Q(last_ping__isnull=True) | Q(last_ping__lt=when)), then=Value(when))
+                for device_pk, when in pending.items()
+            ],
+            default=F('last_ping')
+        ))
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except Exception:
+        logger.exception("Heartbeat flush at exit failed")
+
+
+atexit.register(_flush_at_exit)
+
+
+def latest_pings(device_pks):
+    """
+    Freshest known ping per device (including unflushed ones)
+
+    Returns: {device_pk: datetime} for devices with a recorded heartbeat
+    """
+    device_pks = list(device_pks)
+    cached = cache.get_many([_cache_key(device_pk) for device_pk in device_pks])
+    pings = {
+        device_pk: cached[_cache_key(device_pk)]
+        for device_pk in device_pks if _cache_key(device_pk) in cached
+    }
+    with _lock:
+        for device_pk in device_pks:
+            local = _pending.get(device_pk)
+            if local and (device_pk not in pings or local > pings[device_pk]):
+                pings[device_pk] = local
+    return pings
+
+
+def refresh_last_pings(devices):
+    """
+    Overlay fresher heartbeats onto Device instances (one Redis round trip)
+
+    Used by DeviceSerializer(many=True) before serializing, so
+    Device.is_healthy() and last_ping reflect pings that have not been
+    flushed yet. Devices already refreshed are skipped.
+    """
+    stale = [device for device in devices if not getattr(device, '_heartbeat_refreshed', False)]
+    if not stale:
+        return devices
+    pings = latest_pings(device.pk for device in stale)
+    for device in stale:
+        ping = pings.get(device.pk)
+        if ping and (device.last_ping is None or ping > device.last_ping):
+            device.last_ping = ping
+        device._heartbeat_refreshed = True
+    return devices
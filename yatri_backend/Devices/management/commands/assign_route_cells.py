@@ -0,0 +1,42 @@
+"""
+YatriConnect - Recompute Route Grid Cells
+
+Usage:
+    python manage.py assign_route_cells
+
+Recomputes Route.start_cell / end_cell for every route. Needed after
+changing PUBLIC_ROUTE_CONFIG['cell_degrees']; new and saved routes keep
+their cells up to date through Route.save().
+"""
+
+from django.core.management.base import BaseCommand
+
+from Devices.models import Route
+
+
+class Command(BaseCommand):
+    help = "Recompute start/end grid cells of every route (after changing cell_degrees)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Routes updated per query")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        batch = []
+        updated = 0
+
+        routes = Route.objects.only('id', 'start_latitude', 'start_longitude', 'end_latitude', 'end_longitude')
+        for route in routes.iterator(chunk_size=batch_size):
+            route.assign_cells()
+            batch.append(route)
+            if len(batch) >= batch_size:
+                Route.objects.bulk_update(batch, ['start_cell', 'end_cell'])
+                updated += len(batch)
+                batch = []
+
+        if batch:
+            Route.objects.bulk_update(batch, ['start_cell', 'end_cell'])
+            updated += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Assigned cells to {updated} routes"))
@@ -0,0 +1,122 @@
+"""
+YatriConnect - Route Matching Benchmark
+
+Usage:
+    python manage.py bench_route_matching
+    python manage.py bench_route_matching --routes 100000 --lookups 200
+
+Inserts synthetic routes (inside a transaction that is rolled back) and
+compares, for the same journey endpoints:
+1. Full scan: Route.objects.all() + is_location_near per route
+   (the previous detect_public_route loop)
+2. Route.find_matching: start/end grid cell prefilter + exact check
+
+Reports parity of the matched route and milliseconds per lookup.
+"""
+
+import random
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from Devices.models import Route
+from Devices.utils import grid_cell, is_location_near
+
+
+# Synthetic city-scale area (Kathmandu valley)
+LAT_RANGE = (27.60, 27.80)
+LON_RANGE = (85.20, 85.45)
+
+
+def full_scan(start_lat, start_lon, end_lat, end_lon, threshold):
+    for route in Route.objects.order_by('id'):
+        if (is_location_near(start_lat, start_lon, route.start_latitude, route.start_longitude, threshold) and
+                is_location_near(end_lat, end_lon, route.end_latitude, route.end_longitude, threshold)):
+            return route
+    return None
+
+
+class Command(BaseCommand):
+    help = "Benchmark route matching: full scan vs start/end grid cell prefilter"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--routes', type=int, default=100000,
+                            help="Synthetic routes to insert")
+        parser.add_argument('--lookups', type=int, default=100,
+                            help="Journeys matched with the grid prefilter")
+        parser.add_argument('--scan-lookups', type=int, default=3,
+                            help="Journeys matched with the full scan (slow)")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        threshold = settings.PUBLIC_ROUTE_CONFIG['location_threshold']
+        cell_degrees = settings.PUBLIC_ROUTE_CONFIG['cell_degrees']
+
+        def point():
+            return rng.uniform(*LAT_RANGE), rng.uniform(*LON_RANGE)
+
+        with transaction.atomic():
+            # 1. Synthetic routes (bulk_create bypasses save(): assign cells here)
+            routes = []
+            for index in range(options['routes']):
+                start_lat, start_lon = point()
+                end_lat, end_lon = point()
+                routes.append(Route(
+                    route_id=f"BENCH_{index}",
+                    name=f"Bench route {index}",
+                    start_location="Bench start",
+                    end_location="Bench end",
+                    start_latitude=start_lat,
+                    start_longitude=start_lon,
+                    end_latitude=end_lat,
+                    end_longitude=end_lon,
+                    start_cell=grid_cell(start_lat, start_lon, cell_degrees),
+                    end_cell=grid_cell(end_lat, end_lon, cell_degrees),
+                ))
+            Route.objects.bulk_create(routes, batch_size=5000)
+            self.stdout.write(f"Inserted {len(routes)} synthetic routes")
+
+            # Journeys: half repeat an existing route (within ~20 m), half are new
+            journeys = []
+            for index in range(options['lookups']):
+                if index % 2 == 0:
+                    route = rng.choice(routes)
+                    journeys.append((
+                        route.start_latitude + rng.uniform(-0.0001, 0.0001),
+                        route.start_longitude + rng.uniform(-0.0001, 0.0001),
+                        route.end_latitude + rng.uniform(-0.0001, 0.0001),
+                        route.end_longitude + rng.uniform(-0.0001, 0.0001),
+                    ))
+                else:
+                    journeys.append((*point(), *point()))
+
+            # 2. Grid prefilter
+            start = time.perf_counter()
+            indexed = [Route.find_matching(*journey, threshold) for journey in journeys]
+            indexed_time = (time.perf_counter() - start) / len(journeys)
+
+            # 3. Full scan on a few journeys (parity + timing)
+            scan_journeys = journeys[:options['scan_lookups']]
+            start = time.perf_counter()
+            scanned = [full_scan(*journey, threshold) for journey in scan_journeys]
+            scan_time = (time.perf_counter() - start) / max(len(scan_journeys), 1)
+
+            mismatches = sum(
+                1 for expected, actual in zip(scanned, indexed)
+                if (expected and expected.pk) != (actual and actual.pk)
+            )
+            matched = sum(1 for route in indexed if route is not None)
+
+            transaction.set_rollback(True)
+
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"Parity: {mismatches}/{len(scan_journeys)} lookups differ"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Parity: {len(scan_journeys)}/{len(scan_journeys)} lookups identical"))
+
+        self.stdout.write(f"Matched {matched}/{len(journeys)} journeys to an existing route")
+        self.stdout.write(f"Full scan:        {scan_time * 1000:10.2f} ms/lookup")
+        self.stdout.write(f"Grid prefilter:   {indexed_time * 1000:10.2f} ms/lookup")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {scan_time / indexed_time:.0f}x"))
@@ -0,0 +1,53 @@
+# Generated by Django 4.2.27 on 2026-10-17 02:45
+
+from math import floor
+
+from django.db import migrations, models
+
+
+# Frozen copy of Devices.utils.grid_cell and PUBLIC_ROUTE_CONFIG['cell_degrees']
+# as of this migration, so later changes to either do not change what it does
+# (manage.py assign_route_cells recomputes cells for the current settings)
+CELL_DEGREES = 0.001
+
+
+def _grid_cell(latitude, longitude):
+    columns = int(round(360 / CELL_DEGREES)) + 1
+    ix = floor((longitude + 180.0) / CELL_DEGREES)
+    iy = floor((latitude + 90.0) / CELL_DEGREES)
+    return iy * columns + ix
+
+
+def assign_route_cells(apps, schema_editor):
+    """Compute start/end cells of existing routes"""
+    Route = apps.get_model('Devices', 'Route')
+    routes = list(Route.objects.all())
+    for route in routes:
+        route.start_cell = _grid_cell(route.start_latitude, route.start_longitude)
+        route.end_cell = _grid_cell(route.end_latitude, route.end_longitude)
+    Route.objects.bulk_update(routes, ['start_cell', 'end_cell'], batch_size=5000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Devices', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='route',
+            name='end_cell',
+            field=models.BigIntegerField(blank=True, help_text='Grid cell of the end location', null=True),
+        ),
+        migrations.AddField(
+            model_name='route',
+            name='start_cell',
+            field=models.BigIntegerField(blank=True, help_text='Grid cell of the start location', null=True),
+        ),
+        migrations.RunPython(assign_route_cells, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='route',
+            index=models.Index(fields=['start_cell', 'end_cell'], name='routes_start_c_2be98e_idx'),
+        ),
+    ]
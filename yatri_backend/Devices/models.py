@@ -252,17 +252,33 @@ class Device(models.Model):
         Check if device is healthy (sent data recently)
         Returns True if last ping was within last 10 minutes
         """
-        if not self.last_ping:
+        last_ping = self.current_last_ping()
+        if not last_ping:
             return False
         
         from datetime import timedelta
         threshold = timezone.now() - timedelta(minutes=10)
-        return self.last_ping >= threshold
+        return last_ping >= threshold
+    
+    def current_last_ping(self):
+        """
+        Last ping including heartbeats not yet flushed to the database
+        (see Devices.heartbeat)
+        """
+        if getattr(self, '_heartbeat_refreshed', False):
+            return self.last_ping
+        
+        from Devices import heartbeat
+        ping = heartbeat.latest_pings([self.pk]).get(self.pk)
+        if ping and (self.last_ping is None or ping > self.last_ping):
+            return ping
+        return self.last_ping
     
     def update_ping(self):
-        """Update last ping timestamp"""
+        """Update last ping timestamp (coalesced by the heartbeat aggregator)"""
+        from Devices import heartbeat
         self.last_ping = timezone.now()
-        self.save(update_fields=['last_ping'])
+        heartbeat.record_pings([self.pk], self.last_ping)
 
 
 # ============================================================
@@ -335,6 +351,19 @@ class Route(models.Model):
         help_text="Average trip duration (seconds)"
     )
     
+    # Grid cells of the endpoints (Devices.utils.grid_cell), for route matching
+    start_cell = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Grid cell of the start location"
+    )
+    
+    end_cell = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Grid cell of the end location"
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -345,10 +374,52 @@ class Route(models.Model):
             models.Index(fields=['is_public']),
             models.Index(fields=['start_latitude', 'start_longitude']),
             models.Index(fields=['end_latitude', 'end_longitude']),
+            models.Index(fields=['start_cell', 'end_cell']),  # Route matching
         ]
     
     def __str__(self):
         return f"{self.name} ({self.start_location} -> {self.end_location})"
+    
+    def assign_cells(self):
+        """Compute start_cell/end_cell from the endpoint coordinates"""
+        from django.conf import settings
+        from Devices.utils import grid_cell
+        
+        cell_degrees = settings.PUBLIC_ROUTE_CONFIG['cell_degrees']
+        self.start_cell = grid_cell(self.start_latitude, self.start_longitude, cell_degrees)
+        self.end_cell = grid_cell(self.end_latitude, self.end_longitude, cell_degrees)
+    
+    def save(self, *args, **kwargs):
+        """Override save to keep the endpoint cells in sync"""
+        self.assign_cells()
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def find_matching(cls, start_latitude, start_longitude, end_latitude, end_longitude, threshold):
+        """
+        Route whose start and end are both within threshold meters
+        
+        Prefilter: start_cell/end_cell IN the cells near each endpoint
+        (index on start_cell, end_cell), then an exact haversine check on
+        the few candidates. Cost is independent of the number of routes.
+        """
+        from django.conf import settings
+        from Devices.utils import grid_cells_near, is_location_near
+        
+        cell_degrees = settings.PUBLIC_ROUTE_CONFIG['cell_degrees']
+        candidates = cls.objects.filter(
+            start_cell__in=grid_cells_near(start_latitude, start_longitude, threshold, cell_degrees),
+            end_cell__in=grid_cells_near(end_latitude, end_longitude, threshold, cell_degrees)
+        ).order_by('id')
+        
+        for route in candidates:
+            if (is_location_near(start_latitude, start_longitude,
+                                 route.start_latitude, route.start_longitude, threshold) and
+                    is_location_near(end_latitude, end_longitude,
+                                     route.end_latitude, route.end_longitude, threshold)):
+                return route
+        
+        return None
 
 # ============================================================
 # LOCATION MODEL - OpenStreetMap Integration
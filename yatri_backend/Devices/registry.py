@@ -0,0 +1,111 @@
+"""
+YatriConnect - Device Registry
+Two-tier cache (process memory -> Redis) mapping device_id to the
+device/vehicle identifiers needed on the telemetry ingest path
+"""
+
+import time
+from collections import namedtuple
+from django.conf import settings
+from django.core.cache import cache
+
+
+DeviceEntry = namedtuple(
+    'DeviceEntry',
+    ['device_pk', 'vehicle_pk', 'vehicle_id', 'vehicle_type', 'owner_id', 'device_id']
+)
+
+# device_id -> (DeviceEntry, expires_at)
+_local_entries = {}
+
+
+def _cache_key(device_id):
+    return f"device_registry_v2_{device_id}"
+
+
+def _ttls():
+    config = settings.TELEMETRY_INGEST_CONFIG
+    return config['registry_local_ttl'], config['registry_cache_ttl']
+
+
+def _load_from_db(device_ids):
+    """Resolve device entries from the database in one query"""
+    from Devices.models import Device
+
+    rows = Device.objects.filter(device_id__in=list(device_ids)).values_list(
+        'device_id', 'pk', 'vehicle_id',
+        'vehicle__vehicle_id', 'vehicle__vehicle_type', 'vehicle__owner_id'
+    )
+    return {row[0]: DeviceEntry(*row[1:], device_id=row[0]) for row in rows}
+
+
+def get_device_entries(device_ids):
+    """
+    Resolve many device_ids at once
+
+    Lookup order: process memory -> Redis -> database
+    Unknown devices are left out of the result.
+
+    Returns: {device_id: DeviceEntry}
+    """
+    local_ttl, cache_ttl = _ttls()
+    now = time.monotonic()
+    found = {}
+    missing = []
+
+    for device_id in device_ids:
+        local = _local_entries.get(device_id)
+        if local and local[1] > now:
+            found[device_id] = local[0]
+        else:
+            missing.append(device_id)
+
+    if not missing:
+        return found
+
+    # Second tier: Redis
+    cached = cache.get_many([_cache_key(device_id) for device_id in missing])
+    from_db = [device_id for device_id in missing if _cache_key(device_id) not in cached]
+    for device_id in missing:
+        entry = cached.get(_cache_key(device_id))
+        if entry is not None:
+            entry = DeviceEntry(*entry)
+            found[device_id] = entry
+            _local_entries[device_id] = (entry, now + local_ttl)
+
+    # Cold path: database
+    if from_db:
+        loaded = _load_from_db(from_db)
+        if loaded:
+            cache.set_many(
+                {_cache_key(device_id): tuple(entry) for device_id, entry in loaded.items()},
+                cache_ttl
+            )
+        for device_id, entry in loaded.items():
+            found[device_id] = entry
+            _local_entries[device_id] = (entry, now + local_ttl)
+
+    return found
+
+
+def get_device_entry(device_id):
+    """Resolve a single device_id (None if the device does not exist)"""
+    return get_device_entries([device_id]).get(device_id)
+
+
+def invalidate_devices(device_ids):
+    """Drop entries from both tiers (called from model signals)"""
+    device_ids = list(device_ids)
+    for device_id in device_ids:
+        _local_entries.pop(device_id, None)
+    if device_ids:
+        cache.delete_many([_cache_key(device_id) for device_id in device_ids])
+
+
+def invalidate_vehicle(vehicle_pk):
+    """Drop entries for every device attached to a vehicle"""
+    from Devices.models import Device
+
+    invalidate_devices(
+        Device.objects.filter(vehicle_id=vehicle_pk).values_list('device_id', flat=True)
+    )
@@ -122,15 +122,27 @@ class VehicleCreateSerializer(serializers.ModelSerializer):
 # ============================================================
 # DEVICE SERIALIZERS
 # ============================================================
+class DeviceListSerializer(serializers.ListSerializer):
+    """Overlays unflushed heartbeats on all devices in one Redis round trip"""
+    
+    def to_representation(self, data):
+        from Devices import heartbeat
+        devices = list(data.all() if hasattr(data, 'all') else data)
+        heartbeat.refresh_last_pings(devices)
+        return super().to_representation(devices)
+
+
 class DeviceSerializer(serializers.ModelSerializer):
     """Device serializer with health status"""
     
     vehicle_id = serializers.CharField(source='vehicle.vehicle_id', read_only=True)
     is_healthy = serializers.SerializerMethodField()
     status_display = serializers.CharField(source='get_status_display', read_only=True)
+    last_ping = serializers.SerializerMethodField()
     
     class Meta:
         model = Device
+        list_serializer_class = DeviceListSerializer
         fields = ['id', 'device_id', 'vehicle', 'vehicle_id', 'status', 
                  'status_display', 'is_healthy', 'firmware_version', 
                  'last_ping', 'created_at', 'updated_at']
@@ -139,6 +151,11 @@ class DeviceSerializer(serializers.ModelSerializer):
     def get_is_healthy(self, obj):
         """Get device health status"""
         return obj.is_healthy()
+    
+    def get_last_ping(self, obj):
+        """Last ping including unflushed heartbeats (same value as is_healthy)"""
+        last_ping = obj.current_last_ping()
+        return serializers.DateTimeField().to_representation(last_ping) if last_ping else None
 
 
 # ============================================================
@@ -0,0 +1,44 @@
+"""
+YatriConnect - Devices Signals
+Keep the device registry in sync with Device/Vehicle changes
+"""
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from Devices.models import Device, Vehicle
+from Devices import registry
+
+
+@receiver(pre_save, sender=Device)
+def device_pre_save(sender, instance, update_fields=None, **kwargs):
+    """Remember the stored device_id so a rename also drops the old entry"""
+    instance._registry_old_device_id = None
+    if instance.pk and (update_fields is None or 'device_id' in update_fields):
+        instance._registry_old_device_id = Device.objects.filter(
+            pk=instance.pk
+        ).values_list('device_id', flat=True).first()
+
+
+@receiver(post_save, sender=Device)
+def device_saved(sender, instance, update_fields=None, **kwargs):
+    """Invalidate registry entry (heartbeat-only saves do not change it)"""
+    if update_fields is not None and set(update_fields) <= {'last_ping'}:
+        return
+    device_ids = {instance.device_id}
+    old_device_id = getattr(instance, '_registry_old_device_id', None)
+    if old_device_id:
+        device_ids.add(old_device_id)
+    registry.invalidate_devices(device_ids)
+
+
+@receiver(post_delete, sender=Device)
+def device_deleted(sender, instance, **kwargs):
+    registry.invalidate_devices([instance.device_id])
+
+
+@receiver(post_save, sender=Vehicle)
+@receiver(post_delete, sender=Vehicle)
+def vehicle_changed(sender, instance, **kwargs):
+    """Vehicle type/owner/id are part of every attached device's entry"""
+    registry.invalidate_vehicle(instance.pk)
@@ -0,0 +1,112 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from Devices import heartbeat
+from Devices.models import Device, Vehicle
+from Devices.utils import bbox_to_zranges, compute_zkey, merge_zranges
+
+
+# ============================================================
+# HEARTBEAT AGGREGATOR
+# ============================================================
+@mock.patch.object(heartbeat, '_schedule_flush')
+class HeartbeatFlushTests(TestCase):
+    """Coalesced last_ping writes (Devices/heartbeat.py)"""
+
+    def setUp(self):
+        heartbeat._pending.clear()
+        vehicle = Vehicle.objects.create(vehicle_id='VEH001', vehicle_type='public')
+        self.devices = [
+            Device.objects.create(device_id=f'DEV00{index}', vehicle=vehicle) for index in (1, 2)
+        ]
+        self.now = timezone.now()
+
+    def test_flush_never_moves_last_ping_backwards(self, schedule):
+        first, second = self.devices
+        Device.objects.filter(pk=first.pk).update(last_ping=self.now)
+
+        heartbeat.record_pings([first.pk, second.pk], self.now - timedelta(minutes=1))
+        self.assertEqual(heartbeat.flush(), 2)
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.last_ping, self.now)
+        self.assertEqual(second.last_ping, self.now - timedelta(minutes=1))
+
+    def test_failed_flush_keeps_pings(self, schedule):
+        first, second = self.devices
+        heartbeat.record_pings([first.pk, second.pk], self.now - timedelta(minutes=1))
+
+        with mock.patch.object(heartbeat, '_write', side_effect=DatabaseError('down')):
+            with self.assertRaises(DatabaseError):
+                heartbeat.flush()
+
+        # A newer ping recorded meanwhile wins over the restored one
+        heartbeat.record_pings([first.pk], self.now)
+        heartbeat.flush()
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.last_ping, self.now)
+        self.assertEqual(second.last_ping, self.now - timedelta(minutes=1))
+        self.assertEqual(heartbeat._pending, {})
+
+
+# ============================================================
+# SPATIAL KEYS (Z-ORDER)
+# ============================================================
+def covered(ranges, zkey):
+    return any(low <= zkey <= high for low, high in ranges)
+
+
+class ZkeyRangeTests(SimpleTestCase):
+    """bbox -> zkey range covers (Devices/utils.py)"""
+
+    BBOXES = [
+        (27.66, 85.28, 27.74, 85.36),          # city viewport
+        (28.6139, 77.2090, 28.6149, 77.2100),  # street
+        (-0.5, -0.5, 0.5, 0.5),                # across both zero lines
+        (-89.9, 179.0, -88.0, 179.999),        # grid corner
+        (-90, -180, 90, 180),                  # whole world
+    ]
+
+    def grid(self, min_lat, min_lon, max_lat, max_lon, steps=25):
+        return [
+            (min_lat + (max_lat - min_lat) * i / steps, min_lon + (max_lon - min_lon) * j / steps)
+            for i in range(steps + 1) for j in range(steps + 1)
+        ]
+
+    def test_every_point_inside_is_covered(self):
+        for bbox in self.BBOXES:
+            ranges = bbox_to_zranges(*bbox)
+            self.assertLessEqual(len(ranges), 8, bbox)
+            self.assertEqual(ranges, sorted(ranges), bbox)
+            for (low, high), (next_low, _) in zip(ranges, ranges[1:]):
+                self.assertLess(high + 1, next_low, bbox)  # disjoint, not adjacent
+            for latitude, longitude in self.grid(*bbox):
+                self.assertTrue(covered(ranges, compute_zkey(latitude, longitude)), (bbox, latitude, longitude))
+
+    def test_small_bbox_excludes_far_points(self):
+        min_lat, min_lon, max_lat, max_lon = self.BBOXES[0]
+        ranges = bbox_to_zranges(min_lat, min_lon, max_lat, max_lon)
+
+        for latitude, longitude in self.grid(min_lat + 1, min_lon + 1, max_lat + 1, max_lon + 1):
+            self.assertFalse(covered(ranges, compute_zkey(latitude, longitude)))
+
+    def test_max_ranges(self):
+        ranges = bbox_to_zranges(*self.BBOXES[0], max_ranges=2)
+
+        self.assertLessEqual(len(ranges), 2)
+        for latitude, longitude in self.grid(*self.BBOXES[0]):
+            self.assertTrue(covered(ranges, compute_zkey(latitude, longitude)))
+
+    def test_merge_closes_the_smallest_gaps(self):
+        ranges = [(100, 101), (0, 1), (2, 3), (10, 11), (103, 104)]
+
+        self.assertEqual(merge_zranges(ranges, 8), [(0, 3), (10, 11), (100, 101), (103, 104)])
+        self.assertEqual(merge_zranges(ranges, 2), [(0, 11), (100, 104)])
+        self.assertEqual(merge_zranges(ranges, 1), [(0, 104)])
@@ -289,6 +289,195 @@ def is_location_near(lat1, lon1, lat2, lon2, threshold_meters=50):
     return distance <= threshold_meters
 
 
+def grid_cell(latitude, longitude, cell_degrees):
+    """
+    Integer key of the grid cell containing a point
+    Row-major over a global grid of cell_degrees squares
+    
+    Used for: Route start/end bucketing (Route.start_cell / end_cell)
+    """
+    from math import floor
+    
+    columns = int(round(360 / cell_degrees)) + 1
+    ix = floor((longitude + 180.0) / cell_degrees)
+    iy = floor((latitude + 90.0) / cell_degrees)
+    return iy * columns + ix
+
+
+def grid_cells_near(latitude, longitude, radius_meters, cell_degrees):
+    """
+    Keys of every grid cell within radius_meters of a point
+    (at most 3x3 cells when the radius is smaller than a cell)
+    """
+    from math import cos, floor, radians
+    
+    columns = int(round(360 / cell_degrees)) + 1
+    dlat = radius_meters / 111320
+    dlon = radius_meters / (111320 * max(cos(radians(latitude)), 1e-6))
+    
+    min_ix = floor((longitude - dlon + 180.0) / cell_degrees)
+    max_ix = floor((longitude + dlon + 180.0) / cell_degrees)
+    min_iy = floor((latitude - dlat + 90.0) / cell_degrees)
+    max_iy = floor((latitude + dlat + 90.0) / cell_degrees)
+    
+    return [
+        iy * columns + ix
+        for iy in range(min_iy, max_iy + 1)
+        for ix in range(min_ix, max_ix + 1)
+    ]
+
+
+# ============================================================
+# SPATIAL KEYS (Z-ORDER)
+# ============================================================
+# zkey interleaves the bits of the quantized longitude (even bits) and
+# latitude (odd bits), so nearby points share key prefixes. Dropping the
+# low 2*k bits gives the key of the enclosing cell k levels up, so one
+# indexed column serves every precision: a cell at any level is a
+# contiguous zkey range.
+
+ZKEY_BITS = 24  # Per axis: ~2.4 m x 1.2 m cells at the finest level
+
+
+def _spread_bits(value):
+    """Insert a zero bit between each of the low 32 bits"""
+    value = (value | (value << 16)) & 0x0000FFFF0000FFFF
+    value = (value | (value << 8)) & 0x00FF00FF00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value << 2)) & 0x3333333333333333
+    value = (value | (value << 1)) & 0x5555555555555555
+    return value
+
+
+def _quantize(latitude, longitude, bits=ZKEY_BITS):
+    """Grid column/row of a point with 2**bits cells per axis"""
+    cells = 1 << bits
+    ix = min(max(int((longitude + 180.0) / 360.0 * cells), 0), cells - 1)
+    iy = min(max(int((latitude + 90.0) / 180.0 * cells), 0), cells - 1)
+    return ix, iy
+
+
+def compute_zkey(latitude, longitude):
+    """
+    Z-order (Morton) key of a GPS point at the finest precision
+    Stored on Telemetry.zkey at ingest
+    """
+    ix, iy = _quantize(latitude, longitude)
+    return _spread_bits(ix) | (_spread_bits(iy) << 1)
+
+
+def bbox_to_zranges(min_lat, min_lon, max_lat, max_lon, max_cells=64, max_ranges=8):
+    """
+    Cover a bounding box with a few inclusive zkey ranges
+    
+    Picks the finest level at which the bbox spans at most max_cells
+    cells, merges cells with consecutive keys, then merges the closest
+    ranges until at most max_ranges remain (merge_zranges). The ranges may cover some
+    area outside the bbox; callers keep the exact lat/lon filter
+    (see zkey_bbox_filter).
+    
+    Returns: [(low, high), ...] sorted, on the finest-level key scale
+    """
+    level_bits = ZKEY_BITS
+    while level_bits > 0:
+        min_ix, min_iy = _quantize(min_lat, min_lon, level_bits)
+        max_ix, max_iy = _quantize(max_lat, max_lon, level_bits)
+        if (max_ix - min_ix + 1) * (max_iy - min_iy + 1) <= max_cells:
+            break
+        level_bits -= 1
+    
+    shift = 2 * (ZKEY_BITS - level_bits)
+    ranges = []
+    for ix in range(min_ix, max_ix + 1):
+        for iy in range(min_iy, max_iy + 1):
+            code = _spread_bits(ix) | (_spread_bits(iy) << 1)
+            ranges.append((code << shift, ((code + 1) << shift) - 1))
+    
+    return merge_zranges(ranges, max_ranges)
+
+
+def merge_zranges(ranges, max_ranges):
+    """
+    Sort and coalesce inclusive zkey ranges, then close the smallest
+    gaps until at most max_ranges remain
+    
+    Used to combine the ranges of several bboxes (e.g. every grid cell
+    along a route) into one short OR of index range scans.
+    """
+    merged = []
+    for low, high in sorted(ranges):
+        if merged and low <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], high)
+        else:
+            merged.append([low, high])
+    
+    if len(merged) > max_ranges:
+        # Keep the (max_ranges - 1) widest gaps, close every other one
+        gaps = sorted(range(len(merged) - 1), key=lambda i: merged[i + 1][0] - merged[i][1])
+        kept = set(gaps[len(gaps) - (max_ranges - 1):]) if max_ranges > 1 else set()
+        closed = []
+        for index, (low, high) in enumerate(merged):
+            if closed and index - 1 not in kept:
+                closed[-1][1] = high
+            else:
+                closed.append([low, high])
+        merged = closed
+    
+    return [(low, high) for low, high in merged]
+
+
+def zkey_ranges_filter(ranges, prefix=''):
+    """Q object: zkey inside any of the inclusive ranges"""
+    from django.db.models import Q
+    
+    zkey_q = Q()
+    for low, high in ranges:
+        zkey_q |= Q(**{f'{prefix}zkey__gte': low, f'{prefix}zkey__lte': high})
+    return zkey_q
+
+
+def zkey_bbox_filter(min_lat, min_lon, max_lat, max_lon, prefix=''):
+    """
+    Q object selecting rows inside a bbox through the zkey index
+    
+    Args:
+        prefix: Lookup prefix when filtering through a relation
+    
+    Usage: Telemetry.objects.filter(zkey_bbox_filter(...), timestamp__gte=cutoff)
+    """
+    from django.db.models import Q
+    
+    zkey_q = zkey_ranges_filter(bbox_to_zranges(min_lat, min_lon, max_lat, max_lon), prefix)
+    
+    return zkey_q & Q(**{
+        f'{prefix}latitude__gte': min_lat,
+        f'{prefix}latitude__lte': max_lat,
+        f'{prefix}longitude__gte': min_lon,
+        f'{prefix}longitude__lte': max_lon,
+    })
+
+
+# ============================================================
+# REDIS
+# ============================================================
+
+def cache_redis_client(key):
+    """
+    Raw Redis client behind the default cache (pipelines, hashes, sorted
+    sets - what the cache API lacks) and the cache's full key for `key`
+
+    Returns: (client, full_key), client None when the default cache is
+             not Redis (callers fall back to the cache API)
+    """
+    from django.core.cache import cache
+
+    full_key = cache.make_key(key)
+    backend = getattr(cache, '_cache', None)  # django.core.cache.backends.redis.RedisCacheClient
+    if not hasattr(backend, 'get_client'):
+        return None, full_key
+    return backend.get_client(full_key, write=True), full_key
+
+
 # ============================================================
 # RESPONSE HELPERS
 # ============================================================
@@ -0,0 +1,122 @@
+"""
+YatriConnect - Active Journey Map
+Two-tier cache (process memory -> Redis) mapping each vehicle to the
+ongoing journey it is on, so ingestion links samples to their journey
+(Telemetry.journey) without a query per batch
+
+start_journey / end_journey (any Journey save or delete) invalidate
+the vehicle's entry through Journey/signals.py; other processes see
+the change once their local entry expires (active_journey_local_ttl).
+"""
+
+import time
+from collections import namedtuple
+from django.conf import settings
+from django.core.cache import cache
+
+
+ActiveJourney = namedtuple('ActiveJourney', ['journey_pk', 'start_time'])
+
+# Cached for vehicles without an ongoing journey (None means "not cached")
+NO_JOURNEY = 0
+
+# vehicle_pk -> (ActiveJourney or None, expires_at)
+_local_entries = {}
+
+
+def _cache_key(vehicle_pk):
+    return f"active_journey_{vehicle_pk}"
+
+
+def _ttls():
+    config = settings.TELEMETRY_INGEST_CONFIG
+    return config['active_journey_local_ttl'], config['active_journey_cache_ttl']
+
+
+def _load_from_db(vehicle_pks):
+    """Latest ongoing journey per vehicle, in one query"""
+    from Journey.models import Journey
+
+    rows = Journey.objects.filter(
+        vehicle_id__in=list(vehicle_pks),
+        status=Journey.TripStatus.ONGOING
+    ).order_by('vehicle_id', 'start_time').values_list('vehicle_id', 'pk', 'start_time')
+
+    loaded = {vehicle_pk: None for vehicle_pk in vehicle_pks}
+    for vehicle_pk, journey_pk, start_time in rows:
+        loaded[vehicle_pk] = ActiveJourney(journey_pk, start_time)
+    return loaded
+
+
+def get_active_journeys(vehicle_pks):
+    """
+    Ongoing journey of many vehicles at once
+
+    Lookup order: process memory -> Redis -> database
+    Vehicles without an ongoing journey are left out of the result.
+
+    Returns: {vehicle_pk: ActiveJourney}
+    """
+    local_ttl, cache_ttl = _ttls()
+    now = time.monotonic()
+    found = {}
+    missing = []
+
+    for vehicle_pk in vehicle_pks:
+        local = _local_entries.get(vehicle_pk)
+        if local and local[1] > now:
+            if local[0] is not None:
+                found[vehicle_pk] = local[0]
+        else:
+            missing.append(vehicle_pk)
+
+    if not missing:
+        return found
+
+    # Second tier: Redis
+    cached = cache.get_many([_cache_key(vehicle_pk) for vehicle_pk in missing])
+    from_db = [vehicle_pk for vehicle_pk in missing if _cache_key(vehicle_pk) not in cached]
+    for vehicle_pk in missing:
+        value = cached.get(_cache_key(vehicle_pk))
+        if value is None:
+            continue
+        entry = ActiveJourney(*value) if value != NO_JOURNEY else None
+        _local_entries[vehicle_pk] = (entry, now + local_ttl)
+        if entry is not None:
+            found[vehicle_pk] = entry
+
+    # Cold path: database
+    if from_db:
+        loaded = _load_from_db(from_db)
+        cache.set_many(
+            {
+                _cache_key(vehicle_pk): tuple(entry) if entry is not None else NO_JOURNEY
+                for vehicle_pk, entry in loaded.items()
+            },
+            cache_ttl
+        )
+        for vehicle_pk, entry in loaded.items():
+            _local_entries[vehicle_pk] = (entry, now + local_ttl)
+            if entry is not None:
+                found[vehicle_pk] = entry
+
+    return found
+
+
+def journey_at(active, timestamp):
+    """
+    Journey a sample belongs to, given its vehicle's ActiveJourney
+    (None without one, or for samples older than the journey's start)
+    """
+    if active is None or timestamp < active.start_time:
+        return None
+    return active.journey_pk
+
+
+def invalidate_vehicles(vehicle_pks):
+    """Drop entries from both tiers (called from model signals)"""
+    vehicle_pks = list(vehicle_pks)
+    for vehicle_pk in vehicle_pks:
+        _local_entries.pop(vehicle_pk, None)
+    if vehicle_pks:
+        cache.delete_many([_cache_key(vehicle_pk) for vehicle_pk in vehicle_pks])
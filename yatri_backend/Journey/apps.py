@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class JourneyConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Journey'
+
+    def ready(self):
+        # Active journey map invalidation on Journey changes
+        from Journey import signals  # noqa: F401
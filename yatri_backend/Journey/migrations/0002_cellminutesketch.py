@@ -0,0 +1,31 @@
+# Generated by Django 4.2.27 on 2026-10-17 02:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Journey', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CellMinuteSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cell_y', models.IntegerField(help_text='Grid row (latitude / grid_resolution, rounded)')),
+                ('cell_x', models.IntegerField(help_text='Grid column (longitude / grid_resolution, rounded)')),
+                ('minute', models.DateTimeField(db_index=True, help_text='Start of the minute (sample time)')),
+                ('sketch', models.BinaryField(help_text='Serialized HyperLogLog sketch (navigate/hll.py)')),
+                ('sample_count', models.IntegerField(default=0, help_text='Samples counted into this sketch')),
+            ],
+            options={
+                'db_table': 'cell_minute_sketches',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='cellminutesketch',
+            constraint=models.UniqueConstraint(fields=('cell_y', 'cell_x', 'minute'), name='unique_cell_minute'),
+        ),
+    ]
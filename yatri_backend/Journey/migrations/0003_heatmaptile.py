@@ -0,0 +1,45 @@
+# Generated by Django 4.2.27 on 2026-10-17 02:53
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Devices', '0002_route_cells'),
+        ('Journey', '0002_cellminutesketch'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HeatmapTileDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='Local day (settings.TIME_ZONE)', unique=True)),
+                ('point_count', models.IntegerField(default=0, help_text='Telemetry points compacted')),
+                ('compacted_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'db_table': 'heatmap_tile_days',
+                'ordering': ['day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='HeatmapTile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(help_text='Local day (settings.TIME_ZONE)')),
+                ('grid_size', models.FloatField(help_text='Tile resolution in degrees')),
+                ('cell_y', models.IntegerField(help_text='Grid row (latitude / grid_size, rounded)')),
+                ('cell_x', models.IntegerField(help_text='Grid column (longitude / grid_size, rounded)')),
+                ('pass_count', models.IntegerField(help_text='Telemetry points in the cell')),
+                ('latest', models.DateTimeField(help_text='Most recent point in the cell')),
+                ('vehicle', models.ForeignKey(help_text='Vehicle the points belong to', on_delete=django.db.models.deletion.CASCADE, related_name='heatmap_tiles', to='Devices.vehicle')),
+            ],
+            options={
+                'db_table': 'heatmap_tiles',
+                'indexes': [models.Index(fields=['grid_size', 'day'], name='heatmap_til_grid_si_a5cd59_idx'), models.Index(fields=['day'], name='heatmap_til_day_b76205_idx')],
+            },
+        ),
+    ]
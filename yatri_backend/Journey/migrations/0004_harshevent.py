@@ -0,0 +1,41 @@
+# Generated by Django 4.2.27 on 2026-10-17 03:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Devices', '0002_route_cells'),
+        ('Journey', '0003_heatmaptile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HarshEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('event_type', models.CharField(choices=[('harsh_acceleration', 'Harsh Acceleration'), ('harsh_braking', 'Harsh Braking'), ('harsh_cornering', 'Harsh Cornering')], help_text='Dominant axis/direction of the acceleration', max_length=20)),
+                ('timestamp', models.DateTimeField(help_text='Sample time')),
+                ('day', models.DateField(help_text='Local day of the sample (settings.TIME_ZONE)')),
+                ('latitude', models.FloatField(help_text='Event location latitude')),
+                ('longitude', models.FloatField(help_text='Event location longitude')),
+                ('speed', models.FloatField(blank=True, help_text='Speed at the sample (m/s)', null=True)),
+                ('accel_x', models.FloatField(blank=True, help_text='Longitudinal acceleration (m/s²)', null=True)),
+                ('accel_y', models.FloatField(blank=True, help_text='Lateral acceleration (m/s²)', null=True)),
+                ('device', models.ForeignKey(help_text='Device that reported the sample', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='Devices.device')),
+                ('journey', models.ForeignKey(blank=True, help_text='Journey in progress at the time of the sample', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='harsh_events', to='Journey.journey')),
+                ('vehicle', models.ForeignKey(help_text='Vehicle that was driven harshly', on_delete=django.db.models.deletion.CASCADE, related_name='harsh_events', to='Devices.vehicle')),
+            ],
+            options={
+                'db_table': 'harsh_events',
+                'ordering': ['-timestamp'],
+                'indexes': [models.Index(fields=['vehicle', 'day'], name='harsh_event_vehicle_72ad5e_idx'), models.Index(fields=['journey'], name='harsh_event_journey_f41d4c_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='harshevent',
+            constraint=models.UniqueConstraint(fields=('device', 'timestamp'), name='unique_harsh_event_sample'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.27 on 2026-10-17 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Journey', '0004_harshevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cellminutesketch',
+            name='speed_count',
+            field=models.IntegerField(default=0, help_text='Samples with a speed'),
+        ),
+        migrations.AddField(
+            model_name='cellminutesketch',
+            name='speed_sum',
+            field=models.FloatField(default=0, help_text='Sum of sample speeds (m/s)'),
+        ),
+        migrations.AddField(
+            model_name='congestion',
+            name='cell_x',
+            field=models.IntegerField(blank=True, help_text='Grid column of a cell snapshot', null=True),
+        ),
+        migrations.AddField(
+            model_name='congestion',
+            name='cell_y',
+            field=models.IntegerField(blank=True, help_text='Grid row of a cell snapshot', null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='congestion',
+            constraint=models.UniqueConstraint(fields=('cell_y', 'cell_x', 'timestamp'), name='unique_congestion_cell_window'),
+        ),
+    ]
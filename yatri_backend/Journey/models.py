@@ -194,6 +194,10 @@ class Congestion(models.Model):
         help_text="When this congestion was recorded"
     )
     
+    # Grid cell snapshots (navigate/congestion.py) - null for route rows
+    cell_y = models.IntegerField(null=True, blank=True, help_text="Grid row of a cell snapshot")
+    cell_x = models.IntegerField(null=True, blank=True, help_text="Grid column of a cell snapshot")
+    
     class Meta:
         db_table = 'congestion'
         ordering = ['-timestamp']
@@ -203,6 +207,13 @@ class Congestion(models.Model):
             models.Index(fields=['latitude', 'longitude']),
             models.Index(fields=['-timestamp']),
         ]
+        constraints = [
+            # One snapshot per cell and window (upserted by the snapshot writer)
+            models.UniqueConstraint(
+                fields=['cell_y', 'cell_x', 'timestamp'],
+                name='unique_congestion_cell_window'
+            ),
+        ]
     
     def __str__(self):
         return f"{self.location_name} - {self.congestion_level} at {self.timestamp}"
@@ -372,6 +383,85 @@ class CrashEvent(models.Model):
         return f"Crash: {self.vehicle.vehicle_id} - {self.severity} at {self.timestamp}"
 
 
+# ============================================================
+# HARSH EVENT MODEL - Harsh acceleration/braking/cornering
+# ============================================================
+class HarshEvent(models.Model):
+    """
+    Harsh driving sample detected at ingest (navigate/detection.py)
+    One row per sample over the harsh acceleration threshold, so
+    "unsafe days" and "harsh journeys" are indexed lookups instead of
+    scans of raw telemetry
+    """
+
+    class EventType(models.TextChoices):
+        ACCELERATION = 'harsh_acceleration', 'Harsh Acceleration'
+        BRAKING = 'harsh_braking', 'Harsh Braking'
+        CORNERING = 'harsh_cornering', 'Harsh Cornering'
+
+    vehicle = models.ForeignKey(
+        Vehicle,
+        on_delete=models.CASCADE,
+        related_name='harsh_events',
+        help_text="Vehicle that was driven harshly"
+    )
+
+    device = models.ForeignKey(
+        'Devices.Device',
+        on_delete=models.CASCADE,
+        related_name='+',
+        help_text="Device that reported the sample"
+    )
+
+    journey = models.ForeignKey(
+        Journey,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='harsh_events',
+        help_text="Journey in progress at the time of the sample"
+    )
+
+    event_type = models.CharField(
+        max_length=20,
+        choices=EventType.choices,
+        help_text="Dominant axis/direction of the acceleration"
+    )
+
+    timestamp = models.DateTimeField(help_text="Sample time")
+
+    day = models.DateField(help_text="Local day of the sample (settings.TIME_ZONE)")
+
+    latitude = models.FloatField(help_text="Event location latitude")
+    longitude = models.FloatField(help_text="Event location longitude")
+
+    speed = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Speed at the sample (m/s)"
+    )
+
+    accel_x = models.FloatField(null=True, blank=True, help_text="Longitudinal acceleration (m/s²)")
+    accel_y = models.FloatField(null=True, blank=True, help_text="Lateral acceleration (m/s²)")
+
+    class Meta:
+        db_table = 'harsh_events'
+        ordering = ['-timestamp']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['device', 'timestamp'],
+                name='unique_harsh_event_sample'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['vehicle', 'day']),
+            models.Index(fields=['journey']),
+        ]
+
+    def __str__(self):
+        return f"{self.get_event_type_display()}: {self.vehicle_id} at {self.timestamp}"
+
+
 # ============================================================
 # ROAD SEGMENT MODEL - For congestion analysis
 # ============================================================
@@ -428,6 +518,110 @@ class RoadSegment(models.Model):
                 self.lon_min <= longitude <= self.lon_max)
 
 
+# ============================================================
+# CELL MINUTE SKETCH - Distinct vehicles per grid cell and minute
+# ============================================================
+class CellMinuteSketch(models.Model):
+    """
+    HyperLogLog sketch of the vehicles seen in one road segment grid
+    cell (navigate/segments.py) during one minute, with speed totals
+    Maintained on ingest (navigate/sketches.py); sketches of any window
+    and any set of cells merge into one distinct-vehicle estimate
+    Shared by every ingesting process - congestion snapshots
+    (navigate/congestion.py) are computed from these rows
+    """
+    
+    cell_y = models.IntegerField(help_text="Grid row (latitude / grid_resolution, rounded)")
+    cell_x = models.IntegerField(help_text="Grid column (longitude / grid_resolution, rounded)")
+    
+    minute = models.DateTimeField(
+        db_index=True,
+        help_text="Start of the minute (sample time)"
+    )
+    
+    sketch = models.BinaryField(help_text="Serialized HyperLogLog sketch (navigate/hll.py)")
+    
+    sample_count = models.IntegerField(
+        default=0,
+        help_text="Samples counted into this sketch"
+    )
+    
+    speed_sum = models.FloatField(default=0, help_text="Sum of sample speeds (m/s)")
+    speed_count = models.IntegerField(default=0, help_text="Samples with a speed")
+    
+    class Meta:
+        db_table = 'cell_minute_sketches'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['cell_y', 'cell_x', 'minute'],
+                name='unique_cell_minute'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"Cell ({self.cell_y}, {self.cell_x}) at {self.minute}"
+
+
+# ============================================================
+# HEAT MAP TILES - Precomputed pass counts per vehicle and day
+# ============================================================
+class HeatmapTile(models.Model):
+    """
+    Pass counts of one vehicle in one grid cell during one local day, at
+    each resolution of HEATMAP_CONFIG['tile_resolutions']
+    Rebuilt per day by python manage.py compact_heatmap_tiles
+    (navigate/heatmap.py); compute_heatmap sums them over date ranges
+    """
+
+    vehicle = models.ForeignKey(
+        Vehicle,
+        on_delete=models.CASCADE,
+        related_name='heatmap_tiles',
+        help_text="Vehicle the points belong to"
+    )
+
+    day = models.DateField(help_text="Local day (settings.TIME_ZONE)")
+
+    grid_size = models.FloatField(help_text="Tile resolution in degrees")
+
+    cell_y = models.IntegerField(help_text="Grid row (latitude / grid_size, rounded)")
+    cell_x = models.IntegerField(help_text="Grid column (longitude / grid_size, rounded)")
+
+    pass_count = models.IntegerField(help_text="Telemetry points in the cell")
+
+    latest = models.DateTimeField(help_text="Most recent point in the cell")
+
+    class Meta:
+        db_table = 'heatmap_tiles'
+        indexes = [
+            models.Index(fields=['grid_size', 'day']),
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self):
+        return f"Tile {self.grid_size} ({self.cell_y}, {self.cell_x}) of {self.vehicle_id} on {self.day}"
+
+
+class HeatmapTileDay(models.Model):
+    """Days whose HeatmapTile rows are complete (compacted)"""
+
+    day = models.DateField(unique=True, help_text="Local day (settings.TIME_ZONE)")
+
+    point_count = models.IntegerField(
+        default=0,
+        help_text="Telemetry points compacted"
+    )
+
+    compacted_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'heatmap_tile_days'
+        ordering = ['day']
+
+    def __str__(self):
+        return f"Heat map tiles of {self.day}"
+
+
 # ============================================================
 # THEFT EVENT MODEL - For theft detection
 # ============================================================
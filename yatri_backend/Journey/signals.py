@@ -0,0 +1,17 @@
+"""
+YatriConnect - Journey Signals
+Keep the active journey map in sync with journey starts/ends
+"""
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from Journey.models import Journey
+from Journey import active_journeys
+
+
+@receiver(post_save, sender=Journey)
+@receiver(post_delete, sender=Journey)
+def journey_changed(sender, instance, **kwargs):
+    """A started, ended or cancelled journey changes its vehicle's entry"""
+    active_journeys.invalidate_vehicles([instance.vehicle_id])
@@ -19,7 +19,7 @@ from Devices.utils import (
     success_response, error_response,
     apply_pagination, apply_date_filter,
     apply_vehicle_filter, apply_ordering,
-    calculate_distance, is_location_near,
+    calculate_distance,
     police_or_admin
 )
 from Journey.models import Journey, Congestion
@@ -246,6 +246,7 @@ def detect_public_route(journey):
     
     Logic:
     1. Find routes with similar start and end locations (within 50m)
+       via Route.find_matching (start/end grid cell prefilter)
     2. If found and trip_count >= 5, mark as public route
     3. Otherwise, create new route or increment trip count
     
@@ -256,50 +257,41 @@ def detect_public_route(journey):
     threshold = settings.PUBLIC_ROUTE_CONFIG['location_threshold']
     min_trips = settings.PUBLIC_ROUTE_CONFIG['min_trip_count']
     
-    # Find existing routes with similar endpoints
-    potential_routes = Route.objects.all()
+    # Find existing route with similar endpoints
+    route = Route.find_matching(
+        journey.start_latitude, journey.start_longitude,
+        journey.end_latitude, journey.end_longitude,
+        threshold
+    )
     
-    for route in potential_routes:
-        start_match = is_location_near(
-            journey.start_latitude, journey.start_longitude,
-            route.start_latitude, route.start_longitude,
-            threshold
-        )
+    if route:
+        # Found matching route
+        route.trip_count += 1
         
-        end_match = is_location_near(
-            journey.end_latitude, journey.end_longitude,
-            route.end_latitude, route.end_longitude,
-            threshold
-        )
+        # Update average speed and duration
+        if journey.average_speed:
+            if route.average_speed:
+                route.average_speed = (route.average_speed + journey.average_speed) / 2
+            else:
+                route.average_speed = journey.average_speed
+        
+        if journey.duration:
+            if route.average_duration:
+                route.average_duration = (route.average_duration + journey.duration) / 2
+            else:
+                route.average_duration = journey.duration
+        
+        # Mark as public if threshold reached
+        if route.trip_count >= min_trips:
+            route.is_public = True
+        
+        route.save()
+        
+        # Link journey to route
+        journey.route = route
+        journey.save()
         
-        if start_match and end_match:
-            # Found matching route
-            route.trip_count += 1
-            
-            # Update average speed and duration
-            if journey.average_speed:
-                if route.average_speed:
-                    route.average_speed = (route.average_speed + journey.average_speed) / 2
-                else:
-                    route.average_speed = journey.average_speed
-            
-            if journey.duration:
-                if route.average_duration:
-                    route.average_duration = (route.average_duration + journey.duration) / 2
-                else:
-                    route.average_duration = journey.duration
-            
-            # Mark as public if threshold reached
-            if route.trip_count >= min_trips:
-                route.is_public = True
-            
-            route.save()
-            
-            # Link journey to route
-            journey.route = route
-            journey.save()
-            
-            return
+        return
     
     # No matching route found - create new one
     route_id = f"R{timezone.now().strftime('%Y%m%d')}_{journey.vehicle.vehicle_id}"
@@ -14,10 +14,11 @@ from datetime import timedelta, datetime
 from typing import List, Dict
 
 from Devices.models import User, Vehicle, Route
-from Journey.models import Journey, RoadSegment
+from Journey.models import Journey, RoadSegment, HeatmapTile, HarshEvent
 from sensorData.models import Telemetry
-from Devices.utils import success_response, error_response, apply_date_filter
+from Devices.utils import success_response, error_response, apply_date_filter, zkey_bbox_filter
 from navigate.osm_routing import get_route_from_osm, geocode_location
+from navigate import heatmap, rollups
 
 
 # ============================================================
@@ -135,11 +136,11 @@ def search_destination_route(request):
             
             # Find telemetry within 0.01 degrees (~1.1 km) of segment center
             nearby_telemetry = Telemetry.objects.filter(
-                timestamp__gte=cutoff_time,
-                latitude__gte=center_lat - 0.01,
-                latitude__lte=center_lat + 0.01,
-                longitude__gte=center_lon - 0.01,
-                longitude__lte=center_lon + 0.01
+                zkey_bbox_filter(
+                    center_lat - 0.01, center_lon - 0.01,
+                    center_lat + 0.01, center_lon + 0.01
+                ),
+                timestamp__gte=cutoff_time
             ).select_related('device__vehicle')
             
             # Calculate metrics
@@ -244,11 +245,13 @@ def compute_heatmap(request):
       - GREEN: Rarely used (< 5 passes)
     
     Logic:
-    1. Fetch telemetry data for user/vehicle/date range
-    2. Divide into grid segments
-    3. Count passes per segment
-    4. Determine thresholds (most/medium/rare)
-    5. Assign colors
+    1. Filter telemetry for user/vehicle/date range
+    2. Divide into grid segments and count passes per segment
+       (days compacted into the tile pyramid are summed from HeatmapTile
+       at the coarsest tile resolution dividing grid_size; the rest of
+       the range is grouped from telemetry in the database)
+    3. Determine thresholds (most/medium/rare)
+    4. Assign colors
     
     Access Control:
     - Normal users: Only public routes
@@ -266,64 +269,51 @@ def compute_heatmap(request):
     user_id = request.GET.get('user_id')
     grid_size = float(request.GET.get('grid_size', 0.01))
     
-    # Build query
-    telemetry_qs = Telemetry.objects.all()
-    
-    # Apply date filter
-    telemetry_qs = apply_date_filter(telemetry_qs, 'timestamp', request)
-    
-    # Apply access control
+    # Apply access control (vehicle filters, shared by telemetry and tiles)
+    vehicle_filters = {}
     if user.role == 'normal_user':
         # Normal users: only public vehicle routes
-        telemetry_qs = telemetry_qs.filter(device__vehicle__vehicle_type='public')
+        vehicle_filters['vehicle_type'] = 'public'
     elif user.is_vehicle_owner() and not (user.is_admin() or user.is_police()):
         # Vehicle owners: own vehicles only
+        vehicle_filters['owner'] = user
         if vehicle_id:
-            telemetry_qs = telemetry_qs.filter(
-                device__vehicle__vehicle_id=vehicle_id,
-                device__vehicle__owner=user
-            )
-        else:
-            telemetry_qs = telemetry_qs.filter(device__vehicle__owner=user)
+            vehicle_filters['vehicle_id'] = vehicle_id
     else:
         # Admin/Police: can filter by vehicle_id or user_id
         if vehicle_id:
-            telemetry_qs = telemetry_qs.filter(device__vehicle__vehicle_id=vehicle_id)
+            vehicle_filters['vehicle_id'] = vehicle_id
         if user_id:
-            telemetry_qs = telemetry_qs.filter(device__vehicle__owner_id=user_id)
+            vehicle_filters['owner_id'] = user_id
     
-    # Fetch telemetry
-    telemetry_data = telemetry_qs.values('latitude', 'longitude')
+    # Build query
+    telemetry_qs = Telemetry.objects.filter(
+        **{f'device__vehicle__{field}': value for field, value in vehicle_filters.items()}
+    )
+    
+    # Apply date filter
+    telemetry_qs = apply_date_filter(telemetry_qs, 'timestamp', request)
+    
+    tile_qs = HeatmapTile.objects.filter(
+        **{f'vehicle__{field}': value for field, value in vehicle_filters.items()}
+    )
     
-    if not telemetry_data.exists():
+    # Grid segmentation: pass counts per grid cell (compacted days from
+    # the tile pyramid, the rest of the range from telemetry)
+    segment_counts = _heatmap_segment_counts(
+        telemetry_qs,
+        tile_qs,
+        grid_size,
+        request.GET.get('start_date'),
+        request.GET.get('end_date')
+    )
+    
+    if not segment_counts:
         return error_response(
             message="No telemetry data found for specified filters",
             status_code=status.HTTP_404_NOT_FOUND
         )
     
-    # Grid segmentation
-    # Group coordinates into grid cells
-    segment_counts = {}
-    
-    for point in telemetry_data:
-        lat = point['latitude']
-        lon = point['longitude']
-        
-        # Round to grid
-        grid_lat = round(lat / grid_size) * grid_size
-        grid_lon = round(lon / grid_size) * grid_size
-        
-        segment_id = f"{grid_lat:.4f}_{grid_lon:.4f}"
-        
-        if segment_id in segment_counts:
-            segment_counts[segment_id]['count'] += 1
-        else:
-            segment_counts[segment_id] = {
-                'lat': grid_lat,
-                'lon': grid_lon,
-                'count': 1
-            }
-    
     # Determine thresholds
     counts = [seg['count'] for seg in segment_counts.values()]
     max_count = max(counts) if counts else 1
@@ -363,7 +353,7 @@ def compute_heatmap(request):
     return success_response(data={
         'segments': segments_colored,
         'total_segments': len(segments_colored),
-        'total_points': len(telemetry_data),
+        'total_points': sum(counts),
         'max_passes': max_count,
         'legend': {
             'RED': 'Most used (>= 20 passes)',
@@ -374,6 +364,34 @@ def compute_heatmap(request):
     })
 
 
+def _heatmap_segment_counts(telemetry_qs, tile_qs, grid_size, start_date=None, end_date=None):
+    """
+    Pass counts per grid cell of compute_heatmap (navigate/heatmap.py)
+    
+    Cell of a point: round(lat / grid_size), round(lon / grid_size).
+    
+    Returns: {segment_id: {'lat', 'lon', 'count'}}, segments ordered by
+    their most recent point (the order the point loop used to produce)
+    """
+    cells = heatmap.cell_counts(grid_size, telemetry_qs, tile_qs, start_date, end_date)
+    
+    segment_counts = {}
+    for (cell_y, cell_x), (count, latest) in sorted(cells.items(), key=lambda item: item[1][1], reverse=True):
+        grid_lat = cell_y * grid_size
+        grid_lon = cell_x * grid_size
+        segment_id = f"{grid_lat:.4f}_{grid_lon:.4f}"
+        if segment_id in segment_counts:
+            segment_counts[segment_id]['count'] += count
+        else:
+            segment_counts[segment_id] = {
+                'lat': grid_lat,
+                'lon': grid_lon,
+                'count': count
+            }
+    
+    return segment_counts
+
+
 # ============================================================
 # PROFILE PICTURE API
 # ============================================================
@@ -465,7 +483,8 @@ def safe_distance_aggregation(request):
     
     Harsh events definition:
     - Crash detected
-    - Sudden acceleration/braking (accel > 5 m/s²)
+    - Sudden acceleration/braking/cornering (accel > 5 m/s², recorded
+      as HarshEvent rows at ingest, linked to the journey in progress)
     - Overspeed (speed > route speed limit)
     - Sharp turns (heading change > 45° in 1 sec)
     
@@ -535,22 +554,15 @@ def safe_distance_aggregation(request):
     # Get crash events for these journeys
     from Journey.models import CrashEvent
     journeys_with_crashes = CrashEvent.objects.filter(
-        vehicle__journeys__in=journeys_qs
+        journey__in=journeys_qs
     ).values_list('journey_id', flat=True)
     
-    # Get telemetry with harsh braking/acceleration
-    harsh_telemetry = Telemetry.objects.filter(
-        device__vehicle__journeys__in=journeys_qs,
-        timestamp__date__gte=start_date,
-        timestamp__date__lte=end_date
-    ).filter(
-        Q(accel_x__gt=5) | Q(accel_x__lt=-5) |
-        Q(accel_y__gt=5) | Q(accel_y__lt=-5)
-    ).values('device__vehicle__journeys__id').distinct()
+    # Get journeys with harsh braking/acceleration (HarshEvent, linked on ingest)
+    harsh_journeys = HarshEvent.objects.filter(
+        journey__in=journeys_qs
+    ).values_list('journey_id', flat=True).distinct()
     
-    harsh_journey_ids = set(journeys_with_crashes) | set(
-        [t['device__vehicle__journeys__id'] for t in harsh_telemetry if t['device__vehicle__journeys__id']]
-    )
+    harsh_journey_ids = set(journeys_with_crashes) | set(harsh_journeys)
     
     # Safe journeys = all journeys - harsh journeys
     safe_journeys = journeys_qs.exclude(id__in=harsh_journey_ids)
@@ -617,11 +629,15 @@ def quick_insights(request):
     - Total trips in date range
     - Total distance traveled
     - Top routes used
+    - Telemetry stats: samples, distance driven, average/max speed and
+      harsh samples over all driving (journeys or not)
     
     Logic:
     - Streak: Count consecutive days with no harsh events
     - Avg speed: sum(distance) / sum(duration)
     - Total trips: count of journeys
+    - Telemetry stats: summed from the hourly telemetry rollups
+      (navigate/rollups.py) - raw samples are not scanned
     
     Access Control:
     - Vehicle owners: Own vehicles only
@@ -712,15 +728,12 @@ def quick_insights(request):
         timestamp__date__lte=end_date
     ).values_list('timestamp__date', flat=True).distinct()
     
-    # Get harsh braking dates
-    harsh_dates = Telemetry.objects.filter(
-        device__vehicle=vehicle,
-        timestamp__date__gte=start_date,
-        timestamp__date__lte=end_date
-    ).filter(
-        Q(accel_x__gt=5) | Q(accel_x__lt=-5) |
-        Q(accel_y__gt=5) | Q(accel_y__lt=-5)
-    ).values_list('timestamp__date', flat=True).distinct()
+    # Get harsh braking dates (HarshEvent, recorded on ingest)
+    harsh_dates = HarshEvent.objects.filter(
+        vehicle=vehicle,
+        day__gte=start_date,
+        day__lte=end_date
+    ).values_list('day', flat=True).distinct()
     
     unsafe_dates = set(crash_dates) | set(harsh_dates)
     
@@ -735,6 +748,9 @@ def quick_insights(request):
         else:
             break
     
+    # Driving stats (hourly telemetry rollups)
+    telemetry_stats = rollups.day_totals(start_date, end_date, vehicle)
+    
     # Top routes
     top_routes = journeys_qs.filter(
         route__isnull=False
@@ -757,6 +773,14 @@ def quick_insights(request):
         'average_speed_kmh': round(avg_speed_kmh, 1),
         'max_speed_kmh': round((trip_stats['max_speed_overall'] or 0) * 3.6, 1),
         'total_duration_hours': round(total_duration_hours, 1),
+        'telemetry_stats': {
+            'samples': telemetry_stats['samples'],
+            'distance_km': round(telemetry_stats['distance'] / 1000, 2),
+            'average_speed_kmh': round((telemetry_stats['avg_speed'] or 0) * 3.6, 1),
+            'max_speed_kmh': round((telemetry_stats['max_speed'] or 0) * 3.6, 1),
+            'harsh_samples': telemetry_stats['harsh_samples'],
+            'active_hours': telemetry_stats['active_hours'],
+        },
         'top_routes': [
             {
                 'route_name': route['route__name'],
@@ -0,0 +1,45 @@
+"""
+YatriConnect - Background Flushes
+Periodic database flushes of the ingest aggregators (distinct-vehicle
+sketches, telemetry rollups, congestion snapshots) on timer threads,
+so no flush runs on the ingest request path or inside the post-commit
+callback of a batch
+
+schedule() starts a one-shot timer per task unless one is pending; the
+ingest hooks call it on every batch, so a busy process flushes every
+interval and an idle one once after its last batch. Failures are
+logged, not raised - the samples are committed and the pending state
+is kept for the next run. The ingestion workers also flush when idle.
+"""
+
+import logging
+import threading
+from django.db import connection
+
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_timers = {}  # task name -> pending threading.Timer
+
+
+def schedule(name, interval, function):
+    """Run function on a timer thread in `interval` seconds, unless already scheduled"""
+    with _lock:
+        if name in _timers:
+            return
+        timer = _timers[name] = threading.Timer(interval, _run, (name, function))
+        timer.daemon = True
+        timer.start()
+
+
+def _run(name, function):
+    """Timer thread: run a task on its own DB connection"""
+    with _lock:
+        _timers.pop(name, None)
+    try:
+        function()
+    except Exception:
+        logger.exception("Background %s flush failed", name)
+    finally:
+        connection.close()
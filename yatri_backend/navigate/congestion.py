@@ -0,0 +1,137 @@
+"""
+YatriConnect - Congestion Snapshots
+Per grid cell (navigate/segments.py) traffic over a sliding window,
+snapshotted into Congestion rows by a periodic flush, so congestion
+reads never scan telemetry
+
+Ingestion counts every stored sample into the shared per-(cell, minute)
+rows of CellMinuteSketch (navigate/sketches.py): a distinct-vehicle
+sketch plus speed totals, merged across every API process and ingestion
+worker. A snapshot merges the rows of the last window_minutes minutes
+per cell, so min_vehicles applies to the traffic of all processes.
+
+Snapshots are taken on a background timer scheduled by ingestion
+(navigate/background.py) and by idle ingestion workers, never on the
+ingest request path.
+
+Single writer: one process per flush_interval takes the snapshot lease
+(cache.add) and upserts one row per (cell, window) - a retried or
+concurrent flush of the same window overwrites instead of duplicating.
+Snapshots older than snapshot_retention_hours and sketches older than
+sketch_retention_hours are deleted by the same writer.
+"""
+
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from navigate import segments, sketches
+from navigate.hll import HyperLogLog
+
+
+SNAPSHOT_LEASE_KEY = 'congestion_snapshot_lease'
+
+_last_flush = time.monotonic()
+
+
+def _config():
+    return settings.CONGESTION_CONFIG
+
+
+def classify(avg_speed_mps):
+    """Congestion level for an average speed"""
+    from Journey.models import Congestion
+
+    if avg_speed_mps is None:
+        return Congestion.CongestionLevel.LOW
+    avg_speed_kmh = avg_speed_mps * 3.6
+    for level in ('severe', 'high', 'moderate'):
+        if avg_speed_kmh < _config()['level_speeds'][level]:
+            return Congestion.CongestionLevel(level)
+    return Congestion.CongestionLevel.LOW
+
+
+def flush_if_due():
+    """Flush when flush_interval has passed (idle ingestion workers)"""
+    if time.monotonic() - _last_flush >= _config()['flush_interval']:
+        return flush()
+    return 0
+
+
+def flush():
+    """
+    Snapshot the window into Congestion rows (one bulk upsert)
+
+    One row per cell with at least min_vehicles distinct vehicles
+    (merged across processes), timestamped with the start of the
+    current minute; readers take recent rows (get_congestion_data).
+
+    Returns: snapshotted cells (0 when another process holds the lease)
+    """
+    global _last_flush
+    from Journey.models import CellMinuteSketch, Congestion
+
+    config = _config()
+    _last_flush = time.monotonic()
+
+    if not cache.add(SNAPSHOT_LEASE_KEY, 1, config['flush_interval']):
+        return 0
+
+    # This process's unflushed samples first, so the window is complete
+    sketches.flush()
+
+    now = timezone.now()
+    window_end = now.replace(second=0, microsecond=0)
+    window_start = window_end - timedelta(minutes=config['window_minutes'] - 1)
+
+    merged = {}  # (cell_y, cell_x) -> [HyperLogLog, speed_sum, speed_count]
+    rows = CellMinuteSketch.objects.filter(minute__gte=window_start).values_list(
+        'cell_y', 'cell_x', 'sketch', 'speed_sum', 'speed_count'
+    )
+    for cell_y, cell_x, sketch, speed_sum, speed_count in rows.iterator():
+        if not sketch:
+            continue
+        cell = merged.get((cell_y, cell_x))
+        if cell is None:
+            cell = merged[(cell_y, cell_x)] = [HyperLogLog(config['hll_precision']), 0.0, 0]
+        cell[0].merge_bytes(sketch)
+        cell[1] += speed_sum
+        cell[2] += speed_count
+
+    names = segments.segment_names()
+    snapshots = []
+    for cell, (vehicles, speed_sum, speed_count) in merged.items():
+        vehicle_count = vehicles.count()
+        if vehicle_count < config['min_vehicles']:
+            continue
+        avg_speed = speed_sum / speed_count if speed_count else None
+        latitude, longitude = segments.cell_center(cell)
+        snapshots.append(Congestion(
+            cell_y=cell[0],
+            cell_x=cell[1],
+            location_name=names.get(cell) or f"{latitude:.2f}_{longitude:.2f}",
+            latitude=round(latitude, 6),
+            longitude=round(longitude, 6),
+            congestion_level=classify(avg_speed),
+            vehicle_count=vehicle_count,
+            average_speed=avg_speed or 0,
+            timestamp=window_end
+        ))
+
+    Congestion.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=['cell_y', 'cell_x', 'timestamp'],
+        update_fields=['location_name', 'congestion_level', 'vehicle_count', 'average_speed']
+    )
+
+    # Retention (route rows, cell_y null, are left alone)
+    Congestion.objects.filter(
+        cell_y__isnull=False,
+        timestamp__lt=now - timedelta(hours=config['snapshot_retention_hours'])
+    ).delete()
+    sketches.prune()
+
+    return len(snapshots)
@@ -0,0 +1,229 @@
+"""
+YatriConnect - Crash, Theft & Harsh Driving Detection
+Rule evaluation shared by single and batch telemetry ingestion
+"""
+
+from datetime import timedelta
+from django.utils import timezone
+
+from Journey.models import CrashEvent, TheftEvent, HarshEvent
+
+
+# Theft rule: moving > 5 km/h (1.39 m/s) for at least 5 readings in 10 seconds
+THEFT_SPEED_THRESHOLD = 1.39
+THEFT_WINDOW_SECONDS = 10
+THEFT_MIN_READINGS = 5
+
+# Harsh driving rule: |longitudinal| or |lateral| acceleration above 5 m/s²
+HARSH_ACCEL_THRESHOLD = 5
+
+
+# ============================================================
+# CRASH DETECTION
+# ============================================================
+
+def evaluate_crash(current, previous):
+    """
+    Evaluate crash rules for a sample against its predecessor
+
+    Works on any object exposing the Telemetry attributes
+    (timestamp, speed, accel_magnitude, accel_x, accel_y, pitch, roll)
+
+    CRASH DETECTION RULES (all must be true):
+    - Samples 1-2 seconds apart
+    - G-force > 3.5g
+    - Speed drops > 60%
+    - Pitch or roll > 45°
+    - Acceleration spike > ±5 m/s²
+
+    Returns: dict with severity, g_force, speed_drop_percent or None
+    """
+    if previous is None or current.speed is None:
+        return None
+
+    # Calculate time difference
+    time_diff = (current.timestamp - previous.timestamp).total_seconds()
+    if not 1 <= time_diff <= 2:  # Within 1-2 seconds
+        return None
+
+    # 1. Check G-force > 3.5g
+    g_force = None
+    if current.accel_magnitude:
+        g_force = current.accel_magnitude / 9.8  # Convert to g
+
+    # 2. Check speed drop > 60%
+    speed_drop_percent = 0
+    if previous.speed and previous.speed > 0:
+        speed_drop_percent = ((previous.speed - current.speed) / previous.speed) * 100
+
+    # 3. Check pitch or roll > 45°
+    pitch_critical = current.pitch and abs(current.pitch) > 45
+    roll_critical = current.roll and abs(current.roll) > 45
+
+    # 4. Check acceleration spike > ±5 m/s²
+    accel_spike = False
+    if current.accel_x or current.accel_y:
+        accel_spike = (
+            (current.accel_x and abs(current.accel_x) > 5) or
+            (current.accel_y and abs(current.accel_y) > 5)
+        )
+
+    # ALL conditions must be met
+    if not (g_force and g_force > 3.5 and
+            speed_drop_percent > 60 and
+            (pitch_critical or roll_critical) and
+            accel_spike):
+        return None
+
+    # Determine severity based on G-force
+    if g_force > 8:
+        severity = CrashEvent.Severity.CRITICAL
+    elif g_force > 6:
+        severity = CrashEvent.Severity.HIGH
+    elif g_force > 4.5:
+        severity = CrashEvent.Severity.MEDIUM
+    else:
+        severity = CrashEvent.Severity.LOW
+
+    return {
+        'severity': severity,
+        'g_force': g_force,
+        'speed_drop_percent': speed_drop_percent,
+    }
+
+
+def create_crash_event(vehicle, telemetry, previous, crash):
+    """
+    Persist a detected crash and take the vehicle offline
+
+    Confirmation deadline: 15 seconds from detection
+    """
+    CrashEvent.objects.create(
+        vehicle=vehicle,
+        journey_id=telemetry.journey_id,  # Journey in progress (active journey map)
+        severity=crash['severity'],
+        status=CrashEvent.Status.AWAITING_CONFIRMATION,
+        latitude=telemetry.latitude,
+        longitude=telemetry.longitude,
+        accel_magnitude=telemetry.accel_magnitude,
+        speed_before=previous.speed,
+        speed_after=telemetry.speed,
+        speed_drop_percent=crash['speed_drop_percent'],
+        pitch_angle=telemetry.pitch,
+        roll_angle=telemetry.roll,
+        g_force=crash['g_force'],
+        timestamp=telemetry.timestamp,
+        confirmation_deadline=timezone.now() + timedelta(seconds=15)
+    )
+
+    # Update vehicle status
+    vehicle.is_active = False
+    vehicle.save()
+
+
+# ============================================================
+# THEFT DETECTION
+# ============================================================
+
+def is_theft_candidate(telemetry):
+    """
+    Check the per-sample theft conditions
+
+    THEFT DETECTION RULES:
+    - Vehicle status = PARKED
+    - Engine = OFF
+    - Owner not nearby (BLE = False)
+    - Vehicle moves > 5 km/h
+
+    The duration rule (> 10 sec) is checked by the caller
+    against recent readings.
+    """
+    return bool(
+        telemetry.parking_status and              # Vehicle is PARKED
+        not telemetry.engine_status and           # Engine is OFF
+        not telemetry.ble_proximity and           # Owner NOT nearby
+        telemetry.speed and telemetry.speed > THEFT_SPEED_THRESHOLD
+    )
+
+
+def create_theft_event(vehicle, telemetry):
+    """Persist a detected theft and take the vehicle offline"""
+    TheftEvent.objects.create(
+        vehicle=vehicle,
+        status=TheftEvent.Status.DETECTED,
+        speed_detected=telemetry.speed,
+        duration_seconds=THEFT_WINDOW_SECONDS,
+        engine_was_off=not telemetry.engine_status,
+        owner_nearby=telemetry.ble_proximity,
+        latitude=telemetry.latitude,
+        longitude=telemetry.longitude,
+        owner_notified=True,  # Trigger notification
+        police_notified=True,  # Trigger police alert
+        timestamp=telemetry.timestamp
+    )
+
+    # Update vehicle status
+    vehicle.is_active = False
+    vehicle.save()
+
+
+# ============================================================
+# HARSH DRIVING DETECTION
+# ============================================================
+
+def harsh_event_type(accel_x, accel_y):
+    """
+    Classify a sample's acceleration (None if not harsh)
+
+    HARSH DRIVING RULES (dominant axis wins):
+    - accel_x > 5 m/s²:   harsh acceleration
+    - accel_x < -5 m/s²:  harsh braking
+    - |accel_y| > 5 m/s²: harsh cornering
+    """
+    longitudinal = abs(accel_x) if accel_x is not None else 0
+    lateral = abs(accel_y) if accel_y is not None else 0
+
+    if max(longitudinal, lateral) <= HARSH_ACCEL_THRESHOLD:
+        return None
+    if lateral > longitudinal:
+        return HarshEvent.EventType.CORNERING
+    if accel_x > 0:
+        return HarshEvent.EventType.ACCELERATION
+    return HarshEvent.EventType.BRAKING
+
+
+def create_harsh_events(telemetry_list, vehicle_pks):
+    """
+    Persist harsh samples as HarshEvent rows, linked to the sample's
+    journey (Telemetry.journey, from the active journey map)
+
+    Args:
+        telemetry_list: Stored Telemetry instances
+        vehicle_pks: {device_pk: vehicle_pk}
+
+    A sample stored twice is ignored by the (device, timestamp) constraint.
+
+    Returns: number of harsh samples
+    """
+    events = []
+    for telemetry in telemetry_list:
+        event_type = harsh_event_type(telemetry.accel_x, telemetry.accel_y)
+        if event_type is None:
+            continue
+        events.append(HarshEvent(
+            vehicle_id=vehicle_pks[telemetry.device_id],
+            device_id=telemetry.device_id,
+            journey_id=telemetry.journey_id,
+            event_type=event_type,
+            timestamp=telemetry.timestamp,
+            day=timezone.localtime(telemetry.timestamp).date(),
+            latitude=telemetry.latitude,
+            longitude=telemetry.longitude,
+            speed=telemetry.speed,
+            accel_x=telemetry.accel_x,
+            accel_y=telemetry.accel_y
+        ))
+
+    if events:
+        HarshEvent.objects.bulk_create(events, ignore_conflicts=True, batch_size=500)
+    return len(events)
@@ -0,0 +1,257 @@
+"""
+YatriConnect - Heat Map Tile Pyramid
+Pass counts per vehicle, day and grid cell, precomputed at fixed grid
+resolutions (HEATMAP_CONFIG['tile_resolutions']) into HeatmapTile rows
+
+compact_day() rebuilds the tiles of one local day from telemetry; the
+nightly job (python manage.py compact_heatmap_tiles) compacts every day
+up to yesterday and re-compacts the last few to absorb late samples.
+
+cell_counts() answers compute_heatmap: compacted days inside the
+requested window are summed from the tiles of the coarsest resolution
+that divides grid_size, only the rest of the window (today, partial
+days, uncompacted days) is read from telemetry. A cell of a point is
+round(lat / grid_size), round(lon / grid_size) on both paths, so at a
+tile resolution the result is exact; at a multiple of one, tiles are
+re-bucketed by their centre (points within half a tile of a cell edge
+may land in the neighbouring cell).
+"""
+
+import math
+from datetime import datetime, time, timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Max, Q, Sum, F
+from django.db.models.functions import Round
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+def _config():
+    return settings.HEATMAP_CONFIG
+
+
+# ============================================================
+# GRID CELLS
+# ============================================================
+
+def grid_cells(queryset, grid_size, group_by=()):
+    """
+    Point counts per grid cell of a Telemetry queryset
+
+    GROUP BY in the database on backends with ROUND over floats (on
+    PostgreSQL double precision ROUND ties to even, like Python's round);
+    other backends stream the points in chunks and bucket them here.
+
+    Args:
+        queryset: Telemetry queryset (already filtered)
+        grid_size: Cell size in degrees
+        group_by: Extra fields to group by (e.g. 'device__vehicle_id')
+
+    Returns: {(*group_by values, cell_y, cell_x): [count, latest timestamp]}
+    """
+    config = _config()
+    cells = {}
+
+    if connection.vendor in config['sql_vendors']:
+        rows = queryset.annotate(
+            cell_y=Round(F('latitude') / grid_size),
+            cell_x=Round(F('longitude') / grid_size)
+        ).values(*group_by, 'cell_y', 'cell_x').annotate(
+            count=Count('id'),
+            latest=Max('timestamp')
+        ).order_by()
+
+        for row in rows:
+            key = (*(row[field] for field in group_by), int(row['cell_y']), int(row['cell_x']))
+            cells[key] = [row['count'], row['latest']]
+    else:
+        points = queryset.values_list(*group_by, 'latitude', 'longitude', 'timestamp').iterator(
+            chunk_size=config['chunk_size']
+        )
+        for *group, lat, lon, timestamp in points:
+            key = (*group, round(lat / grid_size), round(lon / grid_size))
+            cell = cells.get(key)
+            if cell is None:
+                cells[key] = [1, timestamp]
+            else:
+                cell[0] += 1
+                if timestamp > cell[1]:
+                    cell[1] = timestamp
+
+    return cells
+
+
+def merge_cells(cells, other):
+    """Add the counts of other into cells (same key layout)"""
+    for key, (count, latest) in other.items():
+        cell = cells.get(key)
+        if cell is None:
+            cells[key] = [count, latest]
+        else:
+            cell[0] += count
+            if latest > cell[1]:
+                cell[1] = latest
+    return cells
+
+
+def tile_resolution(grid_size):
+    """
+    Coarsest tile resolution grid_size is a whole multiple of
+    Returns: (resolution, ratio) or (None, None) if no tile level fits
+    """
+    for resolution in sorted(_config()['tile_resolutions'], reverse=True):
+        ratio = grid_size / resolution
+        if ratio >= 1 - 1e-9 and math.isclose(ratio, round(ratio), rel_tol=1e-6):
+            return resolution, int(round(ratio))
+    return None, None
+
+
+# ============================================================
+# DAYS
+# ============================================================
+
+def day_bounds(day):
+    """[start, end) of a local day (settings.TIME_ZONE), as aware datetimes"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+    return start, end
+
+
+def parse_bound(value):
+    """
+    Date filter value (start_date / end_date) as an aware datetime, the
+    way the timestamp filter interprets it
+    Raises ValueError if the value is not a date or datetime
+    """
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f"Invalid date: {value}")
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def compacted_runs(start=None, end=None):
+    """
+    Compacted days lying completely inside [start, end], as runs of
+    consecutive days [(first_day, last_day), ...]
+    """
+    from Journey.models import HeatmapTileDay
+
+    days = HeatmapTileDay.objects.all()
+    if start is not None:
+        first = timezone.localtime(start).date()
+        if day_bounds(first)[0] < start:
+            first += timedelta(days=1)
+        days = days.filter(day__gte=first)
+    if end is not None:
+        # Day d is inside if every point of it (< next midnight) is <= end
+        last = timezone.localtime(end).date() - timedelta(days=1)
+        days = days.filter(day__lte=last)
+
+    runs = []
+    for day in days.order_by('day').values_list('day', flat=True):
+        if runs and runs[-1][1] + timedelta(days=1) == day:
+            runs[-1][1] = day
+        else:
+            runs.append([day, day])
+    return [tuple(run) for run in runs]
+
+
+# ============================================================
+# COMPACTION
+# ============================================================
+
+def compact_day(day):
+    """
+    Rebuild the tiles of one local day from telemetry (all resolutions)
+    Returns: number of tiles written
+    """
+    from Journey.models import HeatmapTile, HeatmapTileDay
+    from sensorData.models import Telemetry
+
+    start, end = day_bounds(day)
+    telemetry_qs = Telemetry.objects.filter(timestamp__gte=start, timestamp__lt=end)
+
+    tiles = []
+    point_count = 0
+    for resolution in _config()['tile_resolutions']:
+        cells = grid_cells(telemetry_qs, resolution, group_by=('device__vehicle_id',))
+        for (vehicle_id, cell_y, cell_x), (count, latest) in cells.items():
+            tiles.append(HeatmapTile(
+                vehicle_id=vehicle_id,
+                day=day,
+                grid_size=resolution,
+                cell_y=cell_y,
+                cell_x=cell_x,
+                pass_count=count,
+                latest=latest
+            ))
+        point_count = sum(count for count, _ in cells.values())  # same at every resolution
+
+    with transaction.atomic():
+        HeatmapTile.objects.filter(day=day).delete()
+        HeatmapTile.objects.bulk_create(tiles, batch_size=_config()['chunk_size'])
+        HeatmapTileDay.objects.update_or_create(day=day, defaults={'point_count': point_count})
+
+    return len(tiles)
+
+
+# ============================================================
+# HEAT MAP QUERIES
+# ============================================================
+
+def cell_counts(grid_size, telemetry_qs, tile_qs, start_date=None, end_date=None):
+    """
+    Pass counts per grid cell of compute_heatmap
+
+    Args:
+        grid_size: Cell size in degrees
+        telemetry_qs: Telemetry filtered by access control and date range
+        tile_qs: HeatmapTile filtered by the same access control
+        start_date, end_date: The date range query params (timestamps in
+                              [start_date, end_date] are counted)
+
+    Returns: {(cell_y, cell_x): [count, latest timestamp]}
+    """
+    resolution, ratio = tile_resolution(grid_size)
+    runs = []
+    if resolution and _config()['use_tiles']:
+        try:
+            runs = compacted_runs(
+                parse_bound(start_date) if start_date else None,
+                parse_bound(end_date) if end_date else None
+            )
+        except ValueError:
+            runs = []
+    if not runs:
+        return grid_cells(telemetry_qs, grid_size)
+
+    days_q = Q()
+    telemetry_days_q = Q()
+    for first, last in runs:
+        days_q |= Q(day__range=(first, last))
+        telemetry_days_q |= Q(timestamp__gte=day_bounds(first)[0], timestamp__lt=day_bounds(last)[1])
+
+    tiles = tile_qs.filter(days_q, grid_size=resolution).values('cell_y', 'cell_x').annotate(
+        count=Sum('pass_count'),
+        latest=Max('latest')
+    ).order_by()
+
+    cells = {}
+    for cell_y, cell_x, count, latest in tiles.values_list('cell_y', 'cell_x', 'count', 'latest'):
+        if ratio > 1:
+            cell_y, cell_x = round(cell_y / ratio), round(cell_x / ratio)
+        cell = cells.get((cell_y, cell_x))
+        if cell is None:
+            cells[(cell_y, cell_x)] = [count, latest]
+        else:
+            cell[0] += count
+            if latest > cell[1]:
+                cell[1] = latest
+
+    return merge_cells(cells, grid_cells(telemetry_qs.exclude(telemetry_days_q), grid_size))
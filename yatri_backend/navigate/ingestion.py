@@ -0,0 +1,416 @@
+"""
+YatriConnect - Telemetry Ingestion Pipeline
+Bulk write + in-memory crash/theft detection shared by the
+single-sample and batch ingestion endpoints
+"""
+
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from Devices import heartbeat
+from Devices.models import Device, Vehicle
+from Devices.registry import get_device_entries
+from Journey.active_journeys import get_active_journeys, journey_at
+from sensorData.models import Telemetry, VehicleLastPosition
+from navigate import background, congestion, live_index, metrics, rollups, sketches, spool, streaming
+from navigate.sample_buffer import (
+    due_devices, load_buffers, save_buffers, lock_buffers, extend_locks, unlock_buffers
+)
+from navigate.detection import (
+    evaluate_crash, create_crash_event,
+    is_theft_candidate, create_theft_event,
+    create_harsh_events,
+    THEFT_SPEED_THRESHOLD, THEFT_WINDOW_SECONDS, THEFT_MIN_READINGS
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+def ingest_samples(samples):
+    """
+    Store validated telemetry samples and run event detection
+
+    Args:
+        samples: List of validated telemetry dicts (serializer output
+                 without `device_id`), each carrying its
+                 `device_entry` from the device registry
+
+    Flow:
+    1. Link samples to their vehicle's ongoing journey (active journey map),
+       take the devices' buffer locks and load each device's recent sample
+       buffer (database only on a cold start)
+    2. Drop retransmissions: same (device, timestamp) earlier in the batch
+       or still in the device's buffer - no DB work for duplicates
+    3. Bulk insert the remaining samples in a single INSERT
+       (unique constraint on device + timestamp as the backstop)
+    4. Upsert each vehicle's VehicleLastPosition row; harsh samples are
+       recorded as HarshEvent rows (all stored samples, late ones included)
+    5. Per device reorder buffer: samples behind the released watermark
+       are late (backfill: stored, no detection); the rest are held and
+       released in timestamp order once max(newest sample, now) minus
+       reorder_lateness_seconds passes them (or by release_held_samples
+       if the device sends nothing more)
+    6. Crash/theft detection on released samples against the in-memory window
+    7. On commit: save buffers and release their locks, record a heartbeat
+       for every device in the batch (coalesced last_ping), update the live
+       index and stream, count the samples in the distinct-vehicle sketches
+       and the telemetry rollups (flushed on background timers, as are the
+       congestion snapshots), invalidate the live location cache and update
+       ingest metrics - failures are logged, never raised
+
+    Returns: List of dicts (same order as input) with
+             telemetry, duplicate, late, crash_detected, theft_detected
+             (telemetry is unsaved for duplicates; flags stay False for
+             samples still held - their events are raised on release)
+    """
+    if not samples:
+        return []
+
+    devices = {}
+    telemetry_objs = []
+    for data in samples:
+        data = dict(data)
+        entry = data.pop('device_entry')
+        telemetry = Telemetry(device_id=entry.device_pk, **data)
+        telemetry.calculate_accel_magnitude()  # bulk_create bypasses save()
+        telemetry.calculate_zkey()
+        telemetry_objs.append(telemetry)
+        devices[entry.device_pk] = entry
+
+    # Link each sample to the journey its vehicle is on (active journey map)
+    active = get_active_journeys({entry.vehicle_pk for entry in devices.values()})
+    for telemetry in telemetry_objs:
+        vehicle_pk = devices[telemetry.device_id].vehicle_pk
+        telemetry.journey_id = journey_at(active.get(vehicle_pk), telemetry.timestamp)
+
+    # Recent samples per device, loaded before the insert, changed and
+    # saved back under the devices' buffer locks
+    device_pks = list(devices)
+    lock_token = lock_buffers(device_pks)
+    try:
+        results, stored, stored_objs, buffers, counts = _store_and_detect(telemetry_objs, devices)
+    except BaseException:
+        unlock_buffers(device_pks, lock_token)
+        raise
+
+    counts.update({
+        'samples_received': len(results),
+        'samples_stored': len(stored),
+        'samples_duplicate': len(results) - len(stored),
+    })
+
+    # Process-local aggregators, Redis state and metrics only once the
+    # samples are committed: a failed worker batch (ingested inside a
+    # transaction) is rolled back and retried without counting twice.
+    # Outside a transaction this runs at once.
+    transaction.on_commit(lambda: _after_commit(devices, stored_objs, buffers, lock_token, counts))
+
+    return results
+
+
+def _store_and_detect(telemetry_objs, devices):
+    """
+    Steps 2-6 of ingest_samples (caller holds the devices' buffer locks)
+
+    Returns: (results, stored, stored_objs, buffers, counts)
+    """
+    buffers = load_buffers(list(devices))
+
+    results = []
+    fresh = []
+    seen = set()
+    for telemetry in telemetry_objs:
+        key = (telemetry.device_id, telemetry.timestamp)
+        duplicate = key in seen or buffers[telemetry.device_id].contains(telemetry.timestamp)
+        if not duplicate:
+            seen.add(key)
+            fresh.append(telemetry)
+        results.append({
+            'telemetry': telemetry,
+            'duplicate': duplicate,
+            'late': False,
+            'crash_detected': False,
+            'theft_detected': False
+        })
+
+    stored = _insert_telemetry(fresh)
+    stored_objs = [telemetry for telemetry in fresh if id(telemetry) in stored]
+    vehicle_pks = {device_pk: entry.vehicle_pk for device_pk, entry in devices.items()}
+    VehicleLastPosition.upsert_from_telemetry(stored_objs, vehicle_pks)
+    harsh_detected = create_harsh_events(stored_objs, vehicle_pks)
+
+    by_device = defaultdict(list)
+    for result in results:
+        telemetry = result['telemetry']
+        if id(telemetry) in stored:
+            by_device[telemetry.device_id].append(result)
+        else:
+            result['duplicate'] = True
+
+    vehicles = {}  # Loaded only when an event has to be recorded
+    now = timezone.now()
+    counts = {'samples_late': 0, 'crash_detected': 0, 'theft_detected': 0, 'harsh_detected': harsh_detected}
+
+    for device_pk, device_results in by_device.items():
+        buffer = buffers[device_pk]
+        results_by_id = {}
+
+        for result in device_results:
+            telemetry = result['telemetry']
+            if buffer.is_late(telemetry.timestamp):
+                # Backfill: behind the watermark - stored and kept in the
+                # window for later theft counts, but not run through detection
+                buffer.append(telemetry.timestamp, telemetry.speed)
+                result['late'] = True
+                counts['samples_late'] += 1
+            else:
+                buffer.hold(telemetry)
+                results_by_id[telemetry.pk] = result
+
+        # Release held samples (including earlier requests') in timestamp order
+        held = {pk: result['telemetry'] for pk, result in results_by_id.items()}
+        for telemetry, crash, theft in _release(buffer, devices[device_pk], now, held, vehicles, counts):
+            result = results_by_id.get(telemetry.pk)  # None if held by an earlier request
+            if result is not None:
+                result['crash_detected'] = crash
+                result['theft_detected'] = theft
+
+    return results, stored, stored_objs, buffers, counts
+
+
+def _release(buffer, entry, now, in_hand, vehicles, counts):
+    """
+    Release a device's held samples the watermark has passed and run
+    detection on them, oldest first
+
+    The watermark is max(newest held sample, now) minus
+    reorder_lateness_seconds. Held rows not in `in_hand` (held by an
+    earlier request) are read back in one query; rows deleted since are
+    skipped.
+
+    Returns: List of (telemetry, crash_detected, theft_detected)
+    """
+    lateness = timedelta(seconds=settings.TELEMETRY_INGEST_CONFIG['reorder_lateness_seconds'])
+    watermark = max(buffer.newest_pending() or now, now) - lateness
+    released_pks = buffer.release(watermark)
+
+    missing = [pk for pk in released_pks if pk not in in_hand]
+    if missing:
+        in_hand = {**in_hand, **Telemetry.objects.in_bulk(missing)}
+
+    released = []
+    for pk in released_pks:
+        telemetry = in_hand.get(pk)
+        if telemetry is None:
+            continue
+        crash, theft = _detect(telemetry, buffer, entry, vehicles)
+        counts['crash_detected'] += crash
+        counts['theft_detected'] += theft
+        released.append((telemetry, crash, theft))
+    return released
+
+
+def release_held_samples(partitions=None):
+    """
+    Time-driven release: run detection on held samples that are due but
+    were not released by a later request of their device (the device
+    stopped sending - e.g. after a crash)
+
+    Run by the ingestion workers when idle and by
+    python manage.py release_held_samples.
+
+    Args:
+        partitions: Only devices of these spool partitions (None = all)
+
+    Returns: Number of samples released
+    """
+    now = timezone.now()
+    device_pks = due_devices(now.timestamp())
+    if partitions is not None:
+        device_pks = [pk for pk in device_pks if spool.partition_for(pk) in partitions]
+    if not device_pks:
+        return 0
+
+    device_ids = Device.objects.filter(pk__in=device_pks).values_list('device_id', flat=True)
+    devices = {entry.device_pk: entry for entry in get_device_entries(device_ids).values()}
+    if not devices:
+        return 0
+
+    device_pks = list(devices)
+    lock_token = lock_buffers(device_pks)
+    try:
+        buffers = load_buffers(device_pks)
+        vehicles = {}
+        counts = {'crash_detected': 0, 'theft_detected': 0}
+        released = 0
+        for device_pk, buffer in buffers.items():
+            released += len(_release(buffer, devices[device_pk], now, {}, vehicles, counts))
+        _save_locked(buffers, lock_token)
+    finally:
+        unlock_buffers(device_pks, lock_token)
+
+    metrics.increment(counts)
+    return released
+
+
+def _after_commit(devices, stored_objs, buffers, lock_token, counts):
+    """
+    Non-database side effects of an ingested batch
+
+    The samples are committed by now: a failing step is logged and the
+    others still run, nothing is raised (a sync client would get a 500
+    for stored samples, a worker would re-ingest a committed batch).
+    Database flushes of the aggregators run on background timers.
+    """
+    _side_effect('buffer write-back', _save_locked, buffers, lock_token)
+    _side_effect('buffer unlock', unlock_buffers, list(devices), lock_token)
+
+    _side_effect('heartbeat', heartbeat.record_pings, devices, timezone.now())
+    _side_effect('live index', live_index.record_positions, stored_objs, devices)
+    _side_effect('live stream', streaming.publish_positions, stored_objs, devices)
+    _side_effect('sketches', sketches.record_samples, stored_objs, devices)
+    _side_effect('rollups', rollups.record_samples, stored_objs)
+    _side_effect('congestion', background.schedule,
+                 'congestion', settings.CONGESTION_CONFIG['flush_interval'], congestion.flush)
+
+    # Invalidate live location cache
+    _side_effect('cache invalidation', cache.delete_many, [
+        f"live_location_{entry.vehicle_id}" for entry in devices.values()
+    ])
+
+    _side_effect('metrics', metrics.increment, counts)
+
+
+def _side_effect(label, function, *args):
+    """Run one post-commit step, logging instead of raising"""
+    try:
+        function(*args)
+    except Exception:
+        logger.exception("Post-commit %s failed", label)
+
+
+def _save_locked(buffers, lock_token):
+    """
+    Write back the buffers whose lock is still ours (renewed first)
+
+    A lock that expired during a long transaction may belong to another
+    writer by now: its buffer is not overwritten (this batch's held
+    samples of that device stay stored, without detection).
+    """
+    held = extend_locks(list(buffers), lock_token)
+    lost = [device_pk for device_pk in buffers if device_pk not in held]
+    if lost:
+        logger.warning("Sample buffer locks expired before the write-back, skipped devices %s", lost)
+    save_buffers({device_pk: buffer for device_pk, buffer in buffers.items() if device_pk in held})
+
+
+def _detect(telemetry, buffer, entry, vehicles):
+    """
+    Run crash/theft detection on a released sample against the in-memory window
+
+    Returns: (crash_detected, theft_detected)
+    """
+    previous = buffer.latest()
+    buffer.append(telemetry.timestamp, telemetry.speed)
+    crash_detected = theft_detected = False
+
+    # CRASH DETECTION - against the chronological predecessor
+    crash = evaluate_crash(telemetry, previous)
+    if crash:
+        vehicle = _get_vehicle(vehicles, entry.vehicle_pk)
+        create_crash_event(vehicle, telemetry, previous, crash)
+        crash_detected = True
+
+    # THEFT DETECTION - moving for > 10 seconds (readings up to this sample)
+    if is_theft_candidate(telemetry):
+        window_start = telemetry.timestamp - timedelta(seconds=THEFT_WINDOW_SECONDS)
+        recent_moving = buffer.count_moving(
+            window_start, telemetry.timestamp, THEFT_SPEED_THRESHOLD
+        )
+
+        # Fall back to stored readings only when the buffer cannot answer
+        if recent_moving is None:
+            recent_moving = Telemetry.objects.filter(
+                device_id=entry.device_pk,
+                timestamp__gte=window_start,
+                timestamp__lte=telemetry.timestamp,
+                speed__gt=THEFT_SPEED_THRESHOLD
+            ).count()
+
+        if recent_moving >= THEFT_MIN_READINGS:
+            vehicle = _get_vehicle(vehicles, entry.vehicle_pk)
+            create_theft_event(vehicle, telemetry)
+            theft_detected = True
+
+    return crash_detected, theft_detected
+
+
+def _insert_telemetry(telemetry_objs):
+    """
+    Insert samples, skipping rows that hit the (device, timestamp) constraint
+
+    One bulk INSERT normally; only when a duplicate slipped past the
+    buffer (older than its window, or a concurrent retry) are rows
+    inserted one by one to find it.
+
+    Returns: Set of id() of the stored Telemetry instances
+    """
+    if not telemetry_objs:
+        return set()
+
+    try:
+        with transaction.atomic():
+            Telemetry.objects.bulk_create(telemetry_objs)
+        return {id(telemetry) for telemetry in telemetry_objs}
+    except IntegrityError:
+        pass
+
+    stored = set()
+    for telemetry in telemetry_objs:
+        telemetry.pk = None
+        try:
+            with transaction.atomic():
+                Telemetry.objects.bulk_create([telemetry])
+            stored.add(id(telemetry))
+        except IntegrityError:
+            already_stored = Telemetry.objects.filter(
+                device_id=telemetry.device_id, timestamp=telemetry.timestamp
+            ).exists()
+            if not already_stored:
+                raise
+    return stored
+
+
+def _get_vehicle(vehicles, vehicle_pk):
+    """Fetch (once per call) the vehicle an event is recorded against"""
+    if vehicle_pk not in vehicles:
+        vehicles[vehicle_pk] = Vehicle.objects.get(pk=vehicle_pk)
+    return vehicles[vehicle_pk]
+
+
+def ingest_spooled(claimed):
+    """
+    Worker stage: ingest samples read from the telemetry spool
+
+    Args:
+        claimed: List of (spool_id, sample dict with `device_id`)
+
+    Samples of devices deleted since they were accepted are dropped.
+    """
+    entries = get_device_entries({data['device_id'] for _, data in claimed})
+
+    samples = []
+    for _, data in claimed:
+        data = dict(data)
+        entry = entries.get(data.pop('device_id'))
+        if entry is not None:
+            data['device_entry'] = entry
+            samples.append(data)
+
+    return ingest_samples(samples)
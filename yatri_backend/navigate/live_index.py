@@ -0,0 +1,344 @@
+"""
+YatriConnect - Live Position Index
+In-memory uniform grid of the latest position of every vehicle, used
+for viewport (bbox) and radius queries on /api/navigate/live-locations/
+
+Layout: cell (ix, iy) -> visibility class -> {vehicle_pk: LivePosition}
+The visibility class is the vehicle type, precomputed per vehicle, so
+role filtering only selects which buckets of a cell are read:
+- Admin/Police: every class
+- Normal user: 'public'
+- Vehicle owner: 'public' + the owner's own vehicles (owner index)
+
+The index is fed from VehicleLastPosition: an incremental read of rows
+whose updated_at moved since the last refresh (rows written by any API
+process or ingestion worker), plus direct updates when ingestion runs
+in this process. A periodic full rebuild picks up vehicle type/owner
+changes and deleted vehicles; it is built outside the lock (queries and
+ingestion keep using the current index) and swapped in when complete.
+"""
+
+import math
+import threading
+import time
+from collections import namedtuple
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+
+from Devices.utils import calculate_distance
+
+
+LivePosition = namedtuple(
+    'LivePosition',
+    ['vehicle_pk', 'owner_id', 'vehicle_type', 'latitude', 'longitude', 'timestamp', 'data']
+)
+
+PUBLIC = 'public'
+
+METERS_PER_DEGREE_LAT = 111320
+
+_timestamp_field = serializers.DateTimeField()
+
+
+class LivePositionIndex:
+    """Uniform grid over (longitude, latitude) with per-class buckets"""
+
+    def __init__(self, cell_degrees):
+        self.cell_degrees = cell_degrees
+        self.cells = {}       # (ix, iy) -> {vehicle_type: {vehicle_pk: LivePosition}}
+        self.positions = {}   # vehicle_pk -> LivePosition
+        self.owned = {}       # owner_id -> {vehicle_pk}
+
+    def _cell(self, latitude, longitude):
+        return (
+            math.floor(longitude / self.cell_degrees),
+            math.floor(latitude / self.cell_degrees)
+        )
+
+    # --------------------------------------------------------
+    # Updates
+    # --------------------------------------------------------
+    def put(self, position):
+        """Insert or move a vehicle (older timestamps never replace newer ones)"""
+        current = self.positions.get(position.vehicle_pk)
+        if current is not None:
+            if current.timestamp > position.timestamp:
+                return
+            self.remove(position.vehicle_pk)
+
+        cell = self.cells.setdefault(self._cell(position.latitude, position.longitude), {})
+        cell.setdefault(position.vehicle_type, {})[position.vehicle_pk] = position
+        self.positions[position.vehicle_pk] = position
+        if position.owner_id is not None:
+            self.owned.setdefault(position.owner_id, set()).add(position.vehicle_pk)
+
+    def remove(self, vehicle_pk):
+        position = self.positions.pop(vehicle_pk, None)
+        if position is None:
+            return
+        key = self._cell(position.latitude, position.longitude)
+        bucket = self.cells[key][position.vehicle_type]
+        del bucket[vehicle_pk]
+        if not bucket:
+            del self.cells[key][position.vehicle_type]
+            if not self.cells[key]:
+                del self.cells[key]
+        if position.owner_id is not None:
+            self.owned[position.owner_id].discard(vehicle_pk)
+
+    # --------------------------------------------------------
+    # Queries
+    # --------------------------------------------------------
+    def search(self, min_lat, min_lon, max_lat, max_lon, classes, owner_id=None, since=None):
+        """
+        Positions inside the bbox
+
+        Args:
+            classes: Visibility classes (vehicle types) to read, None = all
+            owner_id: Also include this owner's vehicles of any class
+            since: Skip positions older than this datetime
+
+        Cost: cells covering the bbox (capped at the occupied cells)
+        plus the matching positions.
+
+        Not thread-safe against put/remove: the process-wide index is
+        searched under _lock (query_bbox).
+        """
+        min_ix, min_iy = self._cell(min_lat, min_lon)
+        max_ix, max_iy = self._cell(max_lat, max_lon)
+
+        def inside(position):
+            return (
+                min_lat <= position.latitude <= max_lat and
+                min_lon <= position.longitude <= max_lon and
+                (since is None or position.timestamp >= since)
+            )
+
+        span = (max_ix - min_ix + 1) * (max_iy - min_iy + 1)
+        if span <= len(self.cells):
+            keys = (
+                (ix, iy)
+                for ix in range(min_ix, max_ix + 1)
+                for iy in range(min_iy, max_iy + 1)
+            )
+        else:
+            # Viewport larger than the occupied area: walk occupied cells only
+            keys = (
+                key for key in self.cells
+                if min_ix <= key[0] <= max_ix and min_iy <= key[1] <= max_iy
+            )
+
+        found = []
+        for key in keys:
+            cell = self.cells.get(key)
+            if not cell:
+                continue
+            buckets = cell.values() if classes is None else (
+                cell[vehicle_type] for vehicle_type in classes if vehicle_type in cell
+            )
+            for bucket in buckets:
+                found.extend(position for position in bucket.values() if inside(position))
+
+        # Owner overlay: own vehicles outside the visible classes
+        if owner_id is not None:
+            for vehicle_pk in self.owned.get(owner_id, ()):
+                position = self.positions[vehicle_pk]
+                if (classes is None or position.vehicle_type not in classes) and inside(position):
+                    found.append(position)
+
+        return found
+
+
+# ============================================================
+# PROCESS-WIDE INDEX
+# ============================================================
+
+_lock = threading.Lock()
+_index = None
+_last_refresh = None       # monotonic time of the last incremental refresh
+_last_rebuild = None       # monotonic time of the last full rebuild
+_refreshed_until = None    # updated_at high-water mark already applied
+_rebuilding = None         # positions recorded during a full rebuild, None when idle
+
+
+def _config():
+    return settings.LIVE_LOCATION_CONFIG
+
+
+def build_position(vehicle_pk, owner_id, vehicle_type, vehicle_id, device_id,
+                   timestamp, latitude, longitude, speed, heading):
+    """Build a LivePosition with its response dict rendered once"""
+    return LivePosition(
+        vehicle_pk=vehicle_pk,
+        owner_id=owner_id,
+        vehicle_type=vehicle_type,
+        latitude=latitude,
+        longitude=longitude,
+        timestamp=timestamp,
+        data={
+            'device_id': device_id,
+            'vehicle_id': vehicle_id,
+            'vehicle_type': vehicle_type,
+            'latitude': latitude,
+            'longitude': longitude,
+            'speed': speed,
+            'heading': heading,
+            'timestamp': _timestamp_field.to_representation(timestamp),
+        }
+    )
+
+
+def _load(index, updated_after=None):
+    """Apply VehicleLastPosition rows (all, or those updated after a time)"""
+    from sensorData.models import VehicleLastPosition
+
+    rows = VehicleLastPosition.objects.all()
+    if updated_after is not None:
+        rows = rows.filter(updated_at__gt=updated_after)
+
+    for row in rows.values_list(
+        'vehicle_id', 'vehicle__owner_id', 'vehicle__vehicle_type', 'vehicle__vehicle_id',
+        'device__device_id', 'timestamp', 'latitude', 'longitude', 'speed', 'heading'
+    ).iterator():
+        index.put(build_position(*row))
+
+
+def get_index():
+    """
+    The process-wide index, rebuilt or refreshed when due
+
+    Incremental refreshes re-read an overlap of refresh_interval seconds
+    so rows written by other hosts with slightly skewed clocks are not missed.
+
+    A full rebuild reads every row without holding _lock; positions
+    recorded meanwhile are replayed onto the new index before the swap,
+    and rows written by other processes are picked up by the next
+    incremental refresh (from the start of the rebuild).
+    """
+    global _index, _last_refresh, _last_rebuild, _refreshed_until, _rebuilding
+
+    config = _config()
+    now = time.monotonic()
+
+    with _lock:
+        rebuild = _index is None or (
+            _rebuilding is None and now - _last_rebuild >= config['rebuild_interval']
+        )
+        if not rebuild:
+            if now - _last_refresh >= config['refresh_interval']:
+                started = timezone.now()
+                _load(_index, _refreshed_until - timedelta(seconds=config['refresh_interval']))
+                _last_refresh = now
+                _refreshed_until = started
+            return _index
+        if _index is not None:
+            _rebuilding = []
+
+    index = LivePositionIndex(config['grid_cell_degrees'])
+    started = timezone.now()
+    try:
+        _load(index)
+    except Exception:
+        with _lock:
+            _rebuilding = None
+        raise
+
+    with _lock:
+        for position in _rebuilding or ():
+            index.put(position)
+        _rebuilding = None
+        _index = index
+        _last_rebuild = _last_refresh = now
+        _refreshed_until = started
+        return _index
+
+
+def record_positions(telemetry_list, devices):
+    """
+    Ingest hook: move vehicles in this process's index right away
+    (no-op until the index has been built by a query)
+
+    Args:
+        telemetry_list: Stored Telemetry instances
+        devices: {device_pk: DeviceEntry}
+    """
+    if _index is None:
+        return
+
+    with _lock:
+        for telemetry in telemetry_list:
+            entry = devices[telemetry.device_id]
+            position = build_position(
+                entry.vehicle_pk, entry.owner_id, entry.vehicle_type, entry.vehicle_id,
+                entry.device_id, telemetry.timestamp,
+                telemetry.latitude, telemetry.longitude, telemetry.speed, telemetry.heading
+            )
+            _index.put(position)
+            if _rebuilding is not None:
+                _rebuilding.append(position)  # replayed onto the index being built
+
+
+# ============================================================
+# VIEWPORT / RADIUS QUERIES
+# ============================================================
+
+def visibility_for(user):
+    """
+    Role filtering as (classes, owner_id) for LivePositionIndex.search
+    Mirrors the access rules of get_live_locations
+    """
+    if user.is_admin() or user.is_police():
+        return None, None
+    if user.role == 'normal_user':
+        return [PUBLIC], None
+    if user.is_vehicle_owner():
+        return [PUBLIC], user.id
+    return None, None
+
+
+def query_bbox(user, min_lat, min_lon, max_lat, max_lon, since, vehicle_type=None):
+    """Visible live positions inside a bounding box -> list of response dicts"""
+    classes, owner_id = visibility_for(user)
+    if vehicle_type:
+        if classes is not None and vehicle_type not in classes:
+            # Only the owner's own vehicles of that type can be visible
+            classes = []
+        else:
+            classes = [vehicle_type]
+
+    index = get_index()
+    with _lock:  # record_positions / refreshes mutate the index in place
+        positions = index.search(
+            min_lat, min_lon, max_lat, max_lon, classes, owner_id=owner_id, since=since
+        )
+    if vehicle_type:
+        positions = [position for position in positions if position.vehicle_type == vehicle_type]
+    return [position.data for position in positions]
+
+
+def query_vehicles(vehicle_pks, since):
+    """Live positions of specific vehicles (no access checks) -> list of response dicts"""
+    index = get_index()
+    with _lock:
+        positions = [index.positions.get(vehicle_pk) for vehicle_pk in vehicle_pks]
+    return [
+        position.data for position in positions
+        if position is not None and position.timestamp >= since
+    ]
+
+
+def query_radius(user, latitude, longitude, radius, since, vehicle_type=None):
+    """Visible live positions within `radius` meters of a point"""
+    dlat = radius / METERS_PER_DEGREE_LAT
+    dlon = radius / (METERS_PER_DEGREE_LAT * max(math.cos(math.radians(latitude)), 1e-6))
+
+    candidates = query_bbox(
+        user, latitude - dlat, longitude - dlon, latitude + dlat, longitude + dlon,
+        since, vehicle_type
+    )
+    return [
+        data for data in candidates
+        if calculate_distance(latitude, longitude, data['latitude'], data['longitude']) <= radius
+    ]
@@ -0,0 +1,64 @@
+"""
+YatriConnect - Link Telemetry To Journeys
+
+Usage:
+    python manage.py assign_telemetry_journeys
+    python manage.py assign_telemetry_journeys --since 2024-01-01
+
+Sets Telemetry.journey for samples stored before journeys were linked
+on ingest, or that arrived outside the active journey window (late
+uploads, samples older than the journey's start), and links the
+unlinked harsh and crash events in the same time ranges. One UPDATE
+per journey and table over the vehicle's devices and the journey's
+time range (device/vehicle + timestamp indexes); rows already linked
+are left alone.
+"""
+
+from datetime import date
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from Devices.models import Device
+from Journey.models import Journey, HarshEvent, CrashEvent
+from navigate import heatmap
+from sensorData.models import Telemetry
+
+
+class Command(BaseCommand):
+    help = "Link stored telemetry samples to the journey they belong to"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=date.fromisoformat,
+                            help="Only journeys started on or after this local day (YYYY-MM-DD)")
+
+    def handle(self, *args, **options):
+        journeys = Journey.objects.exclude(status=Journey.TripStatus.CANCELLED)
+        if options['since']:
+            journeys = journeys.filter(start_time__gte=heatmap.day_bounds(options['since'])[0])
+
+        devices = {}
+        for device_pk, vehicle_pk in Device.objects.values_list('pk', 'vehicle_id'):
+            devices.setdefault(vehicle_pk, []).append(device_pk)
+
+        now = timezone.now()
+        linked = events = journey_count = 0
+        for journey_pk, vehicle_pk, start_time, end_time in journeys.order_by('start_time').values_list(
+            'pk', 'vehicle_id', 'start_time', 'end_time'
+        ).iterator():
+            if vehicle_pk not in devices:
+                continue
+            window = {'timestamp__gte': start_time, 'timestamp__lte': end_time or now, 'journey__isnull': True}
+            linked += Telemetry.objects.filter(
+                device_id__in=devices[vehicle_pk], **window
+            ).update(journey_id=journey_pk)
+            events += HarshEvent.objects.filter(
+                device_id__in=devices[vehicle_pk], **window
+            ).update(journey_id=journey_pk)
+            events += CrashEvent.objects.filter(
+                vehicle_id=vehicle_pk, **window
+            ).update(journey_id=journey_pk)
+            journey_count += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Linked {linked} samples and {events} harsh/crash events to {journey_count} journeys"
+        ))
@@ -0,0 +1,86 @@
+"""
+YatriConnect - Harsh Event Backfill
+
+Usage:
+    python manage.py backfill_harsh_events                       # all telemetry
+    python manage.py backfill_harsh_events --since 2024-01-01 --until 2024-01-31
+
+Records HarshEvent rows (navigate/detection.py) for telemetry stored
+before harsh driving was detected at ingest. One scan of the raw
+samples per local day, in chunks; samples that already have an event
+are skipped by the (device, timestamp) constraint, so it can be re-run.
+Events take the journey of their sample (run assign_telemetry_journeys
+first for telemetry stored before samples were linked to journeys).
+"""
+
+import time
+from datetime import date, timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+
+from Devices.models import Device
+from navigate import heatmap
+from navigate.detection import HARSH_ACCEL_THRESHOLD, create_harsh_events
+from sensorData.models import Telemetry
+
+
+class Command(BaseCommand):
+    help = "Record HarshEvent rows for harsh samples already stored in telemetry"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=date.fromisoformat,
+                            help="First local day to scan (YYYY-MM-DD, default: first telemetry day)")
+        parser.add_argument('--until', type=date.fromisoformat,
+                            help="Last local day to scan (YYYY-MM-DD, default: last telemetry day)")
+        parser.add_argument('--batch-size', type=int,
+                            default=settings.TELEMETRY_ROLLUP_CONFIG['backfill_batch_size'],
+                            help="Samples fetched per query")
+
+    def handle(self, *args, **options):
+        bounds = Telemetry.objects.aggregate(first=Min('timestamp'), last=Max('timestamp'))
+        if bounds['first'] is None:
+            self.stdout.write("No telemetry to scan")
+            return
+
+        since = options['since'] or timezone.localtime(bounds['first']).date()
+        until = options['until'] or timezone.localtime(bounds['last']).date()
+        if since > until:
+            raise CommandError(f"--since {since} is after --until {until}")
+
+        batch_size = options['batch_size']
+        vehicle_pks = dict(Device.objects.values_list('pk', 'vehicle_id'))
+        harsh_q = (
+            Q(accel_x__gt=HARSH_ACCEL_THRESHOLD) | Q(accel_x__lt=-HARSH_ACCEL_THRESHOLD) |
+            Q(accel_y__gt=HARSH_ACCEL_THRESHOLD) | Q(accel_y__lt=-HARSH_ACCEL_THRESHOLD)
+        )
+
+        day = since
+        total = 0
+        started = time.perf_counter()
+        while day <= until:
+            start, end = heatmap.day_bounds(day)
+            samples = Telemetry.objects.filter(
+                harsh_q, timestamp__gte=start, timestamp__lt=end
+            ).only(
+                'device_id', 'journey_id', 'timestamp', 'latitude', 'longitude', 'speed', 'accel_x', 'accel_y'
+            ).order_by().iterator(chunk_size=batch_size)
+
+            found = 0
+            batch = []
+            for telemetry in samples:
+                batch.append(telemetry)
+                if len(batch) >= batch_size:
+                    found += create_harsh_events(batch, vehicle_pks)
+                    batch = []
+            found += create_harsh_events(batch, vehicle_pks)
+
+            if found:
+                self.stdout.write(f"  {day}: {found} harsh samples")
+            total += found
+            day += timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Recorded {total} harsh samples ({since} .. {until}, {time.perf_counter() - started:.1f} s)"
+        ))
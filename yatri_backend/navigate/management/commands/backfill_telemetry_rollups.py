@@ -0,0 +1,89 @@
+"""
+YatriConnect - Telemetry Rollup Backfill
+
+Usage:
+    python manage.py backfill_telemetry_rollups                       # all telemetry
+    python manage.py backfill_telemetry_rollups --since 2024-01-01 --until 2024-01-31
+    python manage.py backfill_telemetry_rollups --device DEV001 --since 2024-03-01
+
+Recomputes TelemetryMinuteRollup / TelemetryHourRollup (navigate/rollups.py)
+from raw telemetry, one local day per transaction, replacing the rows of
+those days. Ingestion keeps the rollups up to date from deployment on;
+run this once for older telemetry, and again after changing the
+harsh driving threshold (navigate/detection.py) or TIME_ZONE.
+
+Only closed hours are rebuilt: the current local hour (and the
+previous one for the first minutes of an hour) may still have
+aggregates pending in ingest processes, so a day is rebuilt up to
+rollups.open_cutoff() and the rest is left to ingestion. Late samples
+of the rebuilt days ingested while this runs are counted twice - run
+it for days no device is still backfilling, or with ingestion stopped.
+"""
+
+import time
+from datetime import date, timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from Devices.models import Device
+from navigate import heatmap, rollups
+from sensorData.models import Telemetry
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-device minute/hour telemetry rollups from raw telemetry"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=date.fromisoformat,
+                            help="First local day to rebuild (YYYY-MM-DD, default: first telemetry day)")
+        parser.add_argument('--until', type=date.fromisoformat,
+                            help="Last local day to rebuild (YYYY-MM-DD, default: last telemetry day)")
+        parser.add_argument('--device', action='append', dest='devices', metavar='DEVICE_ID',
+                            help="Only this device (repeatable)")
+
+    def handle(self, *args, **options):
+        device_pks = None
+        telemetry_qs = Telemetry.objects.all()
+        if options['devices']:
+            device_pks = list(Device.objects.filter(device_id__in=options['devices']).values_list('pk', flat=True))
+            if len(device_pks) != len(set(options['devices'])):
+                raise CommandError("Unknown device id")
+            telemetry_qs = telemetry_qs.filter(device_id__in=device_pks)
+
+        bounds = telemetry_qs.aggregate(first=Min('timestamp'), last=Max('timestamp'))
+        if bounds['first'] is None:
+            self.stdout.write("No telemetry to roll up")
+            return
+
+        since = options['since'] or timezone.localtime(bounds['first']).date()
+        until = options['until'] or timezone.localtime(bounds['last']).date()
+        if since > until:
+            raise CommandError(f"--since {since} is after --until {until}")
+
+        cutoff = rollups.open_cutoff()
+        day = since
+        totals = [0, 0, 0]
+        started = time.perf_counter()
+        while day <= until:
+            day_started = time.perf_counter()
+            start, end = heatmap.day_bounds(day)
+            if start >= cutoff:
+                self.stdout.write(f"  {day}: skipped (still being ingested)")
+                break
+            if end > cutoff:
+                self.stdout.write(f"  {day}: rebuilt until {timezone.localtime(cutoff):%H:%M} (later hours still being ingested)")
+                end = cutoff
+            counts = rollups.rebuild(start, end, device_pks)
+            totals = [total + count for total, count in zip(totals, counts)]
+            if counts[0]:
+                self.stdout.write(
+                    f"  {day}: {counts[0]} samples -> {counts[1]} minute / {counts[2]} hour rows "
+                    f"({(time.perf_counter() - day_started) * 1000:.0f} ms)"
+                )
+            day += timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled up {totals[0]} samples into {totals[1]} minute and {totals[2]} hour rows "
+            f"({since} .. {until}, {time.perf_counter() - started:.1f} s)"
+        ))
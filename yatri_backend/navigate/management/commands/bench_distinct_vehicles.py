@@ -0,0 +1,171 @@
+"""
+YatriConnect - Distinct Vehicle Sketch Benchmark
+
+Usage:
+    python manage.py bench_distinct_vehicles
+    python manage.py bench_distinct_vehicles --samples 200000 --vehicles 5000
+
+Inserts synthetic vehicles and telemetry (inside a transaction that is
+rolled back), feeds them through the ingest sketch hook
+(navigate/sketches.py), then answers the same "distinct vehicles in
+these cells during this window" questions with:
+1. Exact: COUNT(DISTINCT vehicle) over telemetry (zkey index + cell filter)
+2. Sketch: merge of the CellMinuteSketch rows
+
+Reports relative error and milliseconds per query for single cells,
+cells along a route and 5x5 cell blocks over 5, 15 and 60 minute windows.
+"""
+
+import random
+import statistics
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Floor
+from django.utils import timezone
+
+from Devices.models import Device, Vehicle
+from Devices.registry import DeviceEntry
+from Devices.utils import bbox_to_zranges, merge_zranges, zkey_ranges_filter
+from navigate import segments, sketches
+from sensorData.models import Telemetry
+
+
+CENTER = (27.70, 85.32)  # Kathmandu
+BLOCK = 10               # Cells per side of the synthetic area
+
+
+def exact_distinct(cells, since, until):
+    """Distinct vehicles with the exact query over raw telemetry"""
+    resolution = settings.CONGESTION_CONFIG['grid_resolution']
+    half = resolution / 2
+    ranges = []
+    cell_q = Q()
+    for cell in cells:
+        lat, lon = segments.cell_center(cell)
+        ranges.extend(bbox_to_zranges(lat - half, lon - half, lat + half, lon + half, max_ranges=4))
+        cell_q |= Q(cell_y=cell[0], cell_x=cell[1])
+
+    return Telemetry.objects.filter(
+        zkey_ranges_filter(merge_zranges(ranges, settings.CONGESTION_CONFIG['max_zranges'])),
+        timestamp__gte=since,
+        timestamp__lt=until
+    ).annotate(
+        cell_y=Floor(F('latitude') / Value(resolution) + Value(0.5)),
+        cell_x=Floor(F('longitude') / Value(resolution) + Value(0.5))
+    ).filter(cell_q).aggregate(
+        vehicles=Count('device__vehicle', distinct=True)
+    )['vehicles']
+
+
+class Command(BaseCommand):
+    help = "Benchmark HyperLogLog distinct-vehicle sketches against the exact query"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', type=int, default=100000,
+                            help="Synthetic telemetry rows")
+        parser.add_argument('--vehicles', type=int, default=3000,
+                            help="Synthetic vehicles (one device each)")
+        parser.add_argument('--queries', type=int, default=20,
+                            help="Queries per shape and window")
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        resolution = settings.CONGESTION_CONFIG['grid_resolution']
+        now = timezone.now().replace(second=0, microsecond=0)
+        origin = segments.cell_of(*CENTER)
+
+        with transaction.atomic():
+            # 1. Synthetic fleet
+            vehicles = Vehicle.objects.bulk_create([
+                Vehicle(vehicle_id=f"BENCH_V{index}", vehicle_type='public')
+                for index in range(options['vehicles'])
+            ])
+            devices = Device.objects.bulk_create([
+                Device(device_id=f"BENCH_D{index}", vehicle=vehicle)
+                for index, vehicle in enumerate(vehicles)
+            ])
+            entries = {
+                device.pk: DeviceEntry(device.pk, device.vehicle.pk, device.vehicle.vehicle_id,
+                                       'public', None, device.device_id)
+                for device in devices
+            }
+
+            # 2. Telemetry: each vehicle wanders around a home cell
+            home = {
+                device.pk: (origin[0] + rng.randrange(BLOCK), origin[1] + rng.randrange(BLOCK))
+                for device in devices
+            }
+            rows = []
+            for index in range(options['samples']):
+                device = devices[int(rng.paretovariate(1.2) * 7) % len(devices)]
+                cell_y, cell_x = home[device.pk]
+                telemetry = Telemetry(
+                    device=device,
+                    timestamp=now - timedelta(minutes=rng.randrange(60), microseconds=index),
+                    latitude=(cell_y + rng.uniform(-1.5, 1.5)) * resolution,
+                    longitude=(cell_x + rng.uniform(-1.5, 1.5)) * resolution,
+                    speed=rng.uniform(0, 20)
+                )
+                telemetry.calculate_zkey()
+                rows.append(telemetry)
+            Telemetry.objects.bulk_create(rows, batch_size=5000)
+
+            # 3. Sketches through the ingest hook
+            start = time.perf_counter()
+            for offset in range(0, len(rows), 500):
+                sketches.record_samples(rows[offset:offset + 500], entries)
+            sketches.flush()
+            ingest_time = (time.perf_counter() - start) / len(rows)
+            self.stdout.write(
+                f"Inserted {len(rows)} samples from {len(devices)} vehicles; "
+                f"sketch update {ingest_time * 1e6:.1f} us/sample"
+            )
+
+            # 4. Queries
+            def single():
+                return [(origin[0] + rng.randrange(BLOCK), origin[1] + rng.randrange(BLOCK))]
+
+            def route():
+                y0, x0 = origin[0] + rng.randrange(BLOCK), origin[1]
+                return [(y0 + step // 3, x0 + step) for step in range(BLOCK)]
+
+            def block():
+                y0, x0 = origin[0] + rng.randrange(BLOCK - 4), origin[1] + rng.randrange(BLOCK - 4)
+                return [(y0 + dy, x0 + dx) for dy in range(5) for dx in range(5)]
+
+            self.stdout.write(f"{'query':<18}{'window':>8}{'exact ms':>11}{'sketch ms':>11}{'mean err':>10}{'max err':>9}")
+            for name, shape in (('single cell', single), ('route (10 cells)', route), ('5x5 block', block)):
+                for minutes in (5, 15, 60):
+                    exact_times, sketch_times, errors = [], [], []
+                    for _ in range(options['queries']):
+                        cells = shape()
+                        since = now - timedelta(minutes=minutes - 1)
+                        until = now + timedelta(minutes=1)
+
+                        started = time.perf_counter()
+                        exact = exact_distinct(cells, since, until)
+                        exact_times.append(time.perf_counter() - started)
+
+                        started = time.perf_counter()
+                        estimate, _ = sketches.estimate_distinct_vehicles(cells, since, until)
+                        sketch_times.append(time.perf_counter() - started)
+
+                        if exact:
+                            errors.append(abs(estimate - exact) / exact)
+
+                    self.stdout.write(
+                        f"{name:<18}{minutes:>6} m"
+                        f"{statistics.mean(exact_times) * 1000:>11.2f}"
+                        f"{statistics.mean(sketch_times) * 1000:>11.2f}"
+                        f"{(statistics.mean(errors) if errors else 0):>9.2%}"
+                        f"{(max(errors) if errors else 0):>9.2%}"
+                    )
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("Done (synthetic data rolled back)"))
@@ -0,0 +1,80 @@
+"""
+YatriConnect - Heat Map Tile Compaction
+
+Usage:
+    python manage.py compact_heatmap_tiles                      # nightly (cron)
+    python manage.py compact_heatmap_tiles --since 2024-01-01   # backfill
+    python manage.py compact_heatmap_tiles --since 2024-03-01 --until 2024-03-07
+
+Rebuilds the HeatmapTile pyramid (navigate/heatmap.py) of whole local
+days up to yesterday. Without --since it compacts every day after the
+last compacted one (from the first telemetry day on the first run) and
+re-compacts the previous HEATMAP_CONFIG['recompact_days'] days so that
+late samples (offline devices, async ingestion) are picked up.
+
+Each day is rebuilt in its own transaction; compute_heatmap reads the
+remaining, uncompacted part of a date range from telemetry.
+"""
+
+import time
+from datetime import date, timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Max, Min
+from django.utils import timezone
+
+from Journey.models import HeatmapTileDay
+from navigate import heatmap
+from sensorData.models import Telemetry
+
+
+class Command(BaseCommand):
+    help = "Compact telemetry into the per-day heat map tile pyramid"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', type=date.fromisoformat,
+                            help="First day to compact (YYYY-MM-DD)")
+        parser.add_argument('--until', type=date.fromisoformat,
+                            help="Last day to compact (YYYY-MM-DD, default: yesterday)")
+        parser.add_argument('--recompact-days', type=int,
+                            default=settings.HEATMAP_CONFIG['recompact_days'],
+                            help="Already compacted days rebuilt again (without --since)")
+
+    def handle(self, *args, **options):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        until = min(options['until'] or yesterday, yesterday)
+        since = options['since'] or self._first_day(until, options['recompact_days'])
+
+        if since is None:
+            self.stdout.write("No telemetry to compact")
+            return
+        if since > until:
+            if options['since']:
+                raise CommandError(f"Nothing to compact between {since} and {until} (today is never compacted)")
+            self.stdout.write("Heat map tiles are up to date")
+            return
+
+        day = since
+        total_tiles = 0
+        started = time.perf_counter()
+        while day <= until:
+            day_started = time.perf_counter()
+            tiles = heatmap.compact_day(day)
+            total_tiles += tiles
+            self.stdout.write(f"  {day}: {tiles} tiles ({(time.perf_counter() - day_started) * 1000:.0f} ms)")
+            day += timedelta(days=1)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Compacted {since} .. {until}: {total_tiles} tiles in {time.perf_counter() - started:.1f} s"
+        ))
+
+    def _first_day(self, until, recompact_days):
+        """Day after the last compacted one, minus the recompaction window"""
+        last = HeatmapTileDay.objects.aggregate(last=Max('day'))['last']
+        if last is not None:
+            return min(last + timedelta(days=1), until - timedelta(days=recompact_days))
+
+        first = Telemetry.objects.aggregate(first=Min('timestamp'))['first']
+        if first is None:
+            return None
+        return timezone.localtime(first).date()
@@ -0,0 +1,39 @@
+"""
+YatriConnect - Release Held Telemetry Samples
+
+Usage:
+    python manage.py release_held_samples                 # once (cron)
+    python manage.py release_held_samples --interval 5    # loop every 5 seconds
+
+Runs crash/theft detection on samples held in the per-device reorder
+buffer (TELEMETRY_INGEST_CONFIG['reorder_lateness_seconds'] > 0) whose
+watermark has passed, for devices that sent nothing since - a device
+that stops reporting after a crash would otherwise never have its last
+samples released. The ingestion workers (run_ingest_workers) do this
+when idle; run this command with synchronous ingestion.
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from navigate.ingestion import release_held_samples
+
+
+class Command(BaseCommand):
+    help = "Release due held telemetry samples to crash/theft detection"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float,
+                            help="Keep running, releasing every N seconds")
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+        while True:
+            close_old_connections()
+            released = release_held_samples()
+            if released or not interval:
+                self.stdout.write(f"Released {released} held samples")
+            if not interval:
+                return
+            time.sleep(interval)
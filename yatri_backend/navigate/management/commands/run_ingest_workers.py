@@ -0,0 +1,164 @@
+"""
+YatriConnect - Telemetry Ingestion Workers
+
+Usage:
+    python manage.py run_ingest_workers                # pool size from settings
+    python manage.py run_ingest_workers --workers 4
+    python manage.py run_ingest_workers --once         # drain the spool and exit
+    python manage.py run_ingest_workers --requeue-dead # retry dead-lettered samples
+
+Drains the telemetry spool filled by the accept stage
+(TELEMETRY_INGEST_CONFIG['async_ingest'] = True): bulk insert,
+last_ping update, congestion sketches, telemetry rollups,
+crash/theft detection, cache invalidation.
+
+Each claimed batch is ingested in one transaction. A failing batch is
+split in halves until the failing samples are isolated; the others are
+stored and acked. Failing samples count an attempt and are dead-lettered
+after spool_max_attempts (TELEMETRY_INGEST_CONFIG). Database or Redis
+connection errors are not the samples' fault: the batch is retried as a
+whole without counting attempts.
+"""
+
+import logging
+import multiprocessing
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections, close_old_connections, transaction, InterfaceError, OperationalError
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+
+from Devices import heartbeat
+from navigate import congestion, rollups, sketches, spool
+from navigate.ingestion import ingest_spooled, release_held_samples
+
+
+logger = logging.getLogger(__name__)
+
+# Backend outages: retried without blaming (bisecting) the samples
+TRANSIENT_ERRORS = (InterfaceError, OperationalError, RedisConnectionError, RedisTimeoutError)
+
+
+def run_worker(worker_index, workers, batch_size, poll_interval, once):
+    """Worker loop: owns every spool partition p with p % workers == worker_index"""
+    partition_count = settings.TELEMETRY_INGEST_CONFIG['spool_partitions']
+    partitions = [p for p in range(partition_count) if p % workers == worker_index]
+
+    while True:
+        close_old_connections()
+        claimed = spool.claim(partitions, batch_size)
+
+        if not claimed:
+            # Idle: release due held samples, write coalesced last_ping
+            # heartbeats, sketches and rollups now, congestion when due
+            release_held_samples(partitions)
+            heartbeat.flush()
+            sketches.flush()
+            rollups.flush()
+            congestion.flush_if_due()
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+
+        try:
+            failed = _ingest(claimed, worker_index)
+        except TRANSIENT_ERRORS:
+            # Samples stay spooled and are retried on the next pass
+            logger.exception("Telemetry worker %s failed on %s samples", worker_index, len(claimed))
+            time.sleep(poll_interval)
+            continue
+
+        if failed:
+            errors = {}
+            for spool_id, error in failed:
+                errors.setdefault(error, []).append(spool_id)
+            for error, spool_ids in errors.items():
+                dead = spool.fail(spool_ids, error)
+                if dead:
+                    logger.error("Telemetry worker %s dead-lettered %s samples: %s", worker_index, dead, error)
+            time.sleep(poll_interval)
+
+
+def _ingest(claimed, worker_index):
+    """
+    Ingest claimed samples in one transaction and ack them; on failure
+    bisect the batch (arrival order kept) down to the failing samples
+
+    Returns: List of (spool_id, error) of the samples that failed alone
+    """
+    try:
+        with transaction.atomic():
+            ingest_spooled(claimed)
+    except TRANSIENT_ERRORS:
+        raise
+    except Exception as exc:
+        if len(claimed) == 1:
+            logger.exception("Telemetry worker %s failed on spooled sample %s", worker_index, claimed[0][0])
+            return [(claimed[0][0], f"{type(exc).__name__}: {exc}")]
+        middle = len(claimed) // 2
+        return _ingest(claimed[:middle], worker_index) + _ingest(claimed[middle:], worker_index)
+
+    spool.ack([spool_id for spool_id, _ in claimed])
+    return []
+
+
+class Command(BaseCommand):
+    help = "Run the telemetry ingestion worker pool (drains the telemetry spool)"
+
+    def add_arguments(self, parser):
+        config = settings.TELEMETRY_INGEST_CONFIG
+        parser.add_argument('--workers', type=int, default=config['worker_processes'],
+                            help="Number of worker processes")
+        parser.add_argument('--batch-size', type=int, default=config['worker_batch_size'],
+                            help="Samples claimed per bulk insert")
+        parser.add_argument('--poll-interval', type=float, default=config['worker_poll_interval'],
+                            help="Seconds to sleep when the spool is empty")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit once the spool is drained")
+        parser.add_argument('--requeue-dead', action='store_true',
+                            help="Move dead-lettered samples back into the spool and exit")
+
+    def handle(self, *args, **options):
+        if options['requeue_dead']:
+            self.stdout.write(self.style.SUCCESS(f"Requeued {spool.requeue_dead()} dead-lettered samples"))
+            return
+
+        workers = max(1, options['workers'])
+        partition_count = settings.TELEMETRY_INGEST_CONFIG['spool_partitions']
+        if workers > partition_count:
+            workers = partition_count
+            self.stdout.write(self.style.WARNING(
+                f"Only {partition_count} spool partitions - using {workers} workers"
+            ))
+
+        worker_args = (workers, options['batch_size'], options['poll_interval'], options['once'])
+
+        self.stdout.write(
+            f"Starting {workers} ingestion worker(s), spool depth {spool.depth()}, "
+            f"dead-lettered {spool.dead_depth()}"
+        )
+
+        if workers == 1:
+            run_worker(0, *worker_args)
+            return
+
+        # Never share DB/SQLite connections across fork
+        connections.close_all()
+        spool.close()
+
+        processes = [
+            multiprocessing.Process(target=run_worker, args=(index, *worker_args), daemon=True)
+            for index in range(workers)
+        ]
+        for process in processes:
+            process.start()
+
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            for process in processes:
+                process.terminate()
+
+        self.stdout.write(self.style.SUCCESS("Ingestion workers stopped"))
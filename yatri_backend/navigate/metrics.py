@@ -0,0 +1,69 @@
+"""
+YatriConnect - Ingestion Metrics
+Process-wide counters kept in the Django cache (Redis), shared by the
+API processes and the ingestion workers
+
+On Redis the counters are fields of one hash, updated with HINCRBY in
+a single pipelined round trip per ingest; other cache backends (local
+development) fall back to one add/incr pair per counter.
+"""
+
+from django.core.cache import cache
+
+from Devices.utils import cache_redis_client
+
+
+COUNTERS = (
+    'samples_received',   # Samples handed to the ingestion pipeline
+    'samples_stored',     # Rows inserted into telemetry
+    'samples_duplicate',  # Retransmissions dropped (same device + timestamp)
+    'samples_late',       # Stored behind the reorder watermark (no detection)
+    'crash_detected',
+    'theft_detected',
+    'harsh_detected',     # HarshEvent rows (harsh acceleration/braking/cornering samples)
+)
+
+
+def _cache_key(name):
+    return f"ingest_metric_{name}"
+
+
+def increment(counts):
+    """
+    Add to several counters at once
+
+    Args:
+        counts: {counter_name: amount}; zero amounts are skipped
+    """
+    counts = {name: amount for name, amount in counts.items() if amount}
+    if not counts:
+        return
+
+    client, hash_key = cache_redis_client('ingest_metrics')
+    if client is not None:
+        pipeline = client.pipeline(transaction=False)
+        for name, amount in counts.items():
+            pipeline.hincrby(hash_key, name, amount)
+        pipeline.execute()
+        return
+
+    for name, amount in counts.items():
+        key = _cache_key(name)
+        # add() is a no-op when the key exists
+        cache.add(key, 0, timeout=None)
+        try:
+            cache.incr(key, amount)
+        except ValueError:
+            # Evicted between add() and incr()
+            cache.set(key, amount, timeout=None)
+
+
+def snapshot():
+    """Current value of every counter"""
+    client, hash_key = cache_redis_client('ingest_metrics')
+    if client is not None:
+        values = client.hgetall(hash_key)
+        return {name: int(values.get(name.encode(), 0)) for name in COUNTERS}
+
+    values = cache.get_many([_cache_key(name) for name in COUNTERS])
+    return {name: values.get(_cache_key(name), 0) for name in COUNTERS}
@@ -0,0 +1,400 @@
+"""
+YatriConnect - Telemetry Rollups
+Per-device minute and hour aggregates of telemetry (sample count,
+distance, min/avg/max speed, harsh samples, bounding box) stored in
+TelemetryMinuteRollup / TelemetryHourRollup, so analytics over days
+and weeks read a few rows per device and hour instead of raw samples
+
+Ingestion adds each stored sample to an in-process minute aggregate
+(O(1)); flush() merges the pending aggregates - and the hours they
+roll up into - into the database every flush_interval seconds on a
+background timer (navigate/background.py). Rows
+are inserted if missing, locked and merged, so several processes can
+flush into the same buckets.
+
+Distance is the path length between a bucket's own samples. Merging
+two aggregates of a bucket joins them at the boundary (first/last
+point) when one follows the other; aggregates overlapping in time
+(out-of-order samples across flushes) are summed without the join.
+Hops longer than max_gap_seconds (device offline) are not counted.
+
+rebuild() recomputes the rollups of a time range from telemetry
+(python manage.py backfill_telemetry_rollups). It only covers closed
+hours - ranges ending before open_cutoff() - because ingest processes
+may still hold unflushed aggregates of the current minutes, which
+would be merged on top of the rebuilt rows and counted twice. day_totals() sums the
+hour rollups of whole local days (quick_insights).
+"""
+
+import threading
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+from Devices.utils import calculate_distance
+from navigate import background
+from navigate.detection import harsh_event_type
+from sensorData.models import Telemetry, TelemetryMinuteRollup, TelemetryHourRollup
+
+
+# Aggregate fields (everything but the key)
+VALUE_FIELDS = [
+    'sample_count', 'distance',
+    'speed_count', 'speed_sum', 'speed_min', 'speed_max',
+    'harsh_count',
+    'min_latitude', 'max_latitude', 'min_longitude', 'max_longitude',
+    'first_timestamp', 'first_latitude', 'first_longitude',
+    'last_timestamp', 'last_latitude', 'last_longitude',
+]
+
+_lock = threading.Lock()
+_pending = {}  # (device_pk, minute) -> unsaved TelemetryMinuteRollup
+
+
+def _config():
+    return settings.TELEMETRY_ROLLUP_CONFIG
+
+
+def minute_bucket(when):
+    """Start of the minute, in UTC (as stored)"""
+    return when.astimezone(dt_timezone.utc).replace(second=0, microsecond=0)
+
+
+def hour_bucket(when):
+    """Start of the local hour (settings.TIME_ZONE)"""
+    return timezone.localtime(when).replace(minute=0, second=0, microsecond=0)
+
+
+# ============================================================
+# AGGREGATES
+# ============================================================
+
+def _hop(timestamp1, lat1, lon1, timestamp2, lat2, lon2):
+    """Distance between consecutive points (0 across gaps over max_gap_seconds)"""
+    if (timestamp2 - timestamp1).total_seconds() > _config()['max_gap_seconds']:
+        return 0.0
+    return calculate_distance(lat1, lon1, lat2, lon2)
+
+
+def _add_sample(pending, model, device_pk, bucket, timestamp, lat, lon, speed, accel_x, accel_y):
+    """Add one sample to the pending aggregate of its bucket (created if missing)"""
+    harsh = harsh_event_type(accel_x, accel_y) is not None
+
+    key = (device_pk, bucket)
+    row = pending.get(key)
+    if row is None:
+        pending[key] = model(
+            device_id=device_pk,
+            bucket=bucket,
+            sample_count=1,
+            distance=0.0,
+            speed_count=0 if speed is None else 1,
+            speed_sum=speed or 0.0,
+            speed_min=speed,
+            speed_max=speed,
+            harsh_count=int(harsh),
+            min_latitude=lat, max_latitude=lat,
+            min_longitude=lon, max_longitude=lon,
+            first_timestamp=timestamp, first_latitude=lat, first_longitude=lon,
+            last_timestamp=timestamp, last_latitude=lat, last_longitude=lon
+        )
+        return
+
+    if timestamp >= row.last_timestamp:
+        row.distance += _hop(row.last_timestamp, row.last_latitude, row.last_longitude, timestamp, lat, lon)
+        row.last_timestamp, row.last_latitude, row.last_longitude = timestamp, lat, lon
+    elif timestamp <= row.first_timestamp:
+        row.distance += _hop(timestamp, lat, lon, row.first_timestamp, row.first_latitude, row.first_longitude)
+        row.first_timestamp, row.first_latitude, row.first_longitude = timestamp, lat, lon
+
+    row.sample_count += 1
+    if speed is not None:
+        row.speed_count += 1
+        row.speed_sum += speed
+        row.speed_min = speed if row.speed_min is None else min(row.speed_min, speed)
+        row.speed_max = speed if row.speed_max is None else max(row.speed_max, speed)
+    row.harsh_count += harsh
+    row.min_latitude = min(row.min_latitude, lat)
+    row.max_latitude = max(row.max_latitude, lat)
+    row.min_longitude = min(row.min_longitude, lon)
+    row.max_longitude = max(row.max_longitude, lon)
+
+
+def _merge(row, other):
+    """Merge aggregate other into row (same device and bucket, in place)"""
+    if not row.sample_count:
+        for field in VALUE_FIELDS:
+            setattr(row, field, getattr(other, field))
+        return row
+    if not other.sample_count:
+        return row
+
+    if other.first_timestamp >= row.last_timestamp:
+        row.distance += other.distance + _hop(
+            row.last_timestamp, row.last_latitude, row.last_longitude,
+            other.first_timestamp, other.first_latitude, other.first_longitude
+        )
+        row.last_timestamp, row.last_latitude, row.last_longitude = \
+            other.last_timestamp, other.last_latitude, other.last_longitude
+    elif other.last_timestamp <= row.first_timestamp:
+        row.distance += other.distance + _hop(
+            other.last_timestamp, other.last_latitude, other.last_longitude,
+            row.first_timestamp, row.first_latitude, row.first_longitude
+        )
+        row.first_timestamp, row.first_latitude, row.first_longitude = \
+            other.first_timestamp, other.first_latitude, other.first_longitude
+    else:
+        # Overlapping in time: summed without the join
+        row.distance += other.distance
+        if other.first_timestamp < row.first_timestamp:
+            row.first_timestamp, row.first_latitude, row.first_longitude = \
+                other.first_timestamp, other.first_latitude, other.first_longitude
+        if other.last_timestamp > row.last_timestamp:
+            row.last_timestamp, row.last_latitude, row.last_longitude = \
+                other.last_timestamp, other.last_latitude, other.last_longitude
+
+    row.sample_count += other.sample_count
+    row.speed_count += other.speed_count
+    row.speed_sum += other.speed_sum
+    if other.speed_min is not None:
+        row.speed_min = other.speed_min if row.speed_min is None else min(row.speed_min, other.speed_min)
+        row.speed_max = other.speed_max if row.speed_max is None else max(row.speed_max, other.speed_max)
+    row.harsh_count += other.harsh_count
+    row.min_latitude = min(row.min_latitude, other.min_latitude)
+    row.max_latitude = max(row.max_latitude, other.max_latitude)
+    row.min_longitude = min(row.min_longitude, other.min_longitude)
+    row.max_longitude = max(row.max_longitude, other.max_longitude)
+    return row
+
+
+def _copy(model, source, **overrides):
+    values = {field: getattr(source, field) for field in ['device_id', 'bucket', *VALUE_FIELDS]}
+    values.update(overrides)
+    return model(**values)
+
+
+def _hours(minutes):
+    """Roll minute aggregates up into local-hour aggregates"""
+    hours = {}
+    for minute in sorted(minutes, key=lambda row: (row.device_id, row.bucket)):
+        key = (minute.device_id, hour_bucket(minute.bucket))
+        hour = hours.get(key)
+        if hour is None:
+            hours[key] = _copy(TelemetryHourRollup, minute, bucket=key[1])
+        else:
+            _merge(hour, minute)
+    return list(hours.values())
+
+
+# ============================================================
+# INGEST HOOK
+# ============================================================
+
+def record_samples(telemetry_list):
+    """
+    Ingest hook: add stored samples to the pending minute aggregates and
+    schedule their flush (background timer, flush_interval seconds)
+
+    Args:
+        telemetry_list: Stored Telemetry instances
+    """
+    with _lock:
+        for telemetry in sorted(telemetry_list, key=lambda t: (t.device_id, t.timestamp)):
+            _add_sample(
+                _pending, TelemetryMinuteRollup,
+                telemetry.device_id, minute_bucket(telemetry.timestamp), telemetry.timestamp,
+                telemetry.latitude, telemetry.longitude, telemetry.speed,
+                telemetry.accel_x, telemetry.accel_y
+            )
+
+    background.schedule('rollups', _config()['flush_interval'], flush)
+
+
+def flush():
+    """
+    Merge pending minute aggregates (and their hours) into the rollup tables
+
+    When the transaction fails the aggregates go back to the pending
+    ones (merging leaves them unchanged) and the next flush retries them.
+
+    Returns: number of minute rows written
+    """
+    global _pending
+
+    with _lock:
+        pending, _pending = _pending, {}
+
+    if not pending:
+        return 0
+
+    minutes = list(pending.values())
+    try:
+        with transaction.atomic():
+            _merge_into(TelemetryMinuteRollup, minutes)
+            _merge_into(TelemetryHourRollup, _hours(minutes))
+    except Exception:
+        _restore(pending)
+        raise
+
+    return len(minutes)
+
+
+def _restore(pending):
+    """Merge an unwritten batch back into the pending aggregates"""
+    with _lock:
+        for key, row in pending.items():
+            current = _pending.get(key)
+            if current is None:
+                _pending[key] = row
+            else:
+                _merge(current, row)
+
+
+def _merge_into(model, aggregates):
+    """
+    Merge aggregates into their rows: insert missing rows as empty
+    placeholders (ignore conflicts), lock every row in a fixed order,
+    merge, bulk update
+    """
+    by_key = {(row.device_id, row.bucket): row for row in aggregates}
+
+    model.objects.bulk_create(
+        [_copy(model, row, sample_count=0) for row in aggregates],
+        ignore_conflicts=True,
+        batch_size=500
+    )
+
+    rows = model.objects.select_for_update().filter(
+        device_id__in={key[0] for key in by_key},
+        bucket__in={key[1] for key in by_key}
+    ).order_by('device_id', 'bucket')
+
+    updated = []
+    for row in rows:
+        aggregate = by_key.get((row.device_id, row.bucket))
+        if aggregate is not None:
+            updated.append(_merge(row, aggregate))
+
+    model.objects.bulk_update(updated, VALUE_FIELDS, batch_size=500)
+
+
+# ============================================================
+# BACKFILL
+# ============================================================
+
+def open_cutoff():
+    """
+    Start of the local hour that may still have unflushed aggregates in
+    ingest processes: now minus two flush intervals, rounded down
+    """
+    return hour_bucket(timezone.now() - timedelta(seconds=2 * _config()['flush_interval']))
+
+
+def rebuild(start, end, device_pks=None):
+    """
+    Recompute the rollups of [start, end) from telemetry, replacing the
+    rows of that range (start/end on local hour boundaries)
+
+    Samples are streamed in (device, timestamp) order and written one
+    device at a time, so memory stays at one device's buckets.
+
+    Restriction: `end` must not be after open_cutoff() (ValueError).
+    Late samples of the range ingested while the rebuild runs are still
+    counted twice - rebuild ranges devices are not backfilling, or with
+    ingestion stopped.
+
+    Returns: (samples read, minute rows, hour rows)
+    """
+    cutoff = open_cutoff()
+    if end > cutoff:
+        raise ValueError(f"Rollup rebuild must end by {cutoff.isoformat()} (open hours are still being ingested)")
+
+    config = _config()
+    telemetry_qs = Telemetry.objects.filter(timestamp__gte=start, timestamp__lt=end)
+    if device_pks is not None:
+        telemetry_qs = telemetry_qs.filter(device_id__in=device_pks)
+
+    samples = minute_count = hour_count = 0
+    minutes = {}
+    batch = {'minutes': [], 'hours': []}
+
+    def finish_device():
+        batch['minutes'].extend(minutes.values())
+        batch['hours'].extend(_hours(minutes.values()))
+        minutes.clear()
+        if len(batch['minutes']) >= config['backfill_batch_size']:
+            write_batch()
+
+    def write_batch():
+        nonlocal minute_count, hour_count
+        TelemetryMinuteRollup.objects.bulk_create(batch['minutes'], batch_size=500)
+        TelemetryHourRollup.objects.bulk_create(batch['hours'], batch_size=500)
+        minute_count += len(batch['minutes'])
+        hour_count += len(batch['hours'])
+        batch['minutes'], batch['hours'] = [], []
+
+    with transaction.atomic():
+        for model in (TelemetryMinuteRollup, TelemetryHourRollup):
+            rows = model.objects.filter(bucket__gte=start, bucket__lt=end)
+            if device_pks is not None:
+                rows = rows.filter(device_id__in=device_pks)
+            rows.delete()
+
+        rows = telemetry_qs.order_by('device_id', 'timestamp').values_list(
+            'device_id', 'timestamp', 'latitude', 'longitude', 'speed', 'accel_x', 'accel_y'
+        ).iterator(chunk_size=config['backfill_batch_size'])
+
+        current = None
+        for device_pk, timestamp, lat, lon, speed, accel_x, accel_y in rows:
+            if device_pk != current:
+                finish_device()
+                current = device_pk
+            _add_sample(
+                minutes, TelemetryMinuteRollup, device_pk, minute_bucket(timestamp),
+                timestamp, lat, lon, speed, accel_x, accel_y
+            )
+            samples += 1
+        finish_device()
+        write_batch()
+
+    return samples, minute_count, hour_count
+
+
+# ============================================================
+# READS
+# ============================================================
+
+def day_totals(start_date, end_date, vehicle=None):
+    """
+    Totals of the hour rollups over the local days [start_date, end_date]
+
+    Args:
+        vehicle: Only this vehicle's devices (None = all)
+
+    Returns: {'samples', 'distance' (m), 'avg_speed' (m/s or None),
+              'max_speed' (m/s or None), 'harsh_samples', 'active_hours'}
+    Unflushed samples (up to flush_interval old) are not included.
+    """
+    start = timezone.make_aware(datetime.combine(start_date, datetime.min.time()))
+    end = timezone.make_aware(datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+
+    rows = TelemetryHourRollup.objects.filter(bucket__gte=start, bucket__lt=end)
+    if vehicle is not None:
+        rows = rows.filter(device__vehicle=vehicle)
+
+    totals = rows.aggregate(
+        samples=Sum('sample_count'),
+        distance=Sum('distance'),
+        speed_sum=Sum('speed_sum'),
+        speed_count=Sum('speed_count'),
+        max_speed=Max('speed_max'),
+        harsh_samples=Sum('harsh_count'),
+        active_hours=Count('bucket', distinct=True)
+    )
+    speed_sum, speed_count = totals.pop('speed_sum'), totals.pop('speed_count')
+    totals['avg_speed'] = speed_sum / speed_count if speed_count else None
+    for field in ('samples', 'distance', 'harsh_samples'):
+        totals[field] = totals[field] or 0
+    return totals
@@ -0,0 +1,340 @@
+"""
+YatriConnect - Per-Device Recent Sample Buffer
+Bounded ring buffer of each device's latest samples, kept in Redis
+as a packed array of doubles, used by crash/theft detection instead
+of querying the telemetry table on every ingest
+
+Also the per-device reorder buffer: samples are held until the lateness
+watermark passes them and released to the detectors in timestamp order
+(TELEMETRY_INGEST_CONFIG['reorder_lateness_seconds']). Held samples are
+kept as (telemetry row id, timestamp) pairs; devices with held samples
+are indexed by release time (a Redis sorted set) so that
+release_held_samples() can release them when the device stops sending.
+
+A device's buffer is read, changed and written back under a per-device
+lock (lock_buffers / extend_locks / unlock_buffers), so concurrent
+requests of one device do not overwrite each other's buffer.
+"""
+
+import math
+import time
+import uuid
+from array import array
+from bisect import bisect_left, insort
+from collections import namedtuple
+from datetime import datetime, timezone as dt_timezone
+from django.conf import settings
+from django.core.cache import cache
+
+from Devices.utils import cache_redis_client
+from sensorData.models import Telemetry
+
+
+# What detection needs from a predecessor sample
+BufferedSample = namedtuple('BufferedSample', ['timestamp', 'speed'])
+
+NAN = float('nan')
+
+
+HELD_INDEX_KEY = 'telemetry_buffer_held'
+
+# Held-sample index when the cache is not Redis (LocMemCache is process-local too)
+_local_held = {}  # device_pk -> release epoch
+
+
+def _cache_key(device_pk):
+    return f"telemetry_buffer_v3_{device_pk}"
+
+
+def _lock_key(device_pk):
+    return f"telemetry_buffer_lock_{device_pk}"
+
+
+class SampleBuffer:
+    """
+    Timestamp-ordered buffer of the last N (timestamp, speed) pairs of a device
+
+    Encoding: array('d') = [truncated_flag, released_until, pending_count,
+    pk0, ts0, ..., ts0, speed0, ts1, speed1, ...] with timestamps as epoch
+    seconds and NaN for a missing speed.
+    `truncated` is False while the buffer still holds the device's full
+    history, so window queries can be answered without the database.
+
+    Reorder state:
+    - released_until: newest timestamp already released to the detectors
+      (NaN before the first one); older arrivals are late
+    - pending: (telemetry pk, epoch) of stored rows held back until the
+      watermark passes them (empty when reorder_lateness_seconds is 0)
+    """
+
+    def __init__(self, samples=(), truncated=False, released_until=NAN, pending=()):
+        self.samples = list(samples)  # [(epoch, speed), ...] oldest first
+        self.truncated = truncated
+        self.released_until = released_until
+        self.pending = list(pending)  # [(telemetry_pk, epoch), ...]
+
+    # --------------------------------------------------------
+    # Encoding
+    # --------------------------------------------------------
+    @classmethod
+    def decode(cls, raw):
+        values = array('d')
+        values.frombytes(raw)
+        samples_start = 3 + 2 * int(values[2])
+        pending = [(int(pk), epoch) for pk, epoch in zip(values[3:samples_start:2], values[4:samples_start:2])]
+        samples = list(zip(values[samples_start::2], values[samples_start + 1::2]))
+        return cls(samples, truncated=bool(values[0]), released_until=values[1], pending=pending)
+
+    def encode(self):
+        values = array('d', [1.0 if self.truncated else 0.0, self.released_until, len(self.pending)])
+        for pk, epoch in self.pending:
+            values.append(pk)
+            values.append(epoch)
+        for epoch, speed in self.samples:
+            values.append(epoch)
+            values.append(speed)
+        return values.tobytes()
+
+    # --------------------------------------------------------
+    # Access
+    # --------------------------------------------------------
+    def latest(self):
+        """Most recent sample by timestamp (None when empty)"""
+        if not self.samples:
+            return None
+        epoch, speed = self.samples[-1]
+        return BufferedSample(
+            timestamp=datetime.fromtimestamp(epoch, tz=dt_timezone.utc),
+            speed=None if math.isnan(speed) else speed
+        )
+
+    def contains(self, timestamp):
+        """True if a sample with exactly this timestamp is buffered (retransmission)"""
+        epoch = timestamp.timestamp()
+        index = bisect_left(self.samples, (epoch,))
+        if index < len(self.samples) and self.samples[index][0] == epoch:
+            return True
+        return any(pending_epoch == epoch for _, pending_epoch in self.pending)
+
+    def append(self, timestamp, speed):
+        """Insert a sample in timestamp order, evicting the oldest beyond capacity"""
+        insort(self.samples, (timestamp.timestamp(), NAN if speed is None else speed))
+        capacity = settings.TELEMETRY_INGEST_CONFIG['sample_buffer_size']
+        if len(self.samples) > capacity:
+            del self.samples[:len(self.samples) - capacity]
+            self.truncated = True
+
+    # --------------------------------------------------------
+    # Reordering
+    # --------------------------------------------------------
+    def is_late(self, timestamp):
+        """True if a newer sample was already released to the detectors"""
+        return timestamp.timestamp() <= self.released_until  # NaN compares False
+
+    def hold(self, telemetry):
+        """Keep a stored sample back until the watermark passes it"""
+        self.pending.append((telemetry.pk, telemetry.timestamp.timestamp()))
+
+    def newest_pending(self):
+        """Timestamp of the newest held sample (None when nothing is held)"""
+        if not self.pending:
+            return None
+        return datetime.fromtimestamp(max(epoch for _, epoch in self.pending), tz=dt_timezone.utc)
+
+    def release(self, watermark):
+        """
+        Pop held samples at or before the watermark, oldest first
+
+        Returns: List of telemetry pks in timestamp order
+        """
+        limit = watermark.timestamp()
+        ready = sorted((item for item in self.pending if item[1] <= limit), key=lambda item: item[1])
+        if ready:
+            self.pending = [item for item in self.pending if item[1] > limit]
+            self.released_until = ready[-1][1]
+        return [pk for pk, _ in ready]
+
+    def count_moving(self, window_start, window_end, speed_threshold):
+        """
+        Count samples in [window_start, window_end] faster than speed_threshold
+
+        Returns None when older samples were evicted inside the window,
+        i.e. the buffer alone cannot give an exact answer.
+        """
+        start = window_start.timestamp()
+        end = window_end.timestamp()
+        if self.truncated and (not self.samples or self.samples[0][0] > start):
+            return None
+        return sum(
+            1 for epoch, speed in self.samples
+            if start <= epoch <= end and speed > speed_threshold  # NaN compares False
+        )
+
+
+def load_buffers(device_pks):
+    """
+    Load buffers for many devices: Redis first, database on a cold start
+
+    Must be called before the current samples are inserted.
+    Returns: {device_pk: SampleBuffer}
+    """
+    capacity = settings.TELEMETRY_INGEST_CONFIG['sample_buffer_size']
+    cached = cache.get_many([_cache_key(pk) for pk in device_pks])
+    buffers = {}
+
+    for device_pk in device_pks:
+        raw = cached.get(_cache_key(device_pk))
+        if raw is not None:
+            buffers[device_pk] = SampleBuffer.decode(raw)
+            continue
+
+        # Cold start: seed from the latest stored samples
+        rows = list(
+            Telemetry.objects.filter(device_id=device_pk)
+            .order_by('-timestamp')
+            .values_list('timestamp', 'speed')[:capacity]
+        )
+        # Stored samples count as already released
+        buffers[device_pk] = SampleBuffer(
+            [(ts.timestamp(), NAN if speed is None else speed) for ts, speed in reversed(rows)],
+            truncated=len(rows) == capacity,
+            released_until=rows[0][0].timestamp() if rows else NAN
+        )
+
+    return buffers
+
+
+def save_buffers(buffers):
+    """
+    Write buffers (and held samples) back to Redis and update the
+    held-sample index
+
+    The TTL covers the lateness window, so held samples outlive the
+    buffer's idle timeout until release_held_samples() releases them.
+    """
+    config = settings.TELEMETRY_INGEST_CONFIG
+    lateness = config['reorder_lateness_seconds']
+    cache.set_many(
+        {_cache_key(device_pk): buffer.encode() for device_pk, buffer in buffers.items()},
+        config['sample_buffer_ttl'] + lateness
+    )
+
+    held = {}
+    released = []
+    for device_pk, buffer in buffers.items():
+        if buffer.pending:
+            held[device_pk] = min(epoch for _, epoch in buffer.pending) + lateness
+        else:
+            released.append(device_pk)
+
+    client, index_key = cache_redis_client(HELD_INDEX_KEY)
+    if client is None:
+        _local_held.update(held)
+        for device_pk in released:
+            _local_held.pop(device_pk, None)
+        return
+
+    pipeline = client.pipeline(transaction=False)
+    if held:
+        pipeline.zadd(index_key, held)
+    if released:
+        pipeline.zrem(index_key, *released)
+    pipeline.execute()
+
+
+def due_devices(now, limit=500):
+    """Devices whose held samples are due for release at `now` (epoch seconds)"""
+    client, index_key = cache_redis_client(HELD_INDEX_KEY)
+    if client is None:
+        return sorted(device_pk for device_pk, due in _local_held.items() if due <= now)[:limit]
+    return [int(device_pk) for device_pk in client.zrangebyscore(index_key, '-inf', now, start=0, num=limit)]
+
+
+# ============================================================
+# PER-DEVICE LOCKS
+# ============================================================
+
+def lock_buffers(device_pks):
+    """
+    Take the buffer lock of every device, waiting for other holders
+
+    Locks are taken strictly in ascending device order: a caller only
+    waits for a device's lock while holding locks of lower devices, so
+    batches with overlapping devices never wait on each other. Each pass
+    tries the remaining locks in one round trip and keeps the leading run
+    it got; locks taken past the first busy device are released again
+    before waiting for it.
+
+    Locks expire after sample_buffer_lock_timeout seconds, so a crashed
+    holder cannot block a device for longer (extend_locks before writing
+    the buffers back).
+
+    Returns: Lock token for extend_locks / unlock_buffers
+    """
+    timeout = settings.TELEMETRY_INGEST_CONFIG['sample_buffer_lock_timeout']
+    token = uuid.uuid4().int >> 65  # int: stored as-is by both paths, read back by cache.get
+    waiting = sorted(set(device_pks))
+    client, _ = cache_redis_client('')
+
+    while waiting:
+        if client is not None:
+            pipeline = client.pipeline(transaction=False)
+            for device_pk in waiting:
+                pipeline.set(cache.make_key(_lock_key(device_pk)), token, nx=True, ex=timeout)
+            acquired = pipeline.execute()
+        else:
+            acquired = [cache.add(_lock_key(device_pk), token, timeout) for device_pk in waiting]
+
+        held = 0
+        while held < len(waiting) and acquired[held]:
+            held += 1
+        # Out of order: give back what was taken past the busy device
+        cache.delete_many([
+            _lock_key(device_pk)
+            for device_pk, ok in zip(waiting[held:], acquired[held:]) if ok
+        ])
+        waiting = waiting[held:]
+        if waiting:
+            time.sleep(0.005)
+
+    return token
+
+
+# Refresh the TTL of a lock only while it still holds the token
+_EXTEND_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('expire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+
+def extend_locks(device_pks, token):
+    """
+    Renew the buffer locks still held with this token for another
+    sample_buffer_lock_timeout seconds
+
+    Returns: Set of the device_pks whose lock is still held (a lock that
+             expired may have been taken by another writer since)
+    """
+    timeout = settings.TELEMETRY_INGEST_CONFIG['sample_buffer_lock_timeout']
+    client, _ = cache_redis_client('')
+
+    if client is not None:
+        pipeline = client.pipeline(transaction=False)
+        for device_pk in device_pks:
+            pipeline.eval(_EXTEND_SCRIPT, 1, cache.make_key(_lock_key(device_pk)), token, timeout)
+        return {device_pk for device_pk, ok in zip(device_pks, pipeline.execute()) if ok}
+
+    held = cache.get_many([_lock_key(device_pk) for device_pk in device_pks])
+    return {
+        device_pk for device_pk in device_pks
+        if held.get(_lock_key(device_pk)) == token and cache.touch(_lock_key(device_pk), timeout)
+    }
+
+
+def unlock_buffers(device_pks, token):
+    """Release buffer locks still held with this token"""
+    keys = [_lock_key(device_pk) for device_pk in device_pks]
+    held = cache.get_many(keys)
+    cache.delete_many([key for key in keys if held.get(key) == token])
@@ -0,0 +1,85 @@
+"""
+YatriConnect - Road Segment Grid
+Grid cells along a route, for GET /api/navigate/congestion/route/
+(traffic per cell comes from the sketches, navigate/sketches.py)
+
+Cells are GRID_RESOLUTION-degree squares centred on multiples of the
+resolution: cell (iy, ix) covers latitudes within half a cell of
+iy * resolution (floor(x / resolution + 0.5)), so a point always
+lands in the same cell.
+
+Segment registry: names of the RoadSegment rows keyed by cell, loaded
+into process memory and reloaded every segment_refresh_interval
+seconds. Cells without a RoadSegment row are still reported (unnamed);
+nothing is written on the read path.
+"""
+
+import math
+import threading
+import time
+from django.conf import settings
+
+
+_lock = threading.Lock()
+_registry = None      # (iy, ix) -> RoadSegment name
+_loaded_at = None     # monotonic time of the last load
+
+
+def _config():
+    return settings.CONGESTION_CONFIG
+
+
+def cell_of(latitude, longitude):
+    """Grid cell (iy, ix) of a point"""
+    resolution = _config()['grid_resolution']
+    return (
+        math.floor(latitude / resolution + 0.5),
+        math.floor(longitude / resolution + 0.5)
+    )
+
+
+def cell_center(cell):
+    resolution = _config()['grid_resolution']
+    return cell[0] * resolution, cell[1] * resolution
+
+
+def cells_on_path(start_lat, start_lon, end_lat, end_lon):
+    """
+    Distinct cells along the straight line between two points, in order
+    One sample per grid step on the longer axis
+    """
+    resolution = _config()['grid_resolution']
+    num_segments = max(
+        int(abs(end_lat - start_lat) / resolution),
+        int(abs(end_lon - start_lon) / resolution),
+        1
+    )
+
+    cells = {}
+    for i in range(num_segments + 1):
+        ratio = i / num_segments
+        cell = cell_of(
+            start_lat + (end_lat - start_lat) * ratio,
+            start_lon + (end_lon - start_lon) * ratio
+        )
+        cells.setdefault(cell, None)
+    return list(cells)
+
+
+def segment_names():
+    """The segment registry: {(iy, ix): name}, reloaded when due"""
+    global _registry, _loaded_at
+    from Journey.models import RoadSegment
+
+    now = time.monotonic()
+    with _lock:
+        if _registry is None or now - _loaded_at >= _config()['segment_refresh_interval']:
+            _registry = {
+                cell_of(lat_grid, lon_grid): name
+                for name, lat_grid, lon_grid in RoadSegment.objects.values_list(
+                    'name', 'lat_grid', 'lon_grid'
+                ).iterator()
+            }
+            _loaded_at = now
+        return _registry
+
@@ -0,0 +1,226 @@
+"""
+YatriConnect - Distinct Vehicle Sketches
+HyperLogLog sketches (navigate/hll.py) of the vehicles seen per road
+segment grid cell (navigate/segments.py) and minute, with speed totals,
+stored in CellMinuteSketch
+
+Ingestion adds each stored sample to an in-process pending sketch
+(O(1)); flush() merges the pending sketches into the database every
+sketch_flush_interval seconds on a background timer (navigate/background.py). Merging is a register-wise max, so
+sketches flushed by several processes for the same cell and minute
+combine into the sketch of their union (speed totals add up).
+Congestion snapshots (navigate/congestion.py) read the merged rows.
+
+estimate_distinct_vehicles() answers "distinct vehicles in these cells
+during this window" by merging the stored sketches, without touching
+telemetry; estimate_cells() answers it per cell (route congestion,
+GET /api/navigate/congestion/route/). Rows older than
+sketch_retention_hours are pruned by the congestion snapshot writer.
+"""
+
+import threading
+from datetime import timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from navigate import background, segments
+from navigate.hll import HyperLogLog
+
+
+_lock = threading.Lock()
+_pending = {}  # (cell_y, cell_x, minute) -> [HyperLogLog, sample_count, speed_sum, speed_count]
+
+
+def _config():
+    return settings.CONGESTION_CONFIG
+
+
+def _minute(when):
+    """Start of the minute, in UTC (as stored)"""
+    return when.astimezone(dt_timezone.utc).replace(second=0, microsecond=0)
+
+
+def record_samples(telemetry_list, devices):
+    """
+    Ingest hook: add stored samples to the pending sketches and schedule
+    their flush (background timer, sketch_flush_interval seconds)
+
+    Args:
+        telemetry_list: Stored Telemetry instances
+        devices: {device_pk: DeviceEntry}
+    """
+    config = _config()
+
+    with _lock:
+        for telemetry in telemetry_list:
+            key = (*segments.cell_of(telemetry.latitude, telemetry.longitude), _minute(telemetry.timestamp))
+            pending = _pending.get(key)
+            if pending is None:
+                pending = _pending[key] = [HyperLogLog(config['hll_precision']), 0, 0.0, 0]
+            pending[0].add(devices[telemetry.device_id].vehicle_pk)
+            pending[1] += 1
+            if telemetry.speed is not None:
+                pending[2] += telemetry.speed
+                pending[3] += 1
+
+    background.schedule('sketches', config['sketch_flush_interval'], flush)
+
+
+def flush():
+    """
+    Merge pending sketches into CellMinuteSketch rows
+
+    One transaction: insert missing rows (ignore conflicts), lock the
+    rows of every pending key in a fixed order, merge, bulk update.
+    When it fails the batch goes back to the pending sketches and is
+    retried by the next flush.
+    """
+    global _pending
+
+    with _lock:
+        pending, _pending = _pending, {}
+
+    if not pending:
+        return 0
+
+    try:
+        return _write(pending)
+    except Exception:
+        _restore(pending)
+        raise
+
+
+def _restore(pending):
+    """Merge an unwritten batch back into the pending sketches"""
+    with _lock:
+        for key, entry in pending.items():
+            current = _pending.get(key)
+            if current is None:
+                _pending[key] = entry
+                continue
+            current[0].merge(entry[0])
+            current[1] += entry[1]
+            current[2] += entry[2]
+            current[3] += entry[3]
+
+
+def _write(pending):
+    """Merge a batch into CellMinuteSketch rows (see flush)"""
+    from Journey.models import CellMinuteSketch
+
+    with transaction.atomic():
+        CellMinuteSketch.objects.bulk_create(
+            [
+                CellMinuteSketch(cell_y=cell_y, cell_x=cell_x, minute=minute, sketch=b'')
+                for cell_y, cell_x, minute in pending
+            ],
+            ignore_conflicts=True
+        )
+
+        rows = CellMinuteSketch.objects.select_for_update().filter(
+            minute__in={key[2] for key in pending},
+            cell_y__in={key[0] for key in pending},
+            cell_x__in={key[1] for key in pending}
+        ).order_by('minute', 'cell_y', 'cell_x')
+
+        updated = []
+        for row in rows:
+            entry = pending.get((row.cell_y, row.cell_x, row.minute))
+            if entry is None:
+                continue
+            sketch, sample_count, speed_sum, speed_count = entry
+            if row.sketch:
+                sketch.merge_bytes(row.sketch)
+            row.sketch = sketch.to_bytes()
+            row.sample_count += sample_count
+            row.speed_sum += speed_sum
+            row.speed_count += speed_count
+            updated.append(row)
+
+        CellMinuteSketch.objects.bulk_update(
+            updated, ['sketch', 'sample_count', 'speed_sum', 'speed_count'], batch_size=500
+        )
+
+    return len(updated)
+
+
+def _rows(cells, since, until):
+    """CellMinuteSketch rows of a set of cells during [since, until)"""
+    from Journey.models import CellMinuteSketch
+
+    rows = CellMinuteSketch.objects.filter(
+        minute__gte=_minute(since),
+        cell_y__in={cell[0] for cell in cells},
+        cell_x__in={cell[1] for cell in cells}
+    )
+    if until is not None:
+        rows = rows.filter(minute__lt=until)
+
+    return (
+        row for row in rows.values_list(
+            'cell_y', 'cell_x', 'sketch', 'sample_count', 'speed_sum', 'speed_count'
+        ).iterator()
+        if (row[0], row[1]) in cells and row[2]
+    )
+
+
+def estimate_distinct_vehicles(cells, since, until=None):
+    """
+    Approximate distinct vehicles in a set of cells during [since, until)
+
+    Args:
+        cells: Iterable of (cell_y, cell_x) (segments.cell_of / cells_on_path)
+        since, until: Window bounds (datetimes); whole minutes overlapping
+                      the window are included
+
+    Returns: (estimated distinct vehicles, samples counted)
+    Unflushed samples (up to sketch_flush_interval old) are not included.
+    """
+    cells = set(cells)
+    if not cells:
+        return 0, 0
+
+    merged = HyperLogLog(_config()['hll_precision'])
+    sample_count = 0
+    for _, _, sketch, count, _, _ in _rows(cells, since, until):
+        merged.merge_bytes(sketch)
+        sample_count += count
+
+    return merged.count(), sample_count
+
+
+def estimate_cells(cells, since, until=None):
+    """
+    Approximate distinct vehicles and average speed per cell during [since, until)
+
+    Same window rules as estimate_distinct_vehicles.
+
+    Returns: {cell: (estimated vehicles, avg_speed_mps)} for cells with data
+    """
+    cells = set(cells)
+    if not cells:
+        return {}
+
+    merged = {}  # cell -> [HyperLogLog, speed_sum, speed_count]
+    for cell_y, cell_x, sketch, _, speed_sum, speed_count in _rows(cells, since, until):
+        cell = merged.get((cell_y, cell_x))
+        if cell is None:
+            cell = merged[(cell_y, cell_x)] = [HyperLogLog(_config()['hll_precision']), 0.0, 0]
+        cell[0].merge_bytes(sketch)
+        cell[1] += speed_sum
+        cell[2] += speed_count
+
+    return {
+        cell: (sketch.count(), speed_sum / speed_count if speed_count else 0)
+        for cell, (sketch, speed_sum, speed_count) in merged.items()
+    }
+
+
+def prune():
+    """Delete sketches older than sketch_retention_hours -> rows deleted"""
+    from Journey.models import CellMinuteSketch
+
+    cutoff = _minute(timezone.now() - timedelta(hours=_config()['sketch_retention_hours']))
+    deleted, _ = CellMinuteSketch.objects.filter(minute__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,198 @@
+"""
+YatriConnect - Telemetry Spool
+Durable local queue (SQLite in WAL mode) between the HTTP accept stage
+and the ingestion worker pool (manage.py run_ingest_workers)
+
+Samples are partitioned by device so each worker owns a fixed set of
+devices and processes every device's samples in arrival order.
+
+Rows that keep failing are retried up to spool_max_attempts times and
+then moved to the dead-letter table (telemetry_spool_dead), so a bad
+sample cannot block its partition; requeue_dead() puts them back.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+_local = threading.local()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS telemetry_spool (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    partition INTEGER NOT NULL,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS telemetry_spool_partition_idx
+    ON telemetry_spool (partition, id);
+CREATE TABLE IF NOT EXISTS telemetry_spool_dead (
+    id INTEGER PRIMARY KEY,
+    partition INTEGER NOT NULL,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    error TEXT NOT NULL,
+    failed_at TEXT NOT NULL
+);
+"""
+
+
+def _connection():
+    """One SQLite connection per thread/process"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        config = settings.TELEMETRY_INGEST_CONFIG
+        path = Path(config['spool_path'])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(path), timeout=30, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f"PRAGMA synchronous={config['spool_synchronous']}")
+        conn.executescript(SCHEMA)
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(telemetry_spool)')}
+        if 'attempts' not in columns:  # Spools created before retry counting
+            conn.execute('ALTER TABLE telemetry_spool ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0')
+        _local.conn = conn
+    return conn
+
+
+def close():
+    """Close this thread's connection (call before forking workers)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+def _encode(value):
+    """JSON fallback for datetimes (full microsecond precision)"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot spool value of type {type(value).__name__}")
+
+
+def partition_for(device_pk):
+    return device_pk % settings.TELEMETRY_INGEST_CONFIG['spool_partitions']
+
+
+def enqueue(samples):
+    """
+    Append validated samples to the spool in one transaction
+
+    Samples without a timestamp are stamped here, at accept time (the
+    model default would stamp them when a worker gets to them).
+
+    Args:
+        samples: List of validated telemetry dicts with `device_id`
+                 and their `device_entry` from the device registry
+    """
+    rows = []
+    for data in samples:
+        data = dict(data)
+        entry = data.pop('device_entry')
+        if not data.get('timestamp'):
+            data['timestamp'] = timezone.now()
+        rows.append((partition_for(entry.device_pk), json.dumps(data, default=_encode)))
+
+    conn = _connection()
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.executemany(
+            'INSERT INTO telemetry_spool (partition, payload) VALUES (?, ?)', rows
+        )
+
+
+def claim(partitions, limit):
+    """
+    Read the oldest spooled samples of the given partitions
+
+    Rows stay in the spool until ack() so a crashed worker's samples
+    are picked up again on restart.
+
+    Returns: List of (spool_id, sample dict with `device_id`)
+    """
+    placeholders = ','.join('?' * len(partitions))
+    rows = _connection().execute(
+        f'SELECT id, payload FROM telemetry_spool WHERE partition IN ({placeholders}) '
+        'ORDER BY id LIMIT ?',
+        [*partitions, limit]
+    ).fetchall()
+
+    claimed = []
+    for spool_id, payload in rows:
+        data = json.loads(payload)
+        if data.get('timestamp'):
+            data['timestamp'] = parse_datetime(data['timestamp'])
+        claimed.append((spool_id, data))
+    return claimed
+
+
+def ack(spool_ids):
+    """Remove processed samples from the spool"""
+    if not spool_ids:
+        return
+    conn = _connection()
+    placeholders = ','.join('?' * len(spool_ids))
+    with conn:
+        conn.execute(f'DELETE FROM telemetry_spool WHERE id IN ({placeholders})', list(spool_ids))
+
+
+def fail(spool_ids, error):
+    """
+    Count a failed attempt for samples that could not be ingested;
+    samples at spool_max_attempts move to the dead-letter table
+
+    Returns: Number of samples dead-lettered
+    """
+    if not spool_ids:
+        return 0
+    max_attempts = settings.TELEMETRY_INGEST_CONFIG['spool_max_attempts']
+    placeholders = ','.join('?' * len(spool_ids))
+    conn = _connection()
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute(
+            f'UPDATE telemetry_spool SET attempts = attempts + 1 WHERE id IN ({placeholders})',
+            list(spool_ids)
+        )
+        dead = conn.execute(
+            'INSERT INTO telemetry_spool_dead (id, partition, payload, attempts, error, failed_at) '
+            f'SELECT id, partition, payload, attempts, ?, ? FROM telemetry_spool '
+            f'WHERE id IN ({placeholders}) AND attempts >= ?',
+            [error, timezone.now().isoformat(), *spool_ids, max_attempts]
+        ).rowcount
+        conn.execute(
+            f'DELETE FROM telemetry_spool WHERE id IN ({placeholders}) AND attempts >= ?',
+            [*spool_ids, max_attempts]
+        )
+    return dead
+
+
+def requeue_dead():
+    """
+    Move dead-lettered samples back into the spool (attempts reset)
+    Returns: Number of samples requeued
+    """
+    conn = _connection()
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        count = conn.execute(
+            'INSERT INTO telemetry_spool (partition, payload) '
+            'SELECT partition, payload FROM telemetry_spool_dead ORDER BY id'
+        ).rowcount
+        conn.execute('DELETE FROM telemetry_spool_dead')
+    return count
+
+
+def dead_depth():
+    """Number of samples in the dead-letter table"""
+    return _connection().execute('SELECT COUNT(*) FROM telemetry_spool_dead').fetchone()[0]
+
+
+def depth():
+    """Number of samples waiting in the spool"""
+    return _connection().execute('SELECT COUNT(*) FROM telemetry_spool').fetchone()[0]
@@ -0,0 +1,449 @@
+"""
+YatriConnect - Live Location Streaming
+Push position deltas to map clients instead of polling
+GET /api/navigate/live-locations/
+
+Transports (ASGI only - see yatri_backend/asgi.py):
+- Server-Sent Events: GET /api/navigate/live-locations/stream/
+- WebSocket:          ws://<host>/ws/live-locations/
+
+Off by default: set LIVE_STREAM_ENABLED=1 where an ASGI server runs the
+stream endpoints, so WSGI-only deployments do not publish to Redis on
+every ingest.
+
+Fan-out:
+Ingestion publishes each batch's new positions to Redis pub/sub, once
+per (vehicle type, tile) channel and once per vehicle channel. Every
+ASGI process keeps ONE Redis subscription per channel (StreamHub) and
+hands messages to the local clients interested in it, so clients with
+the same role and viewport tiles share a subscription.
+
+Channels:
+    live:type:<vehicle_type>:<tx>:<ty>   viewport subscriptions
+    live:vehicle:<vehicle_pk>            vehicle-set subscriptions and
+                                         owners' own non-public vehicles
+"""
+
+import asyncio
+import json
+import logging
+import math
+from collections import defaultdict
+from datetime import timedelta
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from navigate import live_index
+
+
+logger = logging.getLogger(__name__)
+
+_publisher = None
+
+
+def _config():
+    return settings.LIVE_STREAM_CONFIG
+
+
+def _tile(latitude, longitude):
+    size = _config()['tile_degrees']
+    return math.floor(longitude / size), math.floor(latitude / size)
+
+
+def _type_channel(vehicle_type, tile):
+    return f"live:type:{vehicle_type}:{tile[0]}:{tile[1]}"
+
+
+def _vehicle_channel(vehicle_pk):
+    return f"live:vehicle:{vehicle_pk}"
+
+
+# ============================================================
+# PUBLISHING (ingest side, sync)
+# ============================================================
+
+def publish_positions(telemetry_list, devices):
+    """
+    Publish the newest position of each vehicle in a batch
+
+    Args:
+        telemetry_list: Stored Telemetry instances
+        devices: {device_pk: DeviceEntry}
+
+    One pipelined round trip per batch; Redis errors are logged and
+    never fail ingestion.
+    """
+    global _publisher
+
+    config = _config()
+    if not config['enabled'] or not telemetry_list:
+        return
+
+    newest = {}
+    for telemetry in telemetry_list:
+        entry = devices[telemetry.device_id]
+        current = newest.get(entry.vehicle_pk)
+        if current is None or telemetry.timestamp > current[1].timestamp:
+            newest[entry.vehicle_pk] = (entry, telemetry)
+
+    by_channel = defaultdict(list)
+    for vehicle_pk, (entry, telemetry) in newest.items():
+        data = live_index.build_position(
+            entry.vehicle_pk, entry.owner_id, entry.vehicle_type, entry.vehicle_id,
+            entry.device_id, telemetry.timestamp, telemetry.latitude, telemetry.longitude,
+            telemetry.speed, telemetry.heading
+        ).data
+        tile = _tile(telemetry.latitude, telemetry.longitude)
+        by_channel[_type_channel(entry.vehicle_type, tile)].append(data)
+        by_channel[_vehicle_channel(vehicle_pk)].append(data)
+
+    try:
+        if _publisher is None:
+            import redis
+            _publisher = redis.Redis.from_url(
+                config['redis_url'], socket_timeout=1, socket_connect_timeout=1
+            )
+        pipe = _publisher.pipeline(transaction=False)
+        for channel, positions in by_channel.items():
+            pipe.publish(channel, json.dumps(positions))
+        pipe.execute()
+    except Exception as exc:
+        logger.warning("Live position publish failed for %s vehicles: %s", len(newest), exc)
+
+
+# ============================================================
+# PER-PROCESS SUBSCRIPTION HUB (async)
+# ============================================================
+
+class StreamHub:
+    """One Redis pub/sub connection shared by every client of this process"""
+
+    def __init__(self, redis_url):
+        import redis.asyncio as aioredis
+        self.redis = aioredis.Redis.from_url(redis_url)
+        self.pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self.listeners = defaultdict(set)  # channel -> {asyncio.Queue}
+        self.lock = asyncio.Lock()
+        self.reader = None
+
+    async def subscribe(self, queue, channels):
+        async with self.lock:
+            new = [channel for channel in channels if not self.listeners[channel]]
+            for channel in channels:
+                self.listeners[channel].add(queue)
+            if new:
+                await self.pubsub.subscribe(*new)
+            if self.reader is None or self.reader.done():
+                self.reader = asyncio.ensure_future(self._read())
+
+    async def unsubscribe(self, queue, channels):
+        async with self.lock:
+            unused = []
+            for channel in channels:
+                listeners = self.listeners.get(channel)
+                if listeners is None:
+                    continue
+                listeners.discard(queue)
+                if not listeners:
+                    del self.listeners[channel]
+                    unused.append(channel)
+            if unused:
+                await self.pubsub.unsubscribe(*unused)
+
+    async def _read(self):
+        while self.listeners:
+            try:
+                message = await self.pubsub.get_message(timeout=1.0)
+            except Exception:
+                logger.exception("Live position subscription failed")
+                await asyncio.sleep(1)
+                continue
+            if not message or message['type'] != 'message':
+                continue
+            channel = message['channel'].decode()
+            positions = json.loads(message['data'])
+            for queue in list(self.listeners.get(channel, ())):
+                try:
+                    queue.put_nowait(positions)
+                except asyncio.QueueFull:
+                    pass  # Slow client: drop deltas, the next one supersedes them
+
+
+_hubs = {}
+
+
+def get_hub():
+    """The hub of the running event loop"""
+    loop = asyncio.get_running_loop()
+    hub = _hubs.get(loop)
+    if hub is None:
+        hub = _hubs[loop] = StreamHub(_config()['redis_url'])
+    return hub
+
+
+# ============================================================
+# CLIENT SUBSCRIPTION
+# ============================================================
+
+def _authenticate(raw_token):
+    """User for a JWT access token (None if invalid)"""
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.exceptions import InvalidToken, AuthenticationFailed
+
+    authentication = JWTAuthentication()
+    try:
+        return authentication.get_user(authentication.get_validated_token(raw_token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def _parse_bbox(value):
+    min_lon, min_lat, max_lon, max_lat = (float(part) for part in value.split(','))
+    if min_lat > max_lat or min_lon > max_lon:
+        raise ValueError("Invalid bbox")
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def _parse_vehicles(value):
+    """Vehicle ids from "V1,V2" or ["V1", "V2"]"""
+    if isinstance(value, str):
+        value = value.split(',')
+    elif not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ValueError("vehicles must be a list of vehicle ids or a comma-separated string")
+    return [item for item in value if item]
+
+
+class LiveSubscription:
+    """
+    What one client watches: a viewport (bbox) or a set of vehicles
+
+    configure() resolves the channels for the user's role and returns
+    the current positions as the initial snapshot; accept() filters
+    incoming deltas down to what the client asked for.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.channels = []
+        self.bbox = None
+        self.vehicle_pks = None
+
+    def _resolve(self, bbox=None, vehicle_ids=None):
+        """Sync part of configure(): access checks and snapshot"""
+        from Devices.models import Vehicle
+
+        config = _config()
+        since = timezone.now() - timedelta(minutes=config['live_minutes'])
+
+        if vehicle_ids is not None:
+            vehicles = [
+                vehicle for vehicle in Vehicle.objects.filter(vehicle_id__in=vehicle_ids[:config['max_vehicles']])
+                if vehicle.can_be_viewed_by(self.user)
+            ]
+            vehicle_pks = {vehicle.pk for vehicle in vehicles}
+            channels = [_vehicle_channel(vehicle_pk) for vehicle_pk in vehicle_pks]
+            snapshot = live_index.query_vehicles(vehicle_pks, since)
+            return channels, None, vehicle_pks, snapshot
+
+        min_lat, min_lon, max_lat, max_lon = bbox
+        min_tile = _tile(min_lat, min_lon)
+        max_tile = _tile(max_lat, max_lon)
+        tiles = [
+            (tx, ty)
+            for tx in range(min_tile[0], max_tile[0] + 1)
+            for ty in range(min_tile[1], max_tile[1] + 1)
+        ]
+        if len(tiles) > config['max_tiles']:
+            raise ValueError("Viewport too large - zoom in")
+
+        classes, owner_id = live_index.visibility_for(self.user)
+        if classes is None:
+            classes = Vehicle.VehicleType.values
+        channels = [_type_channel(vehicle_type, tile) for vehicle_type in classes for tile in tiles]
+        if owner_id is not None:
+            own = Vehicle.objects.filter(owner_id=owner_id).exclude(
+                vehicle_type__in=classes
+            ).values_list('pk', flat=True)
+            channels.extend(_vehicle_channel(vehicle_pk) for vehicle_pk in own)
+
+        snapshot = live_index.query_bbox(self.user, min_lat, min_lon, max_lat, max_lon, since)
+        return channels, bbox, None, snapshot
+
+    async def configure(self, queue, bbox=None, vehicle_ids=None):
+        """(Re)subscribe; returns the snapshot of current positions"""
+        channels, self.bbox, self.vehicle_pks, snapshot = await sync_to_async(self._resolve)(
+            bbox, vehicle_ids
+        )
+        hub = get_hub()
+        await hub.unsubscribe(queue, [channel for channel in self.channels if channel not in channels])
+        await hub.subscribe(queue, channels)
+        self.channels = channels
+        return snapshot
+
+    async def close(self, queue):
+        if self.channels:
+            await get_hub().unsubscribe(queue, self.channels)
+            self.channels = []
+
+    def accept(self, positions):
+        """Deltas inside the viewport (tiles are coarser than the bbox)"""
+        if self.bbox is None:
+            return positions
+        min_lat, min_lon, max_lat, max_lon = self.bbox
+        return [
+            data for data in positions
+            if min_lat <= data['latitude'] <= max_lat and min_lon <= data['longitude'] <= max_lon
+        ]
+
+
+def _new_queue():
+    return asyncio.Queue(maxsize=_config()['client_queue_size'])
+
+
+# ============================================================
+# SERVER-SENT EVENTS
+# ============================================================
+
+async def live_location_stream(request):
+    """
+    Stream Live Locations (Server-Sent Events)
+
+    GET /api/navigate/live-locations/stream/?bbox=min_lon,min_lat,max_lon,max_lat
+    GET /api/navigate/live-locations/stream/?vehicles=V1,V2
+
+    Auth: Authorization: Bearer <access token>, or ?token=<access token>
+    (browsers' EventSource cannot set headers)
+
+    Events:
+    - snapshot:  [positions] currently visible, sent once
+    - positions: [positions] deltas as telemetry is ingested
+    - keep-alive comments every keepalive_interval seconds
+
+    Positions have the same fields as GET /api/navigate/live-locations/.
+    Requires an ASGI server (e.g. uvicorn/daphne yatri_backend.asgi:application)
+    and LIVE_STREAM_CONFIG['enabled'] (LIVE_STREAM_ENABLED=1); 503 otherwise.
+    """
+    from django.http import JsonResponse, StreamingHttpResponse
+
+    if not _config()['enabled']:
+        return JsonResponse({'success': False, 'error': 'Live location streaming is disabled'}, status=503)
+
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    raw_token = header[7:] if header.startswith('Bearer ') else request.GET.get('token')
+    user = await sync_to_async(_authenticate)(raw_token) if raw_token else None
+    if user is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    subscription = LiveSubscription(user)
+    queue = _new_queue()
+    try:
+        if 'vehicles' in request.GET:
+            snapshot = await subscription.configure(queue, vehicle_ids=_parse_vehicles(request.GET['vehicles']))
+        else:
+            snapshot = await subscription.configure(queue, bbox=_parse_bbox(request.GET['bbox']))
+    except (KeyError, ValueError) as exc:
+        await subscription.close(queue)
+        return JsonResponse(
+            {'success': False, 'error': f"Use bbox=min_lon,min_lat,max_lon,max_lat or vehicles=ID,... ({exc})"},
+            status=400
+        )
+
+    keepalive = _config()['keepalive_interval']
+
+    async def events():
+        try:
+            yield f"event: snapshot\ndata: {json.dumps(snapshot)}\n\n"
+            while True:
+                try:
+                    positions = await asyncio.wait_for(queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                positions = subscription.accept(positions)
+                if positions:
+                    yield f"event: positions\ndata: {json.dumps(positions)}\n\n"
+        finally:
+            await subscription.close(queue)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
+
+
+# ============================================================
+# WEBSOCKET (raw ASGI, routed from yatri_backend/asgi.py)
+# ============================================================
+
+async def websocket_application(scope, receive, send):
+    """
+    ws://<host>/ws/live-locations/?token=<access token>
+
+    Client -> server (any time, replaces the previous subscription):
+        {"bbox": [min_lon, min_lat, max_lon, max_lat]}
+        {"vehicles": ["V1", "V2"]}      (or "V1,V2")
+    Server -> client:
+        {"type": "snapshot",  "positions": [...]}
+        {"type": "positions", "positions": [...]}
+        {"type": "error",     "message": "..."}
+    """
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    if not _config()['enabled']:
+        await send({'type': 'websocket.close', 'code': 4503})
+        return
+
+    query = parse_qs(scope.get('query_string', b'').decode())
+    raw_token = query.get('token', [None])[0]
+    user = await sync_to_async(_authenticate)(raw_token) if raw_token else None
+    if user is None:
+        await send({'type': 'websocket.close', 'code': 4401})
+        return
+
+    await send({'type': 'websocket.accept'})
+
+    subscription = LiveSubscription(user)
+    queue = _new_queue()
+    receiving = asyncio.ensure_future(receive())
+
+    async def send_json(data):
+        await send({'type': 'websocket.send', 'text': json.dumps(data)})
+
+    try:
+        while True:
+            getting = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait({receiving, getting}, return_when=asyncio.FIRST_COMPLETED)
+
+            if getting in done:
+                positions = subscription.accept(getting.result())
+                if positions:
+                    await send_json({'type': 'positions', 'positions': positions})
+            else:
+                getting.cancel()
+
+            if receiving in done:
+                message = receiving.result()
+                if message['type'] == 'websocket.disconnect':
+                    break
+                receiving = asyncio.ensure_future(receive())
+                try:
+                    request = json.loads(message.get('text') or '{}')
+                    if 'vehicles' in request:
+                        snapshot = await subscription.configure(
+                            queue, vehicle_ids=_parse_vehicles(request['vehicles'])
+                        )
+                    else:
+                        snapshot = await subscription.configure(
+                            queue, bbox=_parse_bbox(','.join(str(value) for value in request['bbox']))
+                        )
+                except (KeyError, TypeError, ValueError) as exc:
+                    await send_json({'type': 'error', 'message': f"Send bbox or vehicles ({exc})"})
+                    continue
+                await send_json({'type': 'snapshot', 'positions': snapshot})
+    finally:
+        receiving.cancel()
+        await subscription.close(queue)
@@ -0,0 +1,655 @@
+import threading
+import time
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from Devices.models import Device, User, Vehicle
+from Journey.models import CellMinuteSketch, Congestion
+from Devices import registry
+from Devices.registry import DeviceEntry
+from Journey import active_journeys
+from navigate import congestion, ingestion, live_index, rollups, sample_buffer, segments, sketches, streaming
+from navigate.hll import DENSE, SPARSE, HyperLogLog
+from navigate.sample_buffer import extend_locks, lock_buffers, unlock_buffers
+from sensorData.models import (
+    Telemetry, TelemetryHourRollup, TelemetryMinuteRollup, VehicleLastPosition
+)
+
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'navigate-tests'}}
+
+
+def ingest_config(**overrides):
+    return {**settings.TELEMETRY_INGEST_CONFIG, **overrides}
+
+
+def make_device(device_id='DEV001', vehicle_id='VEH001', vehicle_type='public'):
+    vehicle = Vehicle.objects.create(vehicle_id=vehicle_id, vehicle_type=vehicle_type)
+    return Device.objects.create(device_id=device_id, vehicle=vehicle)
+
+
+def make_sample(device_id, when, **overrides):
+    sample = {
+        'device_id': device_id,
+        'timestamp': when.isoformat(),
+        'latitude': 28.61,
+        'longitude': 77.21,
+        'speed': 10.0,
+        'heading': 90,
+        'accel_x': 0.1,
+        'accel_y': 0.1,
+        'accel_z': 9.8,
+    }
+    sample.update(overrides)
+    return sample
+
+
+def run_in_thread(target, *args):
+    """Start target in a daemon thread -> (thread, result dict)"""
+    result = {}
+
+    def run():
+        result['value'] = target(*args)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread, result
+
+
+# ============================================================
+# SAMPLE BUFFER LOCKS
+# ============================================================
+@override_settings(CACHES=LOCMEM_CACHE, TELEMETRY_INGEST_CONFIG=ingest_config(sample_buffer_lock_timeout=30))
+class SampleBufferLockTests(SimpleTestCase):
+    """Per-device buffer locks (navigate/sample_buffer.py)"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_waiter_holds_no_lock_above_the_busy_device(self):
+        first = lock_buffers([1])
+        waiter, waited = run_in_thread(lock_buffers, [2, 1])
+        time.sleep(0.05)
+
+        # The waiter is blocked on device 1, so device 2 must still be free
+        other, taken = run_in_thread(lock_buffers, [2])
+        other.join(1)
+        self.assertFalse(other.is_alive(), "device 2 held by a batch waiting for device 1")
+        self.assertTrue(waiter.is_alive())
+
+        unlock_buffers([1], first)
+        unlock_buffers([2], taken['value'])
+        waiter.join(1)
+        self.assertFalse(waiter.is_alive())
+        self.assertEqual(extend_locks([1, 2], waited['value']), {1, 2})
+
+    def test_overlapping_batches_do_not_deadlock(self):
+        inside = {1: 0, 2: 0}
+        overlaps = []
+
+        def batch(device_pks):
+            for _ in range(30):
+                token = lock_buffers(device_pks)
+                for device_pk in device_pks:
+                    inside[device_pk] += 1
+                    if inside[device_pk] > 1:
+                        overlaps.append(device_pk)
+                time.sleep(0.001)
+                for device_pk in device_pks:
+                    inside[device_pk] -= 1
+                unlock_buffers(device_pks, token)
+            return True
+
+        threads = [run_in_thread(batch, [1, 2])[0], run_in_thread(batch, [2, 1])[0]]
+        for thread in threads:
+            thread.join(10)
+
+        self.assertFalse(any(thread.is_alive() for thread in threads), "batches deadlocked")
+        self.assertEqual(overlaps, [])
+
+    def test_extend_locks_reports_lost_locks(self):
+        token = lock_buffers([1, 2])
+        cache.delete('telemetry_buffer_lock_2')  # expired ...
+        other = lock_buffers([2])                 # ... and taken by another writer
+
+        self.assertEqual(extend_locks([1, 2], token), {1})
+
+        unlock_buffers([1, 2], token)
+        self.assertEqual(extend_locks([2], other), {2})
+
+
+# ============================================================
+# INGESTION PIPELINE
+# ============================================================
+@override_settings(CACHES=LOCMEM_CACHE)
+@mock.patch('navigate.background.schedule')
+class IngestTestCase(TestCase):
+    """Runs ingest_samples on validated samples of one device"""
+
+    def setUp(self):
+        cache.clear()
+        registry._local_entries.clear()
+        active_journeys._local_entries.clear()
+        sample_buffer._local_held.clear()
+        self.device = make_device()
+        self.start = timezone.now().replace(microsecond=0) - timedelta(minutes=10)
+
+    def ingest(self, *seconds, **values):
+        """Ingest one batch of samples `seconds` after self.start -> results"""
+        entry = registry.get_device_entries([self.device.device_id])[self.device.device_id]
+        samples = [
+            {
+                'timestamp': self.start + timedelta(seconds=offset),
+                'latitude': 28.61,
+                'longitude': 77.21,
+                'speed': 10.0,
+                'accel_x': 0.1,
+                'accel_y': 0.1,
+                'accel_z': 9.8,
+                'device_entry': entry,
+                **values,
+            }
+            for offset in seconds
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            return ingestion.ingest_samples(samples)
+
+    def stored_seconds(self):
+        return [
+            int((timestamp - self.start).total_seconds())
+            for timestamp in Telemetry.objects.filter(device=self.device)
+            .order_by('timestamp').values_list('timestamp', flat=True)
+        ]
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+@mock.patch('navigate.background.schedule')
+class IngestDuplicateTests(IngestTestCase):
+    """Retransmission handling of ingest_samples (navigate/ingestion.py)"""
+
+    def test_duplicates_within_a_batch(self, schedule):
+        results = self.ingest(0, 0, 1)
+
+        self.assertEqual([result['duplicate'] for result in results], [False, True, False])
+        self.assertEqual(self.stored_seconds(), [0, 1])
+
+    def test_retransmission_in_buffer_is_not_inserted(self, schedule):
+        self.ingest(0, 1)
+
+        with mock.patch.object(ingestion, '_insert_telemetry', wraps=ingestion._insert_telemetry) as insert:
+            results = self.ingest(1, 2)
+
+        self.assertEqual([result['duplicate'] for result in results], [True, False])
+        inserted = insert.call_args.args[0]
+        self.assertEqual([telemetry.timestamp for telemetry in inserted], [self.start + timedelta(seconds=2)])
+        self.assertEqual(self.stored_seconds(), [0, 1, 2])
+
+    @override_settings(TELEMETRY_INGEST_CONFIG=ingest_config(sample_buffer_size=2))
+    def test_duplicate_older_than_buffer_found_by_constraint(self, schedule):
+        self.ingest(0, 1, 2)  # the buffer keeps 1 and 2
+
+        with mock.patch.object(Telemetry.objects, 'bulk_create', wraps=Telemetry.objects.bulk_create) as insert:
+            results = self.ingest(0, 3)
+
+        self.assertEqual([result['duplicate'] for result in results], [True, False])
+        # Bulk insert hit the constraint, then one insert per row
+        self.assertEqual([len(call.args[0]) for call in insert.call_args_list], [2, 1, 1])
+        self.assertEqual(self.stored_seconds(), [0, 1, 2, 3])
+
+    def test_duplicate_of_a_cold_buffer_found_by_the_reload(self, schedule):
+        self.ingest(0, 1)
+        cache.clear()  # buffer expired: reloaded from the database
+
+        results = self.ingest(1, 2)
+
+        self.assertEqual([result['duplicate'] for result in results], [True, False])
+        self.assertEqual(self.stored_seconds(), [0, 1, 2])
+
+
+@override_settings(CACHES=LOCMEM_CACHE, TELEMETRY_INGEST_CONFIG=ingest_config(reorder_lateness_seconds=30))
+@mock.patch('navigate.background.schedule')
+class IngestReorderTests(IngestTestCase):
+    """Reorder buffer and watermark release of ingest_samples (navigate/ingestion.py)"""
+
+    def detected(self, function, *args):
+        """Run function -> (its result, seconds of the samples run through detection, in order)"""
+        with mock.patch.object(ingestion, '_detect', wraps=ingestion._detect) as detect:
+            result = function(*args)
+        return result, [
+            int((call.args[0].timestamp - self.start).total_seconds()) for call in detect.call_args_list
+        ]
+
+    def test_samples_held_until_the_watermark_passes(self, schedule):
+        # self.start is 10 minutes ago: the watermark is now - 30 s ~ 570
+        results, detected = self.detected(self.ingest, 590, 540)
+        self.assertEqual(detected, [540])
+        self.assertEqual([result['late'] for result in results], [False, False])
+
+        # Behind the released sample: late (stored, no detection); 585 is held
+        results, detected = self.detected(self.ingest, 530, 585)
+        self.assertEqual(detected, [])
+        self.assertEqual([result['late'] for result in results], [True, False])
+        self.assertEqual(self.stored_seconds(), [530, 540, 585, 590])
+
+        # Nothing due yet
+        self.assertEqual(ingestion.release_held_samples(), 0)
+
+        # The device went quiet: released by time, in timestamp order
+        with mock.patch('django.utils.timezone.now', return_value=timezone.now() + timedelta(seconds=60)):
+            released, detected = self.detected(ingestion.release_held_samples)
+        self.assertEqual(released, 2)
+        self.assertEqual(detected, [585, 590])
+        self.assertEqual(sample_buffer.due_devices(timezone.now().timestamp() + 3600), [])
+
+    def test_newer_sample_releases_held_ones(self, schedule):
+        self.ingest(590)
+
+        # A sample 40 s newer moves the watermark past 590
+        _, detected = self.detected(self.ingest, 640)
+
+        self.assertEqual(detected, [590])
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+@mock.patch('navigate.background.schedule')
+class IngestSideEffectTests(TestCase):
+    """Post-commit side effects of ingest_samples (navigate/ingestion.py)"""
+
+    def setUp(self):
+        cache.clear()
+        self.device = make_device()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', 'admin@example.com', 'pw', role='admin'))
+
+    def test_failing_side_effect_does_not_fail_the_request(self, schedule):
+        with mock.patch('navigate.ingestion.sketches.record_samples', side_effect=RuntimeError('down')), \
+                self.assertLogs('navigate.ingestion', 'ERROR') as logs, \
+                self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                '/api/navigate/telemetry/batch/',
+                {'samples': [make_sample('DEV001', timezone.now() - timedelta(seconds=i)) for i in range(3)]},
+                format='json'
+            )
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Telemetry.objects.filter(device=self.device).count(), 3)
+        self.assertIn('Post-commit sketches failed', logs.output[0])
+        # Steps after the failing one still ran
+        schedule.assert_called()
+
+
+# ============================================================
+# LIVE POSITION INDEX
+# ============================================================
+class LiveIndexRebuildTests(TestCase):
+    """Process-wide live position index (navigate/live_index.py)"""
+
+    def setUp(self):
+        live_index._index = None
+        self.addCleanup(setattr, live_index, '_index', None)
+        self.device = make_device()
+        self.now = timezone.now()
+        VehicleLastPosition.objects.create(
+            vehicle=self.device.vehicle, device=self.device,
+            timestamp=self.now - timedelta(seconds=30), latitude=28.61, longitude=77.21
+        )
+        self.entry = DeviceEntry(
+            self.device.pk, self.device.vehicle.pk, 'VEH001', 'public', None, 'DEV001'
+        )
+
+    def test_rebuild_does_not_block_queries_and_keeps_recorded_positions(self):
+        live_index.get_index()
+        moved = Telemetry(device=self.device, timestamp=self.now, latitude=28.70, longitude=77.30)
+        load = live_index._load
+        during = {}
+
+        def slow_load(index, updated_after=None):
+            if updated_after is None:
+                # Mid-rebuild: a query and an ingest batch must not wait for the lock
+                query, during['query'] = run_in_thread(
+                    live_index.query_vehicles, [self.device.vehicle.pk], self.now - timedelta(minutes=1)
+                )
+                ingest, _ = run_in_thread(
+                    live_index.record_positions, [moved], {self.device.pk: self.entry}
+                )
+                query.join(1)
+                ingest.join(1)
+                during['blocked'] = query.is_alive() or ingest.is_alive()
+            load(index, updated_after)
+
+        with mock.patch.object(live_index, '_load', slow_load), \
+                override_settings(LIVE_LOCATION_CONFIG={**settings.LIVE_LOCATION_CONFIG, 'rebuild_interval': 0}):
+            index = live_index.get_index()
+
+        self.assertFalse(during['blocked'])
+        self.assertEqual(during['query']['value'][0]['latitude'], 28.61)
+        # The position recorded during the build was replayed onto the new index
+        self.assertIs(live_index._index, index)
+        self.assertEqual(index.positions[self.device.vehicle.pk].latitude, 28.70)
+        self.assertIsNone(live_index._rebuilding)
+
+
+# ============================================================
+# LIVE LOCATION DELTAS
+# ============================================================
+@override_settings(CACHES=LOCMEM_CACHE)
+class LiveLocationDeltaTests(TestCase):
+    """since-cursor responses of get_live_locations (navigate/views.py)"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', 'admin@example.com', 'pw', role='admin'))
+        self.now = timezone.now()
+
+    def place(self, vehicle_id, age, updated_age=None):
+        """Last position `age` seconds old, written `updated_age` seconds ago"""
+        device = make_device(f'DEV-{vehicle_id}', vehicle_id)
+        VehicleLastPosition.objects.create(
+            vehicle=device.vehicle, device=device,
+            timestamp=self.now - timedelta(seconds=age), latitude=28.61, longitude=77.21
+        )
+        VehicleLastPosition.objects.filter(vehicle=device.vehicle).update(
+            updated_at=self.now - timedelta(seconds=age if updated_age is None else updated_age)
+        )
+
+    def delta(self, since='', **params):
+        response = self.client.get('/api/navigate/live-locations/', {'since': since, **params})
+        self.assertEqual(response.status_code, 200)
+        data = response.json()['data']
+        return sorted(position['vehicle_id'] for position in data['positions']), data['removed'], data['cursor']
+
+    def test_first_call_is_a_snapshot(self):
+        self.assertEqual(self.delta(), ([], [], ''))
+
+        self.place('V1', 60)
+        self.place('V2', 30)
+        self.place('OLD', 3600)
+        vehicles, removed, cursor = self.delta()
+
+        self.assertEqual((vehicles, removed), (['V1', 'V2'], []))
+        # Cursor = newest returned row, not the request time
+        updated_at = VehicleLastPosition.objects.get(vehicle__vehicle_id='V2').updated_at
+        self.assertEqual(int(cursor), int(updated_at.timestamp() * 1_000_000))
+
+    def test_late_commits_are_delivered(self):
+        self.place('V1', 60)
+        _, _, cursor = self.delta()
+
+        # Committed after the first call, written just before its newest row
+        self.place('LATE', 120, updated_age=61)
+        self.place('V2', 5)
+        vehicles, _, next_cursor = self.delta(cursor)
+
+        # V1 repeats (re-read overlap before the cursor)
+        self.assertEqual(vehicles, ['LATE', 'V1', 'V2'])
+        self.assertGreater(int(next_cursor), int(cursor))
+        # Nothing new: the cursor stays put
+        self.assertEqual(self.delta(next_cursor)[2], next_cursor)
+
+    def test_aged_out_vehicles_are_removed(self):
+        # Inside the 5 minute window at the cursor (V1, 10 s ago), outside it now
+        self.place('GONE', 5 * 60 + 5, updated_age=20)
+        self.place('V1', 10)
+        _, _, cursor = self.delta()
+
+        vehicles, removed, _ = self.delta(cursor)
+
+        self.assertEqual((vehicles, removed), (['V1'], ['GONE']))
+
+    def test_bad_cursor_and_area_rejected(self):
+        for params in ({'since': 'abc'}, {'since': str(-10 ** 18)}, {'since': '', 'bbox': '77,28,78,29'}):
+            response = self.client.get('/api/navigate/live-locations/', params)
+            self.assertEqual(response.status_code, 400, params)
+
+
+# ============================================================
+# LIVE STREAMING
+# ============================================================
+class StreamSubscriptionParsingTests(SimpleTestCase):
+    """Subscription requests of the SSE/WebSocket streams (navigate/streaming.py)"""
+
+    def test_vehicles_from_list_or_comma_separated_string(self):
+        self.assertEqual(streaming._parse_vehicles(['V1', 'V2']), ['V1', 'V2'])
+        self.assertEqual(streaming._parse_vehicles('V1,V2,'), ['V1', 'V2'])
+
+    def test_other_vehicle_types_rejected(self):
+        for value in (12, {'id': 'V1'}, [1, 2], None):
+            with self.assertRaises(ValueError):
+                streaming._parse_vehicles(value)
+
+
+# ============================================================
+# TELEMETRY ROLLUPS
+# ============================================================
+def make_telemetry(device, start, count, step=5, **overrides):
+    """Unsaved samples every `step` seconds moving north (~11 m per sample)"""
+    samples = []
+    for index in range(count):
+        values = {
+            'device': device,
+            'timestamp': start + timedelta(seconds=index * step),
+            'latitude': 28.61 + index * 0.0001,
+            'longitude': 77.21,
+            'speed': 5.0 + index % 7,
+            'accel_x': 6.0 if index % 11 == 3 else 0.1,
+            'accel_y': 0.1,
+        }
+        values.update(overrides)
+        samples.append(Telemetry(**values))
+    return samples
+
+
+def rollup_values(model):
+    rows = model.objects.order_by('device_id', 'bucket')
+    return [
+        [row.bucket, *(round(value, 6) if isinstance(value, float) else value
+                       for value in (getattr(row, field) for field in rollups.VALUE_FIELDS))]
+        for row in rows
+    ]
+
+
+@mock.patch('navigate.background.schedule')
+class TelemetryRollupTests(TestCase):
+    """Minute/hour aggregates (navigate/rollups.py)"""
+
+    def setUp(self):
+        rollups._pending.clear()
+        self.device = make_device()
+        # Closed hours: two hours ending well before the open cutoff
+        self.start = rollups.hour_bucket(timezone.now()) - timedelta(hours=3)
+
+    def aggregate(self, samples):
+        pending = {}
+        for sample in samples:
+            rollups._add_sample(
+                pending, TelemetryMinuteRollup, self.device.pk, rollups.minute_bucket(self.start),
+                sample.timestamp, sample.latitude, sample.longitude, sample.speed,
+                sample.accel_x, sample.accel_y
+            )
+        return next(iter(pending.values()))
+
+    def test_merge_joins_consecutive_aggregates(self, schedule):
+        samples = make_telemetry(self.device, self.start, 12)
+        whole = self.aggregate(samples)
+
+        for first, second in ((samples[:5], samples[5:]), (samples[5:], samples[:5])):
+            merged = rollups._merge(self.aggregate(first), self.aggregate(second))
+            for field in rollups.VALUE_FIELDS:
+                expected = getattr(whole, field)
+                if isinstance(expected, float):
+                    self.assertAlmostEqual(getattr(merged, field), expected, places=6, msg=field)
+                else:
+                    self.assertEqual(getattr(merged, field), expected, msg=field)
+
+        self.assertEqual(whole.harsh_count, 1)
+        self.assertAlmostEqual(whole.distance, 11 * 11.13, delta=1)
+
+    def test_gap_adds_no_distance(self, schedule):
+        first = self.aggregate(make_telemetry(self.device, self.start, 2))
+        later = self.start + timedelta(seconds=settings.TELEMETRY_ROLLUP_CONFIG['max_gap_seconds'] + 60)
+        second = self.aggregate(make_telemetry(self.device, later, 2, latitude=28.7))
+
+        merged = rollups._merge(first, second)
+        self.assertAlmostEqual(merged.distance, first.distance + second.distance)
+
+    def test_failed_flush_keeps_aggregates(self, schedule):
+        samples = make_telemetry(self.device, self.start, 10)
+        rollups.record_samples(samples[:6])
+
+        with mock.patch.object(rollups, '_merge_into', side_effect=DatabaseError('down')):
+            with self.assertRaises(DatabaseError):
+                rollups.flush()
+
+        rollups.record_samples(samples[6:])
+        rollups.flush()
+
+        self.assertEqual(
+            list(TelemetryMinuteRollup.objects.values_list('sample_count', flat=True)),
+            [10]
+        )
+        self.assertEqual(TelemetryHourRollup.objects.get().sample_count, 10)
+
+    def test_rebuild_matches_ingest(self, schedule):
+        samples = make_telemetry(self.device, self.start + timedelta(minutes=50), 300, step=3)
+        Telemetry.objects.bulk_create(samples)
+        for offset in range(0, len(samples), 40):
+            rollups.record_samples(samples[offset:offset + 40])
+            rollups.flush()
+        ingested = (rollup_values(TelemetryMinuteRollup), rollup_values(TelemetryHourRollup))
+
+        counts = rollups.rebuild(self.start, self.start + timedelta(hours=2))
+
+        self.assertEqual(counts, (300, len(ingested[0]), 2))
+        self.assertEqual((rollup_values(TelemetryMinuteRollup), rollup_values(TelemetryHourRollup)), ingested)
+
+    def test_rebuild_refuses_open_hours(self, schedule):
+        with self.assertRaises(ValueError):
+            rollups.rebuild(self.start, rollups.hour_bucket(timezone.now()) + timedelta(hours=1))
+
+
+# ============================================================
+# DISTINCT VEHICLE SKETCHES
+# ============================================================
+def sketch_of(values, precision=12):
+    sketch = HyperLogLog(precision)
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+
+class HyperLogLogTests(SimpleTestCase):
+    """Mergeable distinct counter (navigate/hll.py)"""
+
+    def test_small_counts_are_exact(self):
+        for distinct in (0, 1, 5, 50):
+            self.assertEqual(sketch_of(list(range(distinct)) * 3).count(), distinct)
+
+    def test_large_count_within_error(self):
+        self.assertAlmostEqual(sketch_of(range(20000)).count(), 20000, delta=20000 * 0.05)
+
+    def test_merge_counts_the_union(self):
+        first, second = sketch_of(range(3000)), sketch_of(range(2000, 5000))
+        union = sketch_of(range(5000))
+
+        merged = HyperLogLog(12).merge(first).merge(second)
+        from_bytes = HyperLogLog(12).merge_bytes(first.to_bytes()).merge_bytes(second.to_bytes())
+
+        self.assertEqual(merged.registers, union.registers)
+        self.assertEqual(from_bytes.registers, union.registers)
+        with self.assertRaises(ValueError):
+            merged.merge(HyperLogLog(10))
+
+    def test_serialization_round_trip(self):
+        for values, fmt in ((range(5), SPARSE), (range(20000), DENSE)):
+            sketch = sketch_of(values)
+            data = sketch.to_bytes()
+            self.assertEqual(data[1], fmt)
+            self.assertEqual(HyperLogLog.from_bytes(data).registers, sketch.registers)
+        self.assertLess(len(sketch_of(range(5)).to_bytes()), 20)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+@mock.patch('navigate.background.schedule')
+class CellSketchTests(TestCase):
+    """Per (cell, minute) sketches (navigate/sketches.py) and congestion snapshots"""
+
+    def setUp(self):
+        cache.clear()
+        sketches._pending.clear()
+        self.now = timezone.now()
+        self.devices = {}
+        for index in range(1, 5):
+            device = make_device(f'DEV00{index}', f'VEH00{index}')
+            self.devices[device.pk] = DeviceEntry(
+                device.pk, device.vehicle.pk, device.vehicle.vehicle_id, 'public', None, device.device_id
+            )
+        self.cell = segments.cell_of(28.61, 77.21)
+
+    def record(self, device_pks, speed=2.0, ago=0, latitude=28.61):
+        sketches.record_samples([
+            Telemetry(
+                device_id=device_pk, timestamp=self.now - timedelta(seconds=ago),
+                latitude=latitude, longitude=77.21, speed=speed
+            )
+            for device_pk in device_pks
+        ], self.devices)
+
+    def test_flushes_merge_into_the_union(self, schedule):
+        device_pks = list(self.devices)
+        self.record(device_pks[:3], speed=2.0)
+        sketches.flush()
+        # Another process (or a later flush) with overlapping vehicles
+        self.record(device_pks[1:], speed=4.0)
+        sketches.flush()
+
+        since = self.now - timedelta(minutes=5)
+        self.assertEqual(sketches.estimate_distinct_vehicles([self.cell], since), (4, 6))
+        self.assertEqual(sketches.estimate_cells([self.cell], since), {self.cell: (4, 3.0)})
+        self.assertEqual(sketches.estimate_distinct_vehicles([self.cell], since, until=since), (0, 0))
+
+    def test_failed_flush_keeps_pending_sketches(self, schedule):
+        device_pks = list(self.devices)
+        self.record(device_pks[:2])
+
+        with mock.patch.object(sketches, '_write', side_effect=DatabaseError('down')):
+            with self.assertRaises(DatabaseError):
+                sketches.flush()
+
+        self.record(device_pks[1:3])
+        sketches.flush()
+
+        self.assertEqual(
+            sketches.estimate_distinct_vehicles([self.cell], self.now - timedelta(minutes=5)), (3, 4)
+        )
+
+    def test_prune_drops_old_sketches(self, schedule):
+        retention = settings.CONGESTION_CONFIG['sketch_retention_hours']
+        self.record(list(self.devices), ago=(retention + 1) * 3600)
+        self.record(list(self.devices))
+        sketches.flush()
+
+        self.assertEqual(sketches.prune(), 1)
+        self.assertEqual(CellMinuteSketch.objects.count(), 1)
+
+    def test_congestion_snapshot_counts_distinct_vehicles(self, schedule):
+        device_pks = list(self.devices)
+        # Busy cell: 4 vehicles, several samples each; quiet cell: 2 vehicles
+        for ago in (0, 5, 10):
+            self.record(device_pks, speed=1.0, ago=ago)
+        self.record(device_pks[:2], latitude=28.71)
+
+        self.assertEqual(congestion.flush(), 1)
+
+        snapshot = Congestion.objects.get()
+        self.assertEqual((snapshot.cell_y, snapshot.cell_x), self.cell)
+        self.assertEqual(snapshot.vehicle_count, 4)
+        self.assertEqual(snapshot.congestion_level, Congestion.CongestionLevel.SEVERE)
+        # One snapshot writer per flush_interval
+        self.assertEqual(congestion.flush(), 0)
@@ -6,17 +6,21 @@ Live navigation, congestion, crash detection, theft detection, route search, hea
 from django.urls import path
 from . import views
 from . import additional_views
+from . import streaming
 
 urlpatterns = [
     # ============================================================
     # TELEMETRY INGESTION
     # ============================================================
     path('telemetry/', views.ingest_telemetry, name='ingest_telemetry'),
+    path('telemetry/batch/', views.ingest_telemetry_batch, name='ingest_telemetry_batch'),
+    path('telemetry/binary/', views.ingest_telemetry_binary, name='ingest_telemetry_binary'),
     
     # ============================================================
     # LIVE LOCATION
     # ============================================================
     path('live-locations/', views.get_live_locations, name='get_live_locations'),
+    path('live-locations/stream/', streaming.live_location_stream, name='live_location_stream'),
     path('live-locations/<str:vehicle_id>/', views.get_vehicle_location, name='get_vehicle_location'),
     
     # ============================================================
@@ -43,6 +47,7 @@ urlpatterns = [
     # DEVICE HEALTH
     # ============================================================
     path('device-health/', views.get_device_health, name='get_device_health'),
+    path('ingest-metrics/', views.get_ingest_metrics, name='get_ingest_metrics'),
     
     # ============================================================
     # ROUTE SEARCH & NAVIGATION
@@ -4,26 +4,34 @@ Live location, congestion tracking, crash detection
 Function-based views with role-based access control
 """
 
-from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes, parser_classes
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.throttling import UserRateThrottle
+from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
-from django.db.models import Avg, Count
+from django.db.models import Avg, Count, Q
 from django.core.cache import cache
 from datetime import timedelta
 
 from Devices.models import Vehicle, Device
+from Devices.registry import get_device_entry, get_device_entries
 from Devices.utils import (
     success_response, error_response, 
     filter_vehicles_by_access,
     apply_date_filter,
-    police_or_admin
+    police_or_admin,
+    admin_only,
+    calculate_distance
 )
-from sensorData.models import Telemetry
-from sensorData.serializers import TelemetrySerializer, TelemetryCreateSerializer, LiveLocationSerializer
+from sensorData.models import Telemetry, VehicleLastPosition
+from sensorData.parsers import TelemetryFrameParser
+from sensorData.serializers import TelemetrySerializer, VehicleLastPositionSerializer
+from sensorData.validators import validate_telemetry, range_errors
 from Journey.models import CrashEvent, Congestion
 from Journey.serializers import CrashEventSerializer, CongestionSerializer, CongestionPublicSerializer
+from navigate.ingestion import ingest_samples
+from navigate import live_index, metrics, segments, sketches, spool
 
 
 # Custom throttle for telemetry ingestion (IoT devices)
@@ -64,12 +72,13 @@ def ingest_telemetry(request):
     }
     
     Flow:
-    1. Validate device exists
+    1. Validate fields + device exists (sensorData.validators fast path)
     2. Create telemetry record
     3. Update device last_ping
     4. Check for CRASH detection (G-force, speed drop, pitch/roll)
     5. Check for THEFT detection (parked, engine off, owner away, moving)
-    6. Update congestion data for road segment
+    6. Count the sample in its road segment cell sketch (navigate/sketches.py,
+       snapshotted into Congestion every flush_interval seconds by navigate/congestion.py)
     7. Invalidate live location cache
     
     CRASH DETECTION RULES:
@@ -83,144 +92,74 @@ def ingest_telemetry(request):
     - Engine = OFF
     - Owner not nearby (BLE = False)
     - Vehicle moves > 5 km/h for > 10 sec
+    
+    IDEMPOTENCY:
+    A retransmitted sample (same device + timestamp) is not stored again
+    and does not re-run detection; the response says "duplicate": true.
+    
+    LEAN RESPONSE (for devices that do not need the sample echoed back):
+    - ?response=lean        -> 201 {"id", "crash_detected", "theft_detected", "directives"}
+    - Prefer: return=minimal -> 204 No Content when there is nothing to act on,
+                               otherwise the lean body
+    Directives are instructions for the device, e.g. "confirm_crash"
+    (prompt the rider to confirm or cancel the detected crash).
+    
+    ASYNC MODE (TELEMETRY_INGEST_CONFIG['async_ingest'] = True):
+    Steps 2-7 run in the ingestion workers (manage.py run_ingest_workers);
+    the request only validates and spools the sample, returning 202.
     """
-    serializer = TelemetryCreateSerializer(data=request.data)
+    from django.conf import settings
     
-    if serializer.is_valid():
-        telemetry = serializer.save()
-        
-        # ============================================================
-        # CRASH DETECTION LOGIC
-        # ============================================================
-        crash_detected = False
+    data, errors = validate_telemetry(request.data)
+    
+    if data is not None:
+        device_id = data.pop('device_id')
+        entry = get_device_entry(device_id)
+        data['device_entry'] = entry
         
-        # Get previous telemetry for speed comparison
-        previous_telemetry = Telemetry.objects.filter(
-            device=telemetry.device
-        ).exclude(id=telemetry.id).order_by('-timestamp').first()
+        # Fast accept: hand the sample to the worker pool
+        if settings.TELEMETRY_INGEST_CONFIG['async_ingest']:
+            spool.enqueue([dict(data, device_id=device_id)])
+            return success_response(
+                data={'device_id': device_id, 'queued': True},
+                message="Telemetry data queued",
+                status_code=status.HTTP_202_ACCEPTED
+            )
         
-        if previous_telemetry and telemetry.speed is not None:
-            # Calculate time difference
-            time_diff = (telemetry.timestamp - previous_telemetry.timestamp).total_seconds()
-            
-            # Check crash conditions (all must be true)
-            if 1 <= time_diff <= 2:  # Within 1-2 seconds
-                # 1. Check G-force > 3.5g
-                g_force = None
-                if telemetry.accel_magnitude:
-                    g_force = telemetry.accel_magnitude / 9.8  # Convert to g
-                
-                # 2. Check speed drop > 60%
-                speed_drop_percent = 0
-                if previous_telemetry.speed and previous_telemetry.speed > 0:
-                    speed_drop_percent = ((previous_telemetry.speed - telemetry.speed) / previous_telemetry.speed) * 100
-                
-                # 3. Check pitch or roll > 45°
-                pitch_critical = telemetry.pitch and abs(telemetry.pitch) > 45
-                roll_critical = telemetry.roll and abs(telemetry.roll) > 45
-                
-                # 4. Check acceleration spike > ±5 m/s²
-                accel_spike = False
-                if telemetry.accel_x or telemetry.accel_y:
-                    accel_spike = (
-                        (telemetry.accel_x and abs(telemetry.accel_x) > 5) or
-                        (telemetry.accel_y and abs(telemetry.accel_y) > 5)
-                    )
-                
-                # ALL conditions must be met
-                if (g_force and g_force > 3.5 and
-                    speed_drop_percent > 60 and
-                    (pitch_critical or roll_critical) and
-                    accel_spike):
-                    
-                    crash_detected = True
-                    
-                    # Determine severity based on G-force
-                    if g_force > 8:
-                        severity = CrashEvent.Severity.CRITICAL
-                    elif g_force > 6:
-                        severity = CrashEvent.Severity.HIGH
-                    elif g_force > 4.5:
-                        severity = CrashEvent.Severity.MEDIUM
-                    else:
-                        severity = CrashEvent.Severity.LOW
-                    
-                    # Calculate confirmation deadline (15 seconds)
-                    from datetime import timedelta
-                    confirmation_deadline = timezone.now() + timedelta(seconds=15)
-                    
-                    # Create crash event
-                    CrashEvent.objects.create(
-                        vehicle=telemetry.device.vehicle,
-                        journey=None,  # Can be linked if journey is active
-                        severity=severity,
-                        status=CrashEvent.Status.AWAITING_CONFIRMATION,
-                        latitude=telemetry.latitude,
-                        longitude=telemetry.longitude,
-                        accel_magnitude=telemetry.accel_magnitude,
-                        speed_before=previous_telemetry.speed,
-                        speed_after=telemetry.speed,
-                        speed_drop_percent=speed_drop_percent,
-                        pitch_angle=telemetry.pitch,
-                        roll_angle=telemetry.roll,
-                        g_force=g_force,
-                        timestamp=telemetry.timestamp,
-                        confirmation_deadline=confirmation_deadline
-                    )
-                    
-                    # Update vehicle status
-                    telemetry.device.vehicle.is_active = False
-                    telemetry.device.vehicle.save()
+        # Store + crash/theft detection (shared with batch ingestion)
+        result = ingest_samples([data])[0]
+        telemetry = result['telemetry']
         
-        # ============================================================
-        # THEFT DETECTION LOGIC
-        # ============================================================
-        theft_detected = False
+        # Lean mode: no serializer, no device/vehicle stand-ins
+        response_mode = _ingest_response_mode(request)
+        if response_mode:
+            return _lean_ingest_response(result, response_mode)
         
-        # Check theft conditions
-        if (telemetry.parking_status and              # Vehicle is PARKED
-            not telemetry.engine_status and           # Engine is OFF
-            not telemetry.ble_proximity and           # Owner NOT nearby
-            telemetry.speed and telemetry.speed > 1.39):  # Moving > 5 km/h (1.39 m/s)
-            
-            # Check if vehicle has been moving for > 10 seconds
-            recent_telemetry = Telemetry.objects.filter(
-                device=telemetry.device,
-                timestamp__gte=telemetry.timestamp - timedelta(seconds=10),
-                speed__gt=1.39  # > 5 km/h
-            ).count()
-            
-            if recent_telemetry >= 5:  # At least 5 readings in 10 seconds
-                theft_detected = True
-                
-                # Create theft event
-                from Journey.models import TheftEvent
-                TheftEvent.objects.create(
-                    vehicle=telemetry.device.vehicle,
-                    status=TheftEvent.Status.DETECTED,
-                    speed_detected=telemetry.speed,
-                    duration_seconds=10,
-                    engine_was_off=not telemetry.engine_status,
-                    owner_nearby=telemetry.ble_proximity,
-                    latitude=telemetry.latitude,
-                    longitude=telemetry.longitude,
-                    owner_notified=True,  # Trigger notification
-                    police_notified=True,  # Trigger police alert
-                    timestamp=telemetry.timestamp
-                )
-                
-                # Update vehicle status
-                telemetry.device.vehicle.is_active = False
-                telemetry.device.vehicle.save()
+        # Retransmission of a stored sample: acknowledge, nothing re-run
+        if result['duplicate']:
+            return success_response(
+                data={'device_id': device_id, 'duplicate': True},
+                message="Duplicate telemetry ignored",
+                status_code=status.HTTP_200_OK
+            )
         
-        # Invalidate live location cache
-        cache_key = f"live_location_{telemetry.device.vehicle.vehicle_id}"
-        cache.delete(cache_key)
+        # Attach registry data so the response does not lazy-load device/vehicle
+        # (read-only stand-ins, never saved)
+        telemetry.device = Device(
+            pk=entry.device_pk,
+            device_id=device_id,
+            vehicle=Vehicle(
+                pk=entry.vehicle_pk,
+                vehicle_id=entry.vehicle_id,
+                vehicle_type=entry.vehicle_type,
+                owner_id=entry.owner_id
+            )
+        )
         
         # Prepare response
         response_data = TelemetrySerializer(telemetry).data
-        response_data['crash_detected'] = crash_detected
-        response_data['theft_detected'] = theft_detected
+        response_data['crash_detected'] = result['crash_detected']
+        response_data['theft_detected'] = result['theft_detected']
         
         return success_response(
             data=response_data,
@@ -230,11 +169,268 @@ def ingest_telemetry(request):
     
     return error_response(
         message="Invalid telemetry data",
-        errors=serializer.errors,
+        errors=errors,
         status_code=status.HTTP_400_BAD_REQUEST
     )
 
 
+def _ingest_response_mode(request):
+    """
+    Negotiate the lean ingest response
+    
+    Returns: 'minimal' (Prefer: return=minimal), 'lean' (?response=lean)
+             or None for the full serialized telemetry
+    """
+    prefer = request.META.get('HTTP_PREFER', '')
+    if 'return=minimal' in prefer.replace(' ', '').lower().split(','):
+        return 'minimal'
+    if request.GET.get('response') == 'lean':
+        return 'lean'
+    return None
+
+
+def _lean_ingest_response(result, mode):
+    """Tiny ingest response: id, event flags and directives for the device"""
+    directives = []
+    if result['crash_detected']:
+        directives.append('confirm_crash')
+    if result['theft_detected']:
+        directives.append('theft_alert')
+    
+    if mode == 'minimal' and not directives:
+        response = Response(status=status.HTTP_204_NO_CONTENT)
+        response['Preference-Applied'] = 'return=minimal'
+        return response
+    
+    if result['duplicate']:
+        return Response({'duplicate': True}, status=status.HTTP_200_OK)
+    
+    return Response(
+        {
+            'id': result['telemetry'].id,
+            'crash_detected': result['crash_detected'],
+            'theft_detected': result['theft_detected'],
+            'directives': directives
+        },
+        status=status.HTTP_201_CREATED
+    )
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([TelemetryRateThrottle])
+def ingest_telemetry_batch(request):
+    """
+    Ingest a Batch of Telemetry Samples
+    
+    POST /api/navigate/telemetry/batch/
+    
+    Body:
+    {
+        "samples": [
+            {"device_id": "DEVICE123", "timestamp": "2024-01-15T10:30:00Z", ...},
+            {"device_id": "DEVICE456", "timestamp": "2024-01-15T10:30:00Z", ...}
+        ]
+    }
+    (a bare JSON array of samples is also accepted)
+    
+    Each sample has the same fields as POST /api/navigate/telemetry/.
+    Samples may come from one or many devices.
+    
+    Flow:
+    1. Resolve all devices via the device registry (one query at most)
+    2. Validate every sample (invalid samples are reported, not stored)
+    3. Bulk insert valid samples + one last_ping update per device
+    4. Run crash/theft detection over the batch in memory
+    (in async mode steps 3-4 run in the ingestion workers and
+    valid samples are reported as "queued" with HTTP 202)
+    
+    Response (per-sample status, same order as input):
+    {
+        "accepted": 3,
+        "rejected": 1,
+        "duplicates": 1,
+        "results": [
+            {"status": "created", "id": 1234},
+            {"status": "created", "id": 1235, "crash_detected": true},
+            {"status": "duplicate"},
+            {"status": "invalid", "errors": {"latitude": ["This field is required."]}}
+        ]
+    }
+    Duplicates (same device + timestamp as a stored sample) are counted
+    as accepted but not stored again.
+    """
+    from django.conf import settings
+    
+    samples = request.data.get('samples') if isinstance(request.data, dict) else request.data
+    
+    if not isinstance(samples, list) or not samples:
+        return error_response(
+            message="'samples' must be a non-empty list",
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    
+    max_batch_size = settings.TELEMETRY_INGEST_CONFIG['max_batch_size']
+    if len(samples) > max_batch_size:
+        return error_response(
+            message=f"Batch too large (max {max_batch_size} samples)",
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Resolve every device referenced by the batch at once
+    device_ids = {
+        str(sample['device_id']).strip()
+        for sample in samples
+        if isinstance(sample, dict) and sample.get('device_id') is not None
+    }
+    devices = get_device_entries(device_ids)
+    
+    # Validate
+    results = [None] * len(samples)
+    accepted = []
+    accepted_positions = []
+    
+    for index, sample in enumerate(samples):
+        data, errors = validate_telemetry(sample, devices)
+        if data is not None:
+            data['device_entry'] = devices[data['device_id']]
+            accepted.append(data)
+            accepted_positions.append(index)
+        else:
+            results[index] = {'status': 'invalid', 'errors': errors}
+    
+    return _store_batch(len(samples), accepted, accepted_positions, results)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@throttle_classes([TelemetryRateThrottle])
+@parser_classes([TelemetryFrameParser])
+def ingest_telemetry_binary(request):
+    """
+    Ingest Telemetry in the Compact Binary Format
+    
+    POST /api/navigate/telemetry/binary/
+    Content-Type: application/vnd.yatri.telemetry
+    
+    Body: a single-device frame (magic b'YT') or a length-prefixed
+    batch of frames (magic b'YB') - layout in sensorData/parsers.py.
+    A record is 31 bytes: lat/lon as scaled int32, speed/heading/IMU
+    as scaled int16, engine/parking/BLE status as bit flags.
+    
+    Flow:
+    1. Decode frames with struct (no JSON parsing, no serializer)
+    2. Resolve all devices via the device registry
+    3. Range-check values (the wire types already fix every field type)
+    4. Store + detect exactly like POST /api/navigate/telemetry/batch/
+    
+    Response: same per-record result list as the JSON batch endpoint
+    """
+    from django.conf import settings
+    
+    samples = request.data
+    
+    max_batch_size = settings.TELEMETRY_INGEST_CONFIG['max_batch_size']
+    if not samples:
+        return error_response(
+            message="Telemetry payload has no records",
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    if len(samples) > max_batch_size:
+        return error_response(
+            message=f"Batch too large (max {max_batch_size} samples)",
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    
+    devices = get_device_entries({sample['device_id'] for sample in samples})
+    
+    results = [None] * len(samples)
+    accepted = []
+    accepted_positions = []
+    
+    for index, sample in enumerate(samples):
+        errors = {}
+        if sample['device_id'] not in devices:
+            errors['device_id'] = [f"Device with ID {sample['device_id']} does not exist."]
+        errors.update(range_errors(sample))
+        
+        if errors:
+            results[index] = {'status': 'invalid', 'errors': errors}
+        else:
+            sample['device_entry'] = devices[sample['device_id']]
+            accepted.append(sample)
+            accepted_positions.append(index)
+    
+    return _store_batch(len(samples), accepted, accepted_positions, results)
+
+
+def _store_batch(total, accepted, accepted_positions, results):
+    """
+    Store validated batch samples (or spool them in async mode) and
+    build the per-sample batch response
+    
+    Args:
+        total: Number of samples in the request
+        accepted: Validated sample dicts with `device_id` and `device_entry`
+        accepted_positions: Request index of each accepted sample
+        results: Per-sample results, already filled for rejected samples
+    """
+    from django.conf import settings
+    
+    if not accepted:
+        return error_response(
+            message="Invalid telemetry data",
+            errors=results,
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # Fast accept: hand the samples to the worker pool
+    if settings.TELEMETRY_INGEST_CONFIG['async_ingest']:
+        spool.enqueue(accepted)
+        for index in accepted_positions:
+            results[index] = {'status': 'queued'}
+        
+        return success_response(
+            data={
+                'accepted': len(accepted),
+                'rejected': total - len(accepted),
+                'results': results
+            },
+            message="Telemetry batch queued",
+            status_code=status.HTTP_202_ACCEPTED
+        )
+    
+    for data in accepted:
+        del data['device_id']
+    
+    # Store + detect
+    duplicates = 0
+    for index, result in zip(accepted_positions, ingest_samples(accepted)):
+        if result['duplicate']:
+            duplicates += 1
+            results[index] = {'status': 'duplicate'}
+            continue
+        entry = {'status': 'created', 'id': result['telemetry'].id}
+        if result['late']:
+            entry['late'] = True
+        if result['crash_detected']:
+            entry['crash_detected'] = True
+        if result['theft_detected']:
+            entry['theft_detected'] = True
+        results[index] = entry
+    
+    return success_response(
+        data={
+            'accepted': len(accepted),
+            'rejected': total - len(accepted),
+            'duplicates': duplicates,
+            'results': results
+        },
+        message="Telemetry batch received",
+        status_code=status.HTTP_201_CREATED
+    )
+
+
 # ============================================================
 # LIVE LOCATION TRACKING
 # ============================================================
@@ -250,19 +446,35 @@ def get_live_locations(request):
     Query params:
     - vehicle_type: public/private/government (filter by type)
     - minutes: time window for "live" data (default: 5 minutes)
+    - bbox: min_lon,min_lat,max_lon,max_lat (only vehicles in the viewport)
+    - lat, lon, radius: only vehicles within radius meters of a point
+    - since: cursor from a previous response - only what changed after it
     
     Access Control:
     - Admin/Police: All vehicles
     - Normal User: Only public vehicles
     - Vehicle Owner: Own vehicles + public
     
-    Caching: 10 seconds TTL
+    Caching: 10 seconds TTL, shared per visibility class rather than per user:
+    - live_locations_class_<vehicle_type>_<minutes>: one per vehicle type
+      (admin/police read every class, everyone else 'public')
+    - live_locations_owner_<owner_id>_<minutes>: an owner's own
+      non-public vehicles, merged onto the public class per request
+    (bbox/radius queries are answered from the in-memory grid index
+    in navigate/live_index.py instead, O(results) per query)
+    
+    Delta mode (since=<cursor>, since= for the first call):
+    {
+        "positions": [...],   # vehicles that moved after the cursor
+        "removed": ["V7"],    # vehicles that aged out of the window
+        "cursor": "1760668200123456"
+    }
     
     Flow:
-    1. Check user access level
-    2. Get recent telemetry (last 5 minutes)
-    3. Filter by vehicle access permissions
-    4. Return latest location per vehicle
+    1. Resolve the user's visibility classes (+ owner overlay)
+    2. Read each class from cache, or from VehicleLastPosition rows
+       updated in the window (one per vehicle)
+    3. Merge the classes into the response
     """
     from django.conf import settings
     
@@ -273,51 +485,184 @@ def get_live_locations(request):
     # Get vehicle type filter
     vehicle_type = request.GET.get('vehicle_type', None)
     
-    # Build cache key
-    cache_key = f"live_locations_{request.user.id}_{vehicle_type}_{minutes}"
+    # Viewport / radius queries: served from the in-memory grid index
+    if any(param in request.GET for param in ('bbox', 'lat', 'lon', 'radius')):
+        if 'since' in request.GET:
+            return error_response(
+                message="since cannot be combined with bbox or lat, lon and radius",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        return _live_locations_in_area(request, cutoff_time, vehicle_type)
     
-    # Try cache first
-    cached_data = cache.get(cache_key)
-    if cached_data:
-        return success_response(data=cached_data)
+    # Delta mode: only rows moved after the client's cursor
+    if 'since' in request.GET:
+        return _live_locations_delta(request, minutes, vehicle_type)
     
-    # Get recent telemetry
-    telemetry_qs = Telemetry.objects.filter(
-        timestamp__gte=cutoff_time
-    ).select_related('device__vehicle', 'device__vehicle__owner')
+    # Compose from the shared per-class caches (see _live_location_sets)
+    classes, owner_id = live_index.visibility_for(request.user)
+    if classes is None:
+        classes = Vehicle.VehicleType.values
+    visible_classes = classes
+    if vehicle_type:
+        classes = [vehicle_class for vehicle_class in classes if vehicle_class == vehicle_type]
+    
+    keys = {f"live_locations_class_{vehicle_class}_{minutes}": vehicle_class for vehicle_class in classes}
+    if owner_id is not None:
+        keys[f"live_locations_owner_{owner_id}_{minutes}"] = None
+    
+    cached = cache.get_many(keys)
+    missing = {}
+    for key, vehicle_class in keys.items():
+        if key in cached:
+            continue
+        # Latest position per vehicle (one row each, maintained on ingest)
+        positions_qs = VehicleLastPosition.objects.filter(timestamp__gte=cutoff_time)
+        if vehicle_class is not None:
+            positions_qs = positions_qs.filter(vehicle__vehicle_type=vehicle_class)
+        else:
+            # Owner overlay: own vehicles outside the visible classes
+            positions_qs = positions_qs.filter(vehicle__owner_id=owner_id).exclude(
+                vehicle__vehicle_type__in=visible_classes
+            )
+        serializer = VehicleLastPositionSerializer(
+            positions_qs.select_related('vehicle', 'device'), many=True
+        )
+        missing[key] = cached[key] = serializer.data
+    
+    # Cache for 10 seconds
+    if missing:
+        cache.set_many(missing, settings.CACHE_TTL['live_data'])
+    
+    data = []
+    for key in keys:
+        data.extend(cached[key])
+    if vehicle_type and owner_id is not None:
+        data = [position for position in data if position['vehicle_type'] == vehicle_type]
+    
+    return success_response(data=data)
+
+
+def _visible_positions(user, vehicle_type=None):
+    """VehicleLastPosition rows the user may see (access control + type filter)"""
+    positions_qs = VehicleLastPosition.objects.all()
     
     # Filter by vehicle type if specified
     if vehicle_type:
-        telemetry_qs = telemetry_qs.filter(device__vehicle__vehicle_type=vehicle_type)
+        positions_qs = positions_qs.filter(vehicle__vehicle_type=vehicle_type)
     
     # Apply access control
-    user = request.user
     if not (user.is_admin() or user.is_police()):
         # Normal users: only public vehicles
         if user.role == 'normal_user':
-            telemetry_qs = telemetry_qs.filter(device__vehicle__vehicle_type='public')
+            positions_qs = positions_qs.filter(vehicle__vehicle_type='public')
         # Vehicle owners: own vehicles + public
         elif user.is_vehicle_owner():
             from django.db.models import Q
-            telemetry_qs = telemetry_qs.filter(
-                Q(device__vehicle__owner=user) | Q(device__vehicle__vehicle_type='public')
+            positions_qs = positions_qs.filter(
+                Q(vehicle__owner=user) | Q(vehicle__vehicle_type='public')
             )
     
-    # Get latest telemetry per vehicle
-    vehicles_data = {}
-    for telemetry in telemetry_qs.order_by('device__vehicle', '-timestamp'):
-        vehicle_id = telemetry.device.vehicle.vehicle_id
-        if vehicle_id not in vehicles_data:
-            vehicles_data[vehicle_id] = telemetry
+    return positions_qs
+
+
+def _live_locations_delta(request, minutes, vehicle_type):
+    """
+    since-cursor branch of get_live_locations
+    
+    The cursor is the newest VehicleLastPosition.updated_at (epoch
+    microseconds) among the rows returned so far - written by the
+    ingesting server, not the request time of this one. Rows are
+    selected by updated_at (indexed), re-reading cursor_overlap seconds
+    before the cursor so rows committed after the previous read with a
+    slightly older updated_at are not missed; clients apply positions by
+    vehicle_id, so repeats are harmless. A first call that returns
+    nothing returns an empty cursor (the next call is a first call again).
+    
+    - positions: rows moved since the cursor that are inside the window
+    - removed: vehicles that were inside the window at the cursor and
+      have aged out since (no newer position); may repeat while the
+      cursor does not move
+    """
+    from django.conf import settings
+    from datetime import datetime, timezone as dt_timezone
     
-    # Serialize
-    latest_locations = list(vehicles_data.values())
-    serializer = LiveLocationSerializer(latest_locations, many=True)
+    epoch = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+    cutoff_time = timezone.now() - timedelta(minutes=minutes)
+    visible_qs = _visible_positions(request.user, vehicle_type)
+    
+    raw_cursor = request.GET['since']
+    if not raw_cursor:
+        # First call: full snapshot, nothing to remove
+        positions_qs = visible_qs.filter(timestamp__gte=cutoff_time)
+        removed = []
+        newest = None
+    else:
+        try:
+            newest = epoch + timedelta(microseconds=int(raw_cursor))
+            since = newest - timedelta(seconds=settings.LIVE_LOCATION_CONFIG['cursor_overlap'])
+            window_at_cursor = since - timedelta(minutes=minutes)
+        except (ValueError, OverflowError):
+            return error_response(
+                message="since must be the cursor of a previous response",
+                status_code=status.HTTP_400_BAD_REQUEST
+            )
+        
+        positions_qs = visible_qs.filter(updated_at__gt=since, timestamp__gte=cutoff_time)
+        # Live at the cursor (timestamp within the window then), stale now
+        removed = list(visible_qs.filter(
+            timestamp__gte=window_at_cursor,
+            timestamp__lt=cutoff_time
+        ).values_list('vehicle__vehicle_id', flat=True))
+    
+    positions = list(positions_qs.select_related('vehicle', 'device'))
+    for position in positions:
+        if newest is None or position.updated_at > newest:
+            newest = position.updated_at
+    serializer = VehicleLastPositionSerializer(positions, many=True)
     
-    # Cache for 10 seconds
-    cache.set(cache_key, serializer.data, settings.CACHE_TTL['live_data'])
+    return success_response(data={
+        'positions': serializer.data,
+        'removed': removed,
+        'cursor': '' if newest is None else str((newest - epoch) // timedelta(microseconds=1))
+    })
+
+
+def _live_locations_in_area(request, cutoff_time, vehicle_type):
+    """
+    bbox / radius branch of get_live_locations
     
-    return success_response(data=serializer.data)
+    Role filtering is applied through per-vehicle visibility classes
+    precomputed in the index, not per request.
+    """
+    from django.conf import settings
+    
+    try:
+        if 'bbox' in request.GET:
+            min_lon, min_lat, max_lon, max_lat = (
+                float(value) for value in request.GET['bbox'].split(',')
+            )
+            if min_lat > max_lat or min_lon > max_lon:
+                raise ValueError
+            data = live_index.query_bbox(
+                request.user, min_lat, min_lon, max_lat, max_lon, cutoff_time, vehicle_type
+            )
+        else:
+            lat = float(request.GET['lat'])
+            lon = float(request.GET['lon'])
+            radius = float(request.GET['radius'])
+            if not 0 < radius <= settings.LIVE_LOCATION_CONFIG['max_radius']:
+                raise ValueError
+            data = live_index.query_radius(
+                request.user, lat, lon, radius, cutoff_time, vehicle_type
+            )
+    except (KeyError, ValueError):
+        return error_response(
+            message="Use bbox=min_lon,min_lat,max_lon,max_lat or lat, lon and radius "
+                    f"(meters, max {settings.LIVE_LOCATION_CONFIG['max_radius']})",
+            status_code=status.HTTP_400_BAD_REQUEST
+        )
+    
+    return success_response(data=data)
 
 
 @api_view(['GET'])
@@ -356,20 +701,21 @@ def get_vehicle_location(request, vehicle_id):
             status_code=status.HTTP_403_FORBIDDEN
         )
     
-    # Get latest telemetry (last 5 minutes)
+    # Get latest position (last 5 minutes)
     cutoff_time = timezone.now() - timedelta(minutes=5)
-    telemetry = Telemetry.objects.filter(
-        device__vehicle=vehicle,
+    position = VehicleLastPosition.objects.filter(
+        vehicle=vehicle,
         timestamp__gte=cutoff_time
-    ).select_related('device').order_by('-timestamp').first()
+    ).select_related('device').first()
     
-    if not telemetry:
+    if not position:
         return error_response(
             message=f"No recent location data for vehicle {vehicle_id}",
             status_code=status.HTTP_404_NOT_FOUND
         )
     
-    serializer = LiveLocationSerializer(telemetry)
+    position.vehicle = vehicle
+    serializer = VehicleLastPositionSerializer(position)
     
     # Cache for 10 seconds
     cache.set(cache_key, serializer.data, settings.CACHE_TTL['live_data'])
@@ -396,7 +742,8 @@ def get_congestion_data(request):
     
     Access Control:
     - Admin/Police: All congestion data
-    - Others: Only public route congestion
+    - Others: Public route congestion and grid cell snapshots (aggregates of
+      at least min_vehicles vehicles, no route attached)
     
     Caching: 5 minutes TTL
     """
@@ -430,8 +777,8 @@ def get_congestion_data(request):
     # Access control
     user = request.user
     if not (user.is_admin() or user.is_police()):
-        # Non-privileged users: only public routes
-        congestion_qs = congestion_qs.filter(route__is_public=True)
+        # Non-privileged users: public routes and grid cell snapshots
+        congestion_qs = congestion_qs.filter(Q(route__is_public=True) | Q(route__isnull=True))
         serializer_class = CongestionPublicSerializer
     else:
         serializer_class = CongestionSerializer
@@ -578,6 +925,7 @@ def get_device_health(request):
     - status: active/inactive/maintenance/faulty
     
     Returns devices with health indicators
+    (last_ping includes heartbeats not yet flushed to the database)
     
     Access Control: Based on vehicle ownership
     """
@@ -594,13 +942,38 @@ def get_device_health(request):
     accessible_vehicles = filter_vehicles_by_access(request.user, vehicles)
     devices_qs = devices_qs.filter(vehicle__in=accessible_vehicles)
     
-    # Prepare response
+    # Prepare response (DeviceSerializer overlays heartbeats not yet
+    # flushed to the database in one round trip)
     from Devices.serializers import DeviceSerializer
     serializer = DeviceSerializer(devices_qs, many=True)
     
     return success_response(data=serializer.data)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@admin_only
+def get_ingest_metrics(request):
+    """
+    Get Telemetry Ingestion Metrics
+    
+    GET /api/navigate/ingest-metrics/
+    
+    Access: Admin only
+    
+    Returns counters shared by all API processes and ingestion workers:
+    samples received/stored/duplicate, crash/theft/harsh detections, and the
+    spool depth when async ingestion is enabled
+    """
+    from django.conf import settings
+    
+    data = metrics.snapshot()
+    if settings.TELEMETRY_INGEST_CONFIG['async_ingest']:
+        data['spool_depth'] = spool.depth()
+    
+    return success_response(data=data)
+
+
 # ============================================================
 # EVENT CONFIRMATION & NOTIFICATION
 # ============================================================
@@ -876,17 +1249,16 @@ def get_congestion_by_route(request):
     
     Flow:
     1. Parse start/end coordinates
-    2. Divide route into grid segments (0.01° resolution)
-    3. Query recent telemetry for each segment
-    4. Calculate vehicle count and average speed per segment
-    5. Classify congestion level with color mapping
-    6. Return segment-wise + overall analysis
+    2. Divide route into grid segments (0.01° resolution, navigate/segments.py)
+    3. Merge the distinct-vehicle sketches of all segments over the window
+       (navigate/sketches.py: estimated vehicles + average speed per cell,
+       whole minutes, no telemetry scan)
+    4. Classify congestion level with color mapping
+    5. Return segment-wise + overall analysis
     
     Academic Note: This demonstrates spatial analysis where continuous
     geographic space is discretized into grid cells for aggregation.
     """
-    from Journey.models import RoadSegment
-    
     # Parse coordinates
     try:
         start_lat = float(request.GET.get('start_lat'))
@@ -925,61 +1297,16 @@ def get_congestion_by_route(request):
         }
     }
     
-    # Generate grid segments along route
-    # Grid resolution: 0.01 degrees (~1.1 km)
-    GRID_RESOLUTION = 0.01
+    # Grid cells along the route, estimated from the per-minute sketches
+    # (one query, nothing written on this GET)
+    cells = segments.cells_on_path(start_lat, start_lon, end_lat, end_lon)
+    cell_stats = sketches.estimate_cells(cells, cutoff_time)
+    names = segments.segment_names()
     
     segments_data = []
-    
-    # Calculate number of segments
-    lat_diff = abs(end_lat - start_lat)
-    lon_diff = abs(end_lon - start_lon)
-    num_segments = max(int(lat_diff / GRID_RESOLUTION), int(lon_diff / GRID_RESOLUTION), 1)
-    
-    # Interpolate points along route
-    for i in range(num_segments + 1):
-        ratio = i / max(num_segments, 1)
-        seg_lat = start_lat + (end_lat - start_lat) * ratio
-        seg_lon = start_lon + (end_lon - start_lon) * ratio
-        
-        # Round to grid
-        grid_lat = round(seg_lat / GRID_RESOLUTION) * GRID_RESOLUTION
-        grid_lon = round(seg_lon / GRID_RESOLUTION) * GRID_RESOLUTION
-        
-        segment_id = f"{grid_lat:.2f}_{grid_lon:.2f}"
-        
-        # Check if already processed
-        if any(s['segment_id'] == segment_id for s in segments_data):
-            continue
-        
-        # Get or create segment
-        segment, _ = RoadSegment.objects.get_or_create(
-            segment_id=segment_id,
-            defaults={
-                'lat_grid': grid_lat,
-                'lon_grid': grid_lon,
-                'min_lat': grid_lat - GRID_RESOLUTION / 2,
-                'max_lat': grid_lat + GRID_RESOLUTION / 2,
-                'min_lon': grid_lon - GRID_RESOLUTION / 2,
-                'max_lon': grid_lon + GRID_RESOLUTION / 2
-            }
-        )
-        
-        # Query telemetry in this segment
-        telemetry_in_segment = Telemetry.objects.filter(
-            timestamp__gte=cutoff_time,
-            latitude__gte=segment.min_lat,
-            latitude__lte=segment.max_lat,
-            longitude__gte=segment.min_lon,
-            longitude__lte=segment.max_lon
-        ).select_related('device__vehicle')
-        
-        # Calculate metrics
-        vehicle_count = telemetry_in_segment.values('device__vehicle').distinct().count()
-        
-        # Calculate average speed (convert m/s to km/h)
-        speeds = telemetry_in_segment.filter(speed__isnull=False).values_list('speed', flat=True)
-        avg_speed_mps = sum(speeds) / len(speeds) if speeds else 0
+    for cell in cells:
+        grid_lat, grid_lon = segments.cell_center(cell)
+        vehicle_count, avg_speed_mps = cell_stats.get(cell, (0, 0))
         avg_speed_kmh = avg_speed_mps * 3.6  # Convert m/s to km/h
         
         # Classify congestion level
@@ -990,18 +1317,12 @@ def get_congestion_by_route(request):
         else:
             level = 'HIGH'
         
-        # Update segment congestion
-        segment.vehicle_count = vehicle_count
-        segment.avg_speed = avg_speed_kmh
-        segment.congestion_level = level
-        segment.last_updated = timezone.now()
-        segment.save()
-        
         # Add to response
         segments_data.append({
-            'segment_id': segment_id,
-            'latitude': grid_lat,
-            'longitude': grid_lon,
+            'segment_id': f"{grid_lat:.2f}_{grid_lon:.2f}",
+            'name': names.get(cell),
+            'latitude': round(grid_lat, 6),
+            'longitude': round(grid_lon, 6),
             'vehicle_count': vehicle_count,
             'avg_speed': round(avg_speed_kmh, 2),
             'congestion_level': level,
@@ -1024,8 +1345,7 @@ def get_congestion_by_route(request):
             overall_level = 'HIGH'
         
         # Estimate travel time (very rough)
-        from Devices.utils import haversine_distance
-        distance_km = haversine_distance(start_lat, start_lon, end_lat, end_lon)
+        distance_km = calculate_distance(start_lat, start_lon, end_lat, end_lon) / 1000
         estimated_time_minutes = (distance_km / max(overall_avg_speed, 1)) * 60
     else:
         overall_level = 'LOW'
@@ -0,0 +1,165 @@
+"""
+YatriConnect - Telemetry Validator Microbenchmark
+
+Usage:
+    python manage.py bench_telemetry_validator
+    python manage.py bench_telemetry_validator --iterations 50000
+
+1. Parity: runs TelemetryIngestSerializer and validate_telemetry over a
+   corpus of valid and malformed samples and reports any difference in
+   the accepted data or the error messages
+2. Speed: validates the same well-formed sample with both and reports
+   microseconds per sample
+
+No database access: devices are passed pre-resolved, as the batch
+endpoint does.
+"""
+
+import time
+from django.core.management.base import BaseCommand
+
+from sensorData.serializers import TelemetryIngestSerializer
+from sensorData.validators import validate_telemetry
+
+
+DEVICES = {'BENCH-001': None}
+
+VALID_SAMPLE = {
+    'device_id': 'BENCH-001',
+    'timestamp': '2024-01-15T10:30:00Z',
+    'latitude': 28.6139,
+    'longitude': 77.2090,
+    'altitude': 216.0,
+    'speed': 15.5,
+    'heading': 90,
+    'pitch': 5.0,
+    'roll': 2.0,
+    'accel_x': 0.5,
+    'accel_y': 0.3,
+    'accel_z': 9.8,
+    'engine_status': True,
+    'parking_status': False,
+    'ble_proximity': True,
+}
+
+
+def parity_corpus():
+    """Valid samples plus one malformed variant per interesting case"""
+    def variant(**changes):
+        sample = dict(VALID_SAMPLE)
+        for key, value in changes.items():
+            if value is KeyError:
+                sample.pop(key, None)
+            else:
+                sample[key] = value
+        return sample
+
+    return [
+        VALID_SAMPLE,
+        {'device_id': 'BENCH-001', 'latitude': 28.6, 'longitude': 77.2},
+        variant(device_id=KeyError),
+        variant(device_id=''),
+        variant(device_id='   '),
+        variant(device_id=' BENCH-001 '),
+        variant(device_id='UNKNOWN'),
+        variant(device_id=1234),
+        variant(device_id=None),
+        variant(device_id=['BENCH-001']),
+        variant(device_id='BENCH\x00001'),
+        variant(timestamp='2024-01-15 10:30:00'),
+        variant(timestamp='2024-01-15T10:30:00.123456+05:45'),
+        variant(timestamp='2024-13-45T10:30:00Z'),
+        variant(timestamp='yesterday'),
+        variant(timestamp=None),
+        variant(timestamp=1705314600),
+        variant(timestamp=KeyError),
+        variant(latitude=KeyError),
+        variant(latitude=None),
+        variant(latitude='28.6139'),
+        variant(latitude='north'),
+        variant(latitude=True),
+        variant(latitude=90.0001),
+        variant(latitude=-90),
+        variant(longitude=-180.5),
+        variant(longitude=[77.2]),
+        variant(heading=360),
+        variant(heading=-0.1),
+        variant(heading=None),
+        variant(pitch=91),
+        variant(roll=-181),
+        variant(speed=None),
+        variant(speed=''),
+        variant(speed='1' * 1001),
+        variant(speed=float('nan')),
+        variant(accel_x={'x': 1}),
+        variant(engine_status='true'),
+        variant(engine_status=1),
+        variant(engine_status=None),
+        variant(parking_status='maybe'),
+        variant(ble_proximity=KeyError),
+        variant(latitude=None, heading=400, engine_status='x', device_id='UNKNOWN'),
+        ['not', 'an', 'object'],
+        'not an object',
+    ]
+
+
+def serializer_result(sample):
+    serializer = TelemetryIngestSerializer(data=sample, context={'devices': DEVICES})
+    if serializer.is_valid():
+        return dict(serializer.validated_data), None
+    return None, serializer.errors
+
+
+def comparable(result):
+    """Normalise (data, errors) so NaN and error containers compare equal"""
+    data, errors = result
+    if data is not None:
+        data = {key: ('nan' if value != value else value) for key, value in data.items()}
+    if errors is not None:
+        errors = {key: [str(message) for message in messages] if isinstance(messages, list) else messages
+                  for key, messages in dict(errors).items()}
+    return data, errors
+
+
+class Command(BaseCommand):
+    help = "Compare validate_telemetry against TelemetryIngestSerializer (parity + speed)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000,
+                            help="Samples validated per implementation")
+
+    def handle(self, *args, **options):
+        # 1. Parity
+        corpus = parity_corpus()
+        mismatches = 0
+        for sample in corpus:
+            expected = comparable(serializer_result(sample))
+            actual = comparable(validate_telemetry(sample, DEVICES))
+            if expected != actual:
+                mismatches += 1
+                self.stdout.write(self.style.ERROR(
+                    f"Mismatch for {sample!r}:\n  serializer: {expected}\n  fast path:  {actual}"
+                ))
+
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"Parity: {mismatches}/{len(corpus)} samples differ"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Parity: {len(corpus)}/{len(corpus)} samples identical"))
+
+        # 2. Speed
+        iterations = options['iterations']
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            serializer = TelemetryIngestSerializer(data=VALID_SAMPLE, context={'devices': DEVICES})
+            serializer.is_valid()
+        serializer_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(iterations):
+            validate_telemetry(VALID_SAMPLE, DEVICES)
+        fast_time = time.perf_counter() - start
+
+        self.stdout.write(f"TelemetryIngestSerializer: {serializer_time / iterations * 1e6:8.1f} us/sample")
+        self.stdout.write(f"validate_telemetry:        {fast_time / iterations * 1e6:8.1f} us/sample")
+        self.stdout.write(self.style.SUCCESS(f"Speedup: {serializer_time / fast_time:.1f}x"))
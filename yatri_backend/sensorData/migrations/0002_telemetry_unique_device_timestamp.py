@@ -0,0 +1,33 @@
+# Generated by Django 4.2.27 on 2026-10-17 02:32
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_telemetry(apps, schema_editor):
+    """Keep the first stored row of every (device, timestamp) pair"""
+    Telemetry = apps.get_model('sensorData', 'Telemetry')
+    duplicates = (
+        Telemetry.objects.values('device_id', 'timestamp')
+        .annotate(rows=Count('id'), keep_id=Min('id'))
+        .filter(rows__gt=1)
+    )
+    for row in duplicates.iterator():
+        Telemetry.objects.filter(
+            device_id=row['device_id'], timestamp=row['timestamp']
+        ).exclude(id=row['keep_id']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensorData', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_telemetry, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='telemetry',
+            constraint=models.UniqueConstraint(fields=('device', 'timestamp'), name='unique_device_timestamp'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 4.2.27 on 2026-10-17 02:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_last_positions(apps, schema_editor):
+    """Seed one row per vehicle from its newest stored telemetry"""
+    Telemetry = apps.get_model('sensorData', 'Telemetry')
+    Vehicle = apps.get_model('Devices', 'Vehicle')
+    VehicleLastPosition = apps.get_model('sensorData', 'VehicleLastPosition')
+
+    positions = []
+    for vehicle_pk in Vehicle.objects.values_list('pk', flat=True).iterator():
+        telemetry = (
+            Telemetry.objects.filter(device__vehicle_id=vehicle_pk)
+            .order_by('-timestamp').first()
+        )
+        if telemetry is not None:
+            positions.append(VehicleLastPosition(
+                vehicle_id=vehicle_pk,
+                device_id=telemetry.device_id,
+                timestamp=telemetry.timestamp,
+                latitude=telemetry.latitude,
+                longitude=telemetry.longitude,
+                speed=telemetry.speed,
+                heading=telemetry.heading,
+            ))
+    VehicleLastPosition.objects.bulk_create(positions, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Devices', '0001_initial'),
+        ('sensorData', '0002_telemetry_unique_device_timestamp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleLastPosition',
+            fields=[
+                ('vehicle', models.OneToOneField(help_text='Vehicle this position belongs to', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='last_position', serialize=False, to='Devices.vehicle')),
+                ('timestamp', models.DateTimeField(db_index=True, help_text='Time when the position was recorded by the device')),
+                ('latitude', models.FloatField(help_text='GPS latitude in decimal degrees')),
+                ('longitude', models.FloatField(help_text='GPS longitude in decimal degrees')),
+                ('speed', models.FloatField(blank=True, help_text='Speed in meters per second', null=True)),
+                ('heading', models.FloatField(blank=True, help_text='Direction of travel in degrees (0-360)', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='Time when the server last moved this position')),
+                ('device', models.ForeignKey(help_text='Device that reported the position', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='Devices.device')),
+            ],
+            options={
+                'verbose_name_plural': 'Vehicle last positions',
+                'db_table': 'vehicle_last_position',
+            },
+        ),
+        migrations.RunPython(populate_last_positions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-17 02:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensorData', '0003_vehiclelastposition'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='vehiclelastposition',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, help_text='Time when the server last moved this position (delta cursor)'),
+        ),
+    ]
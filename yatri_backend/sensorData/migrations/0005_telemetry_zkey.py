@@ -0,0 +1,68 @@
+# Generated by Django 4.2.27 on 2026-10-17 02:43
+
+from django.db import migrations, models
+
+
+# Frozen copy of the Morton encoding of Devices.utils.compute_zkey as of
+# this migration, so later changes to the helper do not change what it does
+ZKEY_BITS = 24
+BATCH_SIZE = 5000
+
+
+def _spread_bits(value):
+    value = (value | (value << 16)) & 0x0000FFFF0000FFFF
+    value = (value | (value << 8)) & 0x00FF00FF00FF00FF
+    value = (value | (value << 4)) & 0x0F0F0F0F0F0F0F0F
+    value = (value | (value << 2)) & 0x3333333333333333
+    value = (value | (value << 1)) & 0x5555555555555555
+    return value
+
+
+def _zkey(latitude, longitude):
+    cells = 1 << ZKEY_BITS
+    ix = min(max(int((longitude + 180.0) / 360.0 * cells), 0), cells - 1)
+    iy = min(max(int((latitude + 90.0) / 180.0 * cells), 0), cells - 1)
+    return _spread_bits(ix) | (_spread_bits(iy) << 1)
+
+
+def fill_zkeys(apps, schema_editor):
+    """
+    Compute zkey for existing telemetry, in batches of BATCH_SIZE rows:
+    read (id, lat, lon) tuples in primary key order, one bulk_update per batch
+    """
+    Telemetry = apps.get_model('sensorData', 'Telemetry')
+    last_id = 0
+    while True:
+        rows = list(
+            Telemetry.objects.filter(id__gt=last_id, zkey__isnull=True)
+            .order_by('id')
+            .values_list('id', 'latitude', 'longitude')[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        Telemetry.objects.bulk_update(
+            [Telemetry(id=row_id, zkey=_zkey(lat, lon)) for row_id, lat, lon in rows],
+            ['zkey'],
+            batch_size=1000
+        )
+        last_id = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensorData', '0004_vehiclelastposition_updated_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='telemetry',
+            name='zkey',
+            field=models.BigIntegerField(blank=True, help_text='Z-order key of latitude/longitude for spatial range queries (Devices.utils)', null=True),
+        ),
+        migrations.RunPython(fill_zkeys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='telemetry',
+            index=models.Index(fields=['zkey', 'timestamp'], name='telemetry_zkey_e1581e_idx'),
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 4.2.27 on 2026-10-17 02:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Devices', '0002_route_cells'),
+        ('sensorData', '0005_telemetry_zkey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelemetryHourRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(help_text='Start of the bucket')),
+                ('sample_count', models.IntegerField(default=0)),
+                ('distance', models.FloatField(default=0, help_text="Path length between the bucket's samples (meters)")),
+                ('speed_count', models.IntegerField(default=0)),
+                ('speed_sum', models.FloatField(default=0)),
+                ('speed_min', models.FloatField(blank=True, null=True)),
+                ('speed_max', models.FloatField(blank=True, null=True)),
+                ('harsh_count', models.IntegerField(default=0, help_text="Samples with |accel_x| or |accel_y| above TELEMETRY_ROLLUP_CONFIG['harsh_accel']")),
+                ('min_latitude', models.FloatField()),
+                ('max_latitude', models.FloatField()),
+                ('min_longitude', models.FloatField()),
+                ('max_longitude', models.FloatField()),
+                ('first_timestamp', models.DateTimeField()),
+                ('first_latitude', models.FloatField()),
+                ('first_longitude', models.FloatField()),
+                ('last_timestamp', models.DateTimeField()),
+                ('last_latitude', models.FloatField()),
+                ('last_longitude', models.FloatField()),
+                ('device', models.ForeignKey(help_text='Device that reported the samples', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='Devices.device')),
+            ],
+            options={
+                'db_table': 'telemetry_rollup_hour',
+            },
+        ),
+        migrations.CreateModel(
+            name='TelemetryMinuteRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField(help_text='Start of the bucket')),
+                ('sample_count', models.IntegerField(default=0)),
+                ('distance', models.FloatField(default=0, help_text="Path length between the bucket's samples (meters)")),
+                ('speed_count', models.IntegerField(default=0)),
+                ('speed_sum', models.FloatField(default=0)),
+                ('speed_min', models.FloatField(blank=True, null=True)),
+                ('speed_max', models.FloatField(blank=True, null=True)),
+                ('harsh_count', models.IntegerField(default=0, help_text="Samples with |accel_x| or |accel_y| above TELEMETRY_ROLLUP_CONFIG['harsh_accel']")),
+                ('min_latitude', models.FloatField()),
+                ('max_latitude', models.FloatField()),
+                ('min_longitude', models.FloatField()),
+                ('max_longitude', models.FloatField()),
+                ('first_timestamp', models.DateTimeField()),
+                ('first_latitude', models.FloatField()),
+                ('first_longitude', models.FloatField()),
+                ('last_timestamp', models.DateTimeField()),
+                ('last_latitude', models.FloatField()),
+                ('last_longitude', models.FloatField()),
+                ('device', models.ForeignKey(help_text='Device that reported the samples', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='Devices.device')),
+            ],
+            options={
+                'db_table': 'telemetry_rollup_minute',
+                'indexes': [models.Index(fields=['bucket'], name='telemetry_r_bucket_6856f1_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='telemetryminuterollup',
+            constraint=models.UniqueConstraint(fields=('device', 'bucket'), name='unique_device_minute'),
+        ),
+        migrations.AddIndex(
+            model_name='telemetryhourrollup',
+            index=models.Index(fields=['bucket'], name='telemetry_r_bucket_ee59b4_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='telemetryhourrollup',
+            constraint=models.UniqueConstraint(fields=('device', 'bucket'), name='unique_device_hour'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.27 on 2026-10-17 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensorData', '0006_telemetry_rollups'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='telemetryhourrollup',
+            name='harsh_count',
+            field=models.IntegerField(default=0, help_text='Harsh acceleration/braking/cornering samples (navigate/detection.py)'),
+        ),
+        migrations.AlterField(
+            model_name='telemetryminuterollup',
+            name='harsh_count',
+            field=models.IntegerField(default=0, help_text='Harsh acceleration/braking/cornering samples (navigate/detection.py)'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.27 on 2026-10-17 03:03
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Journey', '0004_harshevent'),
+        ('sensorData', '0007_rollup_harsh_count_help_text'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='telemetry',
+            name='journey',
+            field=models.ForeignKey(blank=True, db_index=False, help_text='Journey the vehicle was on (assigned on ingest from the active journey map)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='telemetry', to='Journey.journey'),
+        ),
+        migrations.AddIndex(
+            model_name='telemetry',
+            index=models.Index(fields=['journey', 'timestamp'], name='telemetry_journey_45dfb8_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-17 03:14
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sensorData', '0008_telemetry_journey'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='telemetry',
+            name='telemetry_device__6d4bf8_idx',
+        ),
+    ]
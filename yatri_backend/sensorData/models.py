@@ -24,6 +24,16 @@ class Telemetry(models.Model):
         db_index=True,
         help_text="The device that sent this telemetry data"
     )
+    
+    journey = models.ForeignKey(
+        'Journey.Journey',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        db_index=False,  # Covered by the (journey, timestamp) index
+        related_name='telemetry',
+        help_text="Journey the vehicle was on (assigned on ingest from the active journey map)"
+    )
 
     timestamp = models.DateTimeField(
         default=timezone.now,
@@ -39,6 +49,11 @@ class Telemetry(models.Model):
         blank=True,
         help_text="Altitude in meters"
     )
+    zkey = models.BigIntegerField(
+        null=True,
+        blank=True,
+        help_text="Z-order key of latitude/longitude for spatial range queries (Devices.utils)"
+    )
     
     # Movement Data
     speed = models.FloatField(
@@ -119,7 +134,16 @@ class Telemetry(models.Model):
             models.Index(fields=['device', '-timestamp']),
             models.Index(fields=['-timestamp']),
             models.Index(fields=['latitude', 'longitude']),
-            models.Index(fields=['device', 'timestamp']),  # For time-range queries
+            models.Index(fields=['zkey', 'timestamp']),  # bbox + time window (zkey_bbox_filter)
+            models.Index(fields=['journey', 'timestamp']),  # Samples of a journey
+        ]
+        constraints = [
+            # Idempotent ingestion: a retransmitted sample is the same row
+            # (its index also serves device + time-range queries)
+            models.UniqueConstraint(
+                fields=['device', 'timestamp'],
+                name='unique_device_timestamp'
+            ),
         ]
         verbose_name_plural = "Telemetry"
     
@@ -139,6 +163,15 @@ class Telemetry(models.Model):
             )
         return self.accel_magnitude
     
+    def calculate_zkey(self):
+        """
+        Calculate the Z-order spatial key from latitude/longitude
+        Used for bbox queries (Devices.utils.zkey_bbox_filter)
+        """
+        from Devices.utils import compute_zkey
+        self.zkey = compute_zkey(self.latitude, self.longitude)
+        return self.zkey
+    
     @classmethod
     def get_recent_device(cls, device_obj, minutes=5):
         """
@@ -153,7 +186,223 @@ class Telemetry(models.Model):
         ).order_by('-timestamp')
     
     def save(self, *args, **kwargs):
-        """Override save to calculate acceleration magnitude"""
+        """Override save to calculate acceleration magnitude and spatial key"""
         self.calculate_accel_magnitude()
+        self.calculate_zkey()
         super().save(*args, **kwargs)
     
+
+
+# ============================================================
+# VEHICLE LAST POSITION - One row per vehicle, maintained on ingest
+# ============================================================
+class VehicleLastPosition(models.Model):
+    """
+    Latest known position of each vehicle
+    Upserted by the ingestion pipeline so live location views read one
+    small row per vehicle instead of scanning recent telemetry
+    """
+    
+    vehicle = models.OneToOneField(
+        Vehicle,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='last_position',
+        help_text="Vehicle this position belongs to"
+    )
+    
+    device = models.ForeignKey(
+        Device,
+        on_delete=models.CASCADE,
+        related_name='+',
+        help_text="Device that reported the position"
+    )
+    
+    timestamp = models.DateTimeField(
+        db_index=True,
+        help_text="Time when the position was recorded by the device"
+    )
+    
+    latitude = models.FloatField(help_text="GPS latitude in decimal degrees")
+    longitude = models.FloatField(help_text="GPS longitude in decimal degrees")
+    
+    speed = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Speed in meters per second"
+    )
+    
+    heading = models.FloatField(
+        null=True,
+        blank=True,
+        help_text="Direction of travel in degrees (0-360)"
+    )
+    
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        help_text="Time when the server last moved this position (delta cursor)"
+    )
+    
+    class Meta:
+        db_table = 'vehicle_last_position'
+        verbose_name_plural = "Vehicle last positions"
+    
+    def __str__(self):
+        return f"{self.vehicle_id} at {self.timestamp}"
+    
+    @classmethod
+    def upsert_from_telemetry(cls, telemetry_list, vehicle_pks):
+        """
+        Move each vehicle's row to its newest sample in one statement
+        
+        Args:
+            telemetry_list: Stored Telemetry instances
+            vehicle_pks: {device_pk: vehicle_pk}
+        
+        INSERT ... ON CONFLICT (vehicle_id) DO UPDATE ... WHERE older,
+        so late or out-of-order samples never move a vehicle backwards
+        (PostgreSQL and SQLite 3.24+).
+        """
+        from django.db import connection
+        from django.utils import timezone
+        
+        newest = {}
+        for telemetry in telemetry_list:
+            vehicle_pk = vehicle_pks[telemetry.device_id]
+            current = newest.get(vehicle_pk)
+            if current is None or telemetry.timestamp > current.timestamp:
+                newest[vehicle_pk] = telemetry
+        
+        if not newest:
+            return
+        
+        ops = connection.ops
+        now = ops.adapt_datetimefield_value(timezone.now())
+        params = []
+        for vehicle_pk, telemetry in newest.items():
+            params.extend([
+                vehicle_pk, telemetry.device_id,
+                ops.adapt_datetimefield_value(telemetry.timestamp),
+                telemetry.latitude, telemetry.longitude,
+                telemetry.speed, telemetry.heading, now
+            ])
+        
+        table = ops.quote_name(cls._meta.db_table)
+        timestamp = ops.quote_name('timestamp')
+        values_sql = ', '.join(['(%s, %s, %s, %s, %s, %s, %s, %s)'] * len(newest))
+        
+        sql_query = f"""
+        INSERT INTO {table}
+            (vehicle_id, device_id, {timestamp}, latitude, longitude, speed, heading, updated_at)
+        VALUES {values_sql}
+        ON CONFLICT (vehicle_id) DO UPDATE SET
+            device_id = EXCLUDED.device_id,
+            {timestamp} = EXCLUDED.{timestamp},
+            latitude = EXCLUDED.latitude,
+            longitude = EXCLUDED.longitude,
+            speed = EXCLUDED.speed,
+            heading = EXCLUDED.heading,
+            updated_at = EXCLUDED.updated_at
+        WHERE {table}.{timestamp} < EXCLUDED.{timestamp}
+        """
+        
+        with connection.cursor() as cursor:
+            cursor.execute(sql_query, params)
+
+
+# ============================================================
+# TELEMETRY ROLLUPS - Per-device minute/hour aggregates, maintained on ingest
+# ============================================================
+class TelemetryRollup(models.Model):
+    """
+    Aggregate of one device's samples in one time bucket
+    Merged on ingest (navigate/rollups.py); rebuilt from telemetry by
+    python manage.py backfill_telemetry_rollups
+    
+    distance is the path length between the bucket's own samples; the
+    hop from one bucket's last point to the next bucket's first point
+    is not included (first_*/last_* join consecutive buckets).
+    """
+    
+    device = models.ForeignKey(
+        Device,
+        on_delete=models.CASCADE,
+        related_name='+',
+        help_text="Device that reported the samples"
+    )
+    
+    bucket = models.DateTimeField(help_text="Start of the bucket")
+    
+    sample_count = models.IntegerField(default=0)
+    
+    distance = models.FloatField(
+        default=0,
+        help_text="Path length between the bucket's samples (meters)"
+    )
+    
+    # Speed (m/s) over samples that reported one
+    speed_count = models.IntegerField(default=0)
+    speed_sum = models.FloatField(default=0)
+    speed_min = models.FloatField(null=True, blank=True)
+    speed_max = models.FloatField(null=True, blank=True)
+    
+    harsh_count = models.IntegerField(
+        default=0,
+        help_text="Harsh acceleration/braking/cornering samples (navigate/detection.py)"
+    )
+    
+    # Bounding box
+    min_latitude = models.FloatField()
+    max_latitude = models.FloatField()
+    min_longitude = models.FloatField()
+    max_longitude = models.FloatField()
+    
+    # First/last sample - joins the path across buckets
+    first_timestamp = models.DateTimeField()
+    first_latitude = models.FloatField()
+    first_longitude = models.FloatField()
+    last_timestamp = models.DateTimeField()
+    last_latitude = models.FloatField()
+    last_longitude = models.FloatField()
+    
+    class Meta:
+        abstract = True
+    
+    def __str__(self):
+        return f"{self.device_id} at {self.bucket}: {self.sample_count} samples"
+    
+    @property
+    def avg_speed(self):
+        """Average speed in m/s (None without speed readings)"""
+        return self.speed_sum / self.speed_count if self.speed_count else None
+
+
+class TelemetryMinuteRollup(TelemetryRollup):
+    """Per-device aggregate of one minute (bucket in UTC)"""
+    
+    class Meta:
+        db_table = 'telemetry_rollup_minute'
+        constraints = [
+            models.UniqueConstraint(fields=['device', 'bucket'], name='unique_device_minute'),
+        ]
+        indexes = [
+            models.Index(fields=['bucket']),
+        ]
+
+
+class TelemetryHourRollup(TelemetryRollup):
+    """
+    Per-device aggregate of one hour
+    Buckets are local hours (settings.TIME_ZONE), so local days - the
+    __date lookups of the analytics views - are whole sets of buckets
+    """
+    
+    class Meta:
+        db_table = 'telemetry_rollup_hour'
+        constraints = [
+            models.UniqueConstraint(fields=['device', 'bucket'], name='unique_device_hour'),
+        ]
+        indexes = [
+            models.Index(fields=['bucket']),
+        ]
@@ -0,0 +1,210 @@
+"""
+YatriConnect - Binary Telemetry Parser
+Compact fixed-layout wire format for constrained IoT devices
+(Content-Type: application/vnd.yatri.telemetry)
+
+All integers are little-endian.
+
+Frame (one device, one or more records):
+    magic       2s   b'YT'
+    version     B    1
+    id_length   B    length of the device_id that follows
+    count       H    number of records
+    device_id   id_length bytes (ASCII)
+    records     count x RECORD
+
+Record (31 bytes, ~10x smaller than the JSON equivalent):
+    timestamp   I    epoch seconds (UTC)
+    millis      H    milliseconds (0-999)
+    latitude    i    degrees x 1e7
+    longitude   i    degrees x 1e7
+    altitude    h    meters                  (-32768 = missing)
+    speed       H    m/s x 100               (0xFFFF = missing)
+    heading     H    degrees x 100           (0xFFFF = missing)
+    pitch       h    degrees x 100           (-32768 = missing)
+    roll        h    degrees x 100           (-32768 = missing)
+    accel_x     h    m/s² x 100              (-32768 = missing)
+    accel_y     h    m/s² x 100              (-32768 = missing)
+    accel_z     h    m/s² x 100              (-32768 = missing)
+    flags       B    bit 0 engine_status, bit 1 parking_status, bit 2 ble_proximity
+
+Batch (many frames, e.g. a gateway relaying several devices):
+    magic       2s   b'YB'
+    version     B    1
+    count       H    number of frames
+    frames      count x (length H + frame bytes)
+"""
+
+import struct
+from datetime import datetime, timedelta, timezone as dt_timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+
+FRAME_MAGIC = b'YT'
+BATCH_MAGIC = b'YB'
+VERSION = 1
+
+FRAME_HEADER = struct.Struct('<2sBBH')
+BATCH_HEADER = struct.Struct('<2sBH')
+FRAME_LENGTH = struct.Struct('<H')
+RECORD = struct.Struct('<IHiihHHhhhhhB')
+
+MISSING_SIGNED = -32768
+MISSING_UNSIGNED = 0xFFFF
+
+ENGINE_FLAG = 0x01
+PARKING_FLAG = 0x02
+BLE_FLAG = 0x04
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _decode_records(device_id, payload):
+    """
+    Decode packed records into telemetry sample dicts
+
+    Struct.iter_unpack walks the buffer in C, yielding one tuple of
+    ints per record; only the model-level values are built from it.
+    """
+    samples = []
+    for (seconds, millis, lat, lon, altitude, speed, heading,
+         pitch, roll, accel_x, accel_y, accel_z, flags) in RECORD.iter_unpack(payload):
+        if millis > 999:
+            raise ParseError(f"Telemetry record {len(samples)} has millis {millis} (must be 0-999)")
+        samples.append({
+            'device_id': device_id,
+            'timestamp': EPOCH + timedelta(seconds=seconds, milliseconds=millis),
+            'latitude': lat / 1e7,
+            'longitude': lon / 1e7,
+            'altitude': None if altitude == MISSING_SIGNED else float(altitude),
+            'speed': None if speed == MISSING_UNSIGNED else speed / 100,
+            'heading': None if heading == MISSING_UNSIGNED else heading / 100,
+            'pitch': None if pitch == MISSING_SIGNED else pitch / 100,
+            'roll': None if roll == MISSING_SIGNED else roll / 100,
+            'accel_x': None if accel_x == MISSING_SIGNED else accel_x / 100,
+            'accel_y': None if accel_y == MISSING_SIGNED else accel_y / 100,
+            'accel_z': None if accel_z == MISSING_SIGNED else accel_z / 100,
+            'engine_status': bool(flags & ENGINE_FLAG),
+            'parking_status': bool(flags & PARKING_FLAG),
+            'ble_proximity': bool(flags & BLE_FLAG),
+        })
+    return samples
+
+
+def decode_frame(data):
+    """Decode a single-device frame -> list of sample dicts"""
+    view = memoryview(data)
+    if len(view) < FRAME_HEADER.size:
+        raise ParseError("Telemetry frame too short")
+
+    magic, version, id_length, count = FRAME_HEADER.unpack_from(view)
+    if magic != FRAME_MAGIC:
+        raise ParseError("Not a telemetry frame")
+    if version != VERSION:
+        raise ParseError(f"Unsupported telemetry frame version {version}")
+
+    records_start = FRAME_HEADER.size + id_length
+    if len(view) != records_start + count * RECORD.size:
+        raise ParseError("Telemetry frame length does not match its record count")
+
+    try:
+        device_id = bytes(view[FRAME_HEADER.size:records_start]).decode('ascii').strip()
+    except UnicodeDecodeError:
+        raise ParseError("Device ID must be ASCII")
+    if not device_id:
+        raise ParseError("Telemetry frame has no device ID")
+
+    return _decode_records(device_id, view[records_start:])
+
+
+def decode_batch(data):
+    """Decode a length-prefixed batch of frames -> flat list of sample dicts"""
+    view = memoryview(data)
+    if len(view) < BATCH_HEADER.size:
+        raise ParseError("Telemetry batch too short")
+
+    magic, version, count = BATCH_HEADER.unpack_from(view)
+    if magic != BATCH_MAGIC:
+        raise ParseError("Not a telemetry batch")
+    if version != VERSION:
+        raise ParseError(f"Unsupported telemetry batch version {version}")
+
+    samples = []
+    offset = BATCH_HEADER.size
+    for _ in range(count):
+        if offset + FRAME_LENGTH.size > len(view):
+            raise ParseError("Telemetry batch truncated")
+        (length,) = FRAME_LENGTH.unpack_from(view, offset)
+        offset += FRAME_LENGTH.size
+        if offset + length > len(view):
+            raise ParseError("Telemetry batch truncated")
+        samples.extend(decode_frame(view[offset:offset + length]))
+        offset += length
+
+    if offset != len(view):
+        raise ParseError("Unexpected trailing bytes in telemetry batch")
+    return samples
+
+
+def decode(data):
+    """Decode either a single frame or a batch, chosen by the magic bytes"""
+    if data[:2] == BATCH_MAGIC:
+        return decode_batch(data)
+    return decode_frame(data)
+
+
+class TelemetryFrameParser(BaseParser):
+    """
+    DRF parser for the binary telemetry format
+
+    request.data becomes a list of sample dicts with the same keys as
+    the JSON ingestion body (timestamps already timezone-aware).
+    """
+
+    media_type = 'application/vnd.yatri.telemetry'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        data = stream.read() if stream is not None else b''
+        if not data:
+            raise ParseError("Empty telemetry payload")
+        return decode(data)
+
+
+def encode_frame(device_id, samples):
+    """
+    Encode samples of one device as a frame (device firmware reference
+    implementation, also used by tests and benchmarks)
+    """
+    def scaled(value, scale, missing):
+        return missing if value is None else round(value * scale)
+
+    device_id = device_id.encode('ascii')
+    parts = [FRAME_HEADER.pack(FRAME_MAGIC, VERSION, len(device_id), len(samples)), device_id]
+    for sample in samples:
+        delta = sample['timestamp'] - EPOCH
+        parts.append(RECORD.pack(
+            int(delta.total_seconds()), delta.microseconds // 1000,
+            round(sample['latitude'] * 1e7), round(sample['longitude'] * 1e7),
+            scaled(sample.get('altitude'), 1, MISSING_SIGNED),
+            scaled(sample.get('speed'), 100, MISSING_UNSIGNED),
+            scaled(sample.get('heading'), 100, MISSING_UNSIGNED),
+            scaled(sample.get('pitch'), 100, MISSING_SIGNED),
+            scaled(sample.get('roll'), 100, MISSING_SIGNED),
+            scaled(sample.get('accel_x'), 100, MISSING_SIGNED),
+            scaled(sample.get('accel_y'), 100, MISSING_SIGNED),
+            scaled(sample.get('accel_z'), 100, MISSING_SIGNED),
+            (ENGINE_FLAG if sample.get('engine_status') else 0)
+            | (PARKING_FLAG if sample.get('parking_status') else 0)
+            | (BLE_FLAG if sample.get('ble_proximity') else 0),
+        ))
+    return b''.join(parts)
+
+
+def encode_batch(frames):
+    """Wrap already-encoded frames into a batch"""
+    parts = [BATCH_HEADER.pack(BATCH_MAGIC, VERSION, len(frames))]
+    for frame in frames:
+        parts.append(FRAME_LENGTH.pack(len(frame)))
+        parts.append(frame)
+    return b''.join(parts)
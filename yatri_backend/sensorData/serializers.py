@@ -3,7 +3,7 @@ YatriConnect - Telemetry Serializers
 """
 
 from rest_framework import serializers
-from sensorData.models import Telemetry
+from sensorData.models import Telemetry, VehicleLastPosition
 
 
 class TelemetrySerializer(serializers.ModelSerializer):
@@ -47,33 +47,60 @@ class TelemetryCreateSerializer(serializers.ModelSerializer):
         ]
     
     def validate_device_id(self, value):
-        """Validate device exists"""
-        from Devices.models import Device
-        try:
-            Device.objects.get(device_id=value)
-        except Device.DoesNotExist:
+        """
+        Validate device exists
+        Batch ingestion passes the pre-resolved devices in context['devices'],
+        otherwise the device registry is consulted (no query when warm)
+        """
+        devices = self.context.get('devices')
+        if devices is not None:
+            exists = value in devices
+        else:
+            from Devices.registry import get_device_entry
+            exists = get_device_entry(value) is not None
+        
+        if not exists:
             raise serializers.ValidationError(f"Device with ID {value} does not exist.")
         return value
     
     def create(self, validated_data):
         """Create telemetry and update device ping"""
-        from Devices.models import Device
+        from django.utils import timezone
+        from Devices import heartbeat
+        from Devices.registry import get_device_entry
         
         device_id = validated_data.pop('device_id')
-        device_obj = Device.objects.get(device_id=device_id)
+        entry = get_device_entry(device_id)
         
         # Update device last ping
-        device_obj.update_ping()
+        heartbeat.record_pings([entry.device_pk], timezone.now())
         
         # Create telemetry
         telemetry = Telemetry.objects.create(
-            device=device_obj,
+            device_id=entry.device_pk,
             **validated_data
         )
         
         return telemetry
 
 
+class TelemetryIngestSerializer(TelemetryCreateSerializer):
+    """
+    TelemetryCreateSerializer with physical ranges, for the ingestion
+    endpoints (sensorData.validators fast path and its fallback)
+    """
+    
+    class Meta(TelemetryCreateSerializer.Meta):
+        # Physical ranges (mirrored by sensorData.validators fast path)
+        extra_kwargs = {
+            'latitude': {'min_value': -90, 'max_value': 90},
+            'longitude': {'min_value': -180, 'max_value': 180},
+            'heading': {'min_value': 0, 'max_value': 360},
+            'pitch': {'min_value': -90, 'max_value': 90},
+            'roll': {'min_value': -180, 'max_value': 180},
+        }
+
+
 class LiveLocationSerializer(serializers.ModelSerializer):
     """
     Simplified serializer for live location display
@@ -88,3 +115,19 @@ class LiveLocationSerializer(serializers.ModelSerializer):
         model = Telemetry
         fields = ['device_id', 'vehicle_id', 'vehicle_type', 
                  'latitude', 'longitude', 'speed', 'heading', 'timestamp']
+
+
+class VehicleLastPositionSerializer(serializers.ModelSerializer):
+    """
+    Live location from the one-row-per-vehicle position table
+    Same output as LiveLocationSerializer
+    """
+    
+    device_id = serializers.CharField(source='device.device_id', read_only=True)
+    vehicle_id = serializers.CharField(source='vehicle.vehicle_id', read_only=True)
+    vehicle_type = serializers.CharField(source='vehicle.vehicle_type', read_only=True)
+    
+    class Meta:
+        model = VehicleLastPosition
+        fields = ['device_id', 'vehicle_id', 'vehicle_type', 
+                 'latitude', 'longitude', 'speed', 'heading', 'timestamp']
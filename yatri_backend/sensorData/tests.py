@@ -1,3 +1,155 @@
-from django.test import TestCase
+from datetime import datetime, timezone as dt_timezone
 
-# Create your tests here.
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ParseError
+
+from sensorData.parsers import RECORD, FRAME_HEADER, decode, decode_batch, decode_frame, encode_batch, encode_frame
+from sensorData.serializers import TelemetryCreateSerializer
+from sensorData.validators import validate_telemetry
+
+
+# ============================================================
+# BINARY TELEMETRY PARSER
+# ============================================================
+def make_sample(**overrides):
+    sample = {
+        'timestamp': datetime(2024, 1, 15, 10, 30, 0, 250000, tzinfo=dt_timezone.utc),
+        'latitude': 28.6139391,
+        'longitude': 77.2090212,
+        'altitude': 216.0,
+        'speed': 12.5,
+        'heading': 271.25,
+        'pitch': -1.5,
+        'roll': 0.75,
+        'accel_x': 0.12,
+        'accel_y': -0.34,
+        'accel_z': 9.81,
+        'engine_status': True,
+        'parking_status': False,
+        'ble_proximity': True,
+    }
+    sample.update(overrides)
+    return sample
+
+
+class TelemetryFrameParserTests(SimpleTestCase):
+    """Round trips and malformed frames of the binary wire format"""
+
+    def test_frame_round_trip(self):
+        sample = make_sample()
+        decoded = decode_frame(encode_frame('DEV001', [sample]))
+
+        self.assertEqual(len(decoded), 1)
+        self.assertEqual(decoded[0]['device_id'], 'DEV001')
+        for field, value in sample.items():
+            if isinstance(value, float):
+                self.assertAlmostEqual(decoded[0][field], value, places=6, msg=field)
+            else:
+                self.assertEqual(decoded[0][field], value, msg=field)
+
+    def test_missing_values_round_trip_as_none(self):
+        sample = make_sample(altitude=None, speed=None, heading=None, pitch=None,
+                             roll=None, accel_x=None, accel_y=None, accel_z=None)
+        decoded = decode_frame(encode_frame('DEV001', [sample]))[0]
+
+        for field in ('altitude', 'speed', 'heading', 'pitch', 'roll', 'accel_x', 'accel_y', 'accel_z'):
+            self.assertIsNone(decoded[field], msg=field)
+
+    def test_batch_round_trip(self):
+        frames = [
+            encode_frame('DEV001', [make_sample(), make_sample(latitude=28.7)]),
+            encode_frame('DEV002', [make_sample(speed=3.0)]),
+        ]
+        decoded = decode(encode_batch(frames))
+
+        self.assertEqual([sample['device_id'] for sample in decoded], ['DEV001', 'DEV001', 'DEV002'])
+        self.assertAlmostEqual(decoded[1]['latitude'], 28.7, places=6)
+        self.assertEqual(decoded[2]['speed'], 3.0)
+
+    def test_frame_length_mismatch(self):
+        frame = encode_frame('DEV001', [make_sample()])
+        with self.assertRaises(ParseError):
+            decode_frame(frame[:-1])
+        with self.assertRaises(ParseError):
+            decode_frame(frame + b'\x00')
+
+    def test_bad_magic_and_version(self):
+        frame = bytearray(encode_frame('DEV001', [make_sample()]))
+        with self.assertRaises(ParseError):
+            decode_frame(b'XX' + bytes(frame[2:]))
+        frame[2] = 9
+        with self.assertRaises(ParseError):
+            decode_frame(bytes(frame))
+
+    def test_empty_device_id(self):
+        with self.assertRaises(ParseError):
+            decode_frame(encode_frame('', [make_sample()]))
+
+    def test_millis_out_of_range(self):
+        frame = bytearray(encode_frame('DEV001', [make_sample()]))
+        records_start = FRAME_HEADER.size + len('DEV001')
+        fields = list(RECORD.unpack_from(frame, records_start))
+        fields[1] = 1000
+        RECORD.pack_into(frame, records_start, *fields)
+        with self.assertRaises(ParseError):
+            decode_frame(bytes(frame))
+
+    def test_truncated_batch(self):
+        batch = encode_batch([encode_frame('DEV001', [make_sample()])])
+        with self.assertRaises(ParseError):
+            decode_batch(batch[:-3])
+        with self.assertRaises(ParseError):
+            decode_batch(batch + b'\x00')
+
+
+# ============================================================
+# TELEMETRY VALIDATOR
+# ============================================================
+DEVICES = {'DEV001': None}
+
+
+def make_json_sample(**overrides):
+    sample = {
+        'device_id': 'DEV001',
+        'timestamp': '2024-01-15T10:30:00Z',
+        'latitude': 28.6139,
+        'longitude': 77.2090,
+        'speed': 12.5,
+        'heading': 271,
+        'accel_x': 0.12,
+        'accel_y': -0.34,
+        'accel_z': 9.81,
+    }
+    sample.update(overrides)
+    return sample
+
+
+class TelemetryValidatorTests(SimpleTestCase):
+    """Fast-path validation of ingested samples (sensorData/validators.py)"""
+
+    def test_valid_sample(self):
+        validated, errors = validate_telemetry(make_json_sample(), DEVICES)
+        self.assertIsNone(errors)
+        self.assertEqual(validated['heading'], 271.0)
+
+    def test_out_of_range_values_rejected(self):
+        validated, errors = validate_telemetry(make_json_sample(latitude=91, heading=-1), DEVICES)
+        self.assertIsNone(validated)
+        self.assertEqual(str(errors['latitude'][0]), 'Ensure this value is less than or equal to 90.')
+        self.assertEqual(str(errors['heading'][0]), 'Ensure this value is greater than or equal to 0.')
+
+    def test_integer_beyond_float_range_is_an_error(self):
+        huge = 10 ** 400
+        validated, errors = validate_telemetry(
+            make_json_sample(latitude=huge, longitude=-huge, speed=huge), DEVICES
+        )
+        self.assertIsNone(validated)
+        self.assertEqual(str(errors['latitude'][0]), 'Ensure this value is less than or equal to 90.')
+        self.assertEqual(str(errors['longitude'][0]), 'Ensure this value is greater than or equal to -180.')
+        self.assertEqual(str(errors['speed'][0]), 'A valid number is required.')
+
+    def test_create_serializer_has_no_ranges(self):
+        # Ranges apply to the ingestion endpoints only
+        fields = TelemetryCreateSerializer().fields
+        self.assertIsNone(fields['latitude'].max_value)
+        self.assertIsNone(fields['heading'].min_value)
@@ -0,0 +1,190 @@
+"""
+YatriConnect - Telemetry Ingest Validator
+Single-pass replacement for TelemetryIngestSerializer.is_valid() on the
+ingestion endpoints
+
+Well-formed values (JSON numbers, booleans, ISO-8601 strings, ASCII
+device IDs) are checked inline. Anything else is handed to the
+serializer's own field for that value, so every input is accepted or
+rejected exactly as TelemetryIngestSerializer would, with the same
+error messages. Ranges are read from the serializer fields. Integers
+too large for a float are rejected as out of range (the serializer
+field would raise OverflowError).
+
+Benchmark: python manage.py bench_telemetry_validator
+"""
+
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+from rest_framework.fields import empty, SkipField
+
+
+# Fields checked by the fast path, in TelemetryIngestSerializer order
+FLOAT_FIELDS = (
+    'latitude', 'longitude', 'altitude', 'speed', 'heading',
+    'accel_x', 'accel_y', 'accel_z', 'pitch', 'roll',
+)
+BOOLEAN_FIELDS = ('engine_status', 'parking_status', 'ble_proximity')
+
+_fields = None
+
+
+def _serializer_fields():
+    """Field instances of TelemetryIngestSerializer (built once per process)"""
+    global _fields
+    if _fields is None:
+        from sensorData.serializers import TelemetryIngestSerializer
+        _fields = TelemetryIngestSerializer().fields
+    return _fields
+
+
+def _field_validation(field, value, errors):
+    """
+    Slow path: validate one value with the serializer field itself
+
+    Returns (present, internal_value); records errors like
+    Serializer.to_internal_value does.
+    """
+    try:
+        return True, field.run_validation(value)
+    except serializers.ValidationError as exc:
+        errors[field.field_name] = exc.detail
+    except SkipField:
+        pass
+    return False, None
+
+
+def _overflow_error(field, value):
+    """Error detail for an integer beyond the float range"""
+    if value > 0 and field.max_value is not None:
+        message = field.error_messages['max_value'].format(max_value=field.max_value)
+    elif value < 0 and field.min_value is not None:
+        message = field.error_messages['min_value'].format(min_value=field.min_value)
+    else:
+        message = field.error_messages['invalid']
+    return serializers.ValidationError(message).detail
+
+
+def validate_telemetry(data, devices=None):
+    """
+    Validate one telemetry sample
+
+    Args:
+        data: Parsed request body of a single sample
+        devices: Optional {device_id: DeviceEntry} already resolved for a
+                 batch; the device registry is used otherwise
+
+    Returns: (validated_data, errors)
+        validated_data - same dict TelemetryIngestSerializer.validated_data
+                         would hold (device_id + Telemetry field kwargs),
+                         None when invalid
+        errors - {field: [messages]} in serializer field order, None when valid
+    """
+    if type(data) is not dict:
+        # Form data (QueryDict) or non-object bodies: full serializer
+        from sensorData.serializers import TelemetryIngestSerializer
+        context = {} if devices is None else {'devices': devices}
+        serializer = TelemetryIngestSerializer(data=data, context=context)
+        if serializer.is_valid():
+            return dict(serializer.validated_data), None
+        return None, serializer.errors
+
+    fields = _serializer_fields()
+    errors = {}
+    validated = {}
+
+    # device_id (CharField + validate_device_id)
+    value = data.get('device_id', empty)
+    if type(value) is str and value.isascii() and '\x00' not in value and value.strip():
+        device_id = value.strip()
+    else:
+        device_id = _field_validation(fields['device_id'], value, errors)[1]
+    if 'device_id' not in errors:
+        if devices is not None:
+            exists = device_id in devices
+        else:
+            from Devices.registry import get_device_entry
+            exists = get_device_entry(device_id) is not None
+        if exists:
+            validated['device_id'] = device_id
+        else:
+            errors['device_id'] = serializers.ValidationError(
+                f"Device with ID {device_id} does not exist."
+            ).detail
+
+    # timestamp (optional - model default applies when omitted)
+    value = data.get('timestamp', empty)
+    if value is not empty:
+        try:
+            parsed = parse_datetime(value) if type(value) is str else None
+        except ValueError:
+            parsed = None  # Well formatted but not a valid date
+        if parsed is not None:
+            try:
+                validated['timestamp'] = fields['timestamp'].enforce_timezone(parsed)
+            except serializers.ValidationError as exc:
+                errors['timestamp'] = exc.detail
+        else:
+            present, internal = _field_validation(fields['timestamp'], value, errors)
+            if present:
+                validated['timestamp'] = internal
+
+    # Numeric fields
+    for name in FLOAT_FIELDS:
+        field = fields[name]
+        value = data.get(name, empty)
+        value_type = type(value)
+        if value_type is float or value_type is int:
+            try:
+                number = float(value)
+            except OverflowError:
+                errors[name] = _overflow_error(field, value)
+                continue
+            if ((field.min_value is None or number >= field.min_value)
+                    and (field.max_value is None or number <= field.max_value)):
+                validated[name] = number
+                continue
+        elif value is None and field.allow_null:
+            validated[name] = None
+            continue
+        elif value is empty and not field.required:
+            continue
+        present, internal = _field_validation(field, value, errors)
+        if present:
+            validated[name] = internal
+
+    # Status flags
+    for name in BOOLEAN_FIELDS:
+        value = data.get(name, empty)
+        if value is True or value is False:
+            validated[name] = value
+        elif value is not empty:
+            present, internal = _field_validation(fields[name], value, errors)
+            if present:
+                validated[name] = internal
+
+    if errors:
+        # Same key order as the serializer
+        return None, {name: errors[name] for name in fields if name in errors}
+    return validated, None
+
+
+def range_errors(sample):
+    """
+    Range check for already-typed samples (binary wire format), with
+    the serializer's limits and messages
+
+    Returns: {field: [messages]} (empty when every value is in range)
+    """
+    fields = _serializer_fields()
+    errors = {}
+    for name in FLOAT_FIELDS:
+        field = fields[name]
+        value = sample.get(name)
+        if value is None:
+            continue
+        if field.min_value is not None and value < field.min_value:
+            errors[name] = [field.error_messages['min_value'].format(min_value=field.min_value)]
+        elif field.max_value is not None and value > field.max_value:
+            errors[name] = [field.error_messages['max_value'].format(max_value=field.max_value)]
+    return errors
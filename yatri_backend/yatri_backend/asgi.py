@@ -13,4 +13,22 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatri_backend.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Imported after Django is set up
+from navigate.streaming import websocket_application  # noqa: E402
+
+WEBSOCKET_ROUTES = {
+    '/ws/live-locations/': websocket_application,
+}
+
+
+async def application(scope, receive, send):
+    """HTTP goes to Django; WebSocket paths to their handlers"""
+    if scope['type'] == 'websocket':
+        handler = WEBSOCKET_ROUTES.get(scope['path'])
+        if handler is None:
+            await send({'type': 'websocket.close', 'code': 4404})
+            return
+        return await handler(scope, receive, send)
+    return await django_application(scope, receive, send)
@@ -4,6 +4,7 @@ Django + DRF + JWT Authentication
 Academic/Research-Oriented Configuration
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -84,11 +85,14 @@ DATABASES = {
     }
 }
 
+# Redis server (without database number) - cache on db 1, live stream pub/sub on db 2
+REDIS_URL = os.environ.get('REDIS_URL', 'redis://127.0.0.1:6379').rstrip('/')
+
 # Redis Cache Configuration
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.redis.RedisCache',
-        'LOCATION': 'redis://127.0.0.1:6379/1',
+        'LOCATION': f'{REDIS_URL}/1',
         'OPTIONS': {
             'CLIENT_CLASS': 'django_redis.client.DefaultClient',
         },
@@ -243,4 +247,95 @@ CACHE_TTL = {
 PUBLIC_ROUTE_CONFIG = {
     'min_trip_count': 5,       # Minimum trips to consider as public route
     'location_threshold': 50,  # meters - how close start/end should be
+    'cell_degrees': 0.001,     # Route start/end grid (~110 m); run manage.py assign_route_cells after changing
+}
+
+# Route congestion grid (navigate/segments.py)
+CONGESTION_CONFIG = {
+    'grid_resolution': 0.01,         # degrees (~1.1 km) per road segment cell
+    'segment_refresh_interval': 300, # seconds - reload of the RoadSegment registry
+    'max_zranges': 64,               # zkey index ranges per exact cell query (bench_distinct_vehicles)
+    
+    # Cell snapshots from the shared sketches (navigate/congestion.py)
+    'window_minutes': 5,             # sliding window per cell
+    'flush_interval': 60,            # seconds - snapshot into Congestion rows (one writer per interval)
+    'min_vehicles': 3,               # quieter cells are not snapshotted
+    'snapshot_retention_hours': 24,  # older cell snapshots are deleted
+    'level_speeds': {                # km/h - average speed below -> level
+        'severe': 5,
+        'high': 15,
+        'moderate': 30,
+    },
+    
+    # Distinct-vehicle sketches per (cell, minute) (navigate/sketches.py)
+    'hll_precision': 12,             # 4096 registers, ~1.6% error
+    'sketch_flush_interval': 30,     # seconds - merge pending sketches into the database
+    'sketch_retention_hours': 48,    # older sketches are deleted (longest answerable window)
+}
+
+# Road usage heat map (navigate/additional_views.compute_heatmap)
+HEATMAP_CONFIG = {
+    'sql_vendors': ('postgresql', 'sqlite', 'mysql'),  # GROUP BY in the database
+    'chunk_size': 5000,          # points per fetch on other backends
+    
+    # Precomputed tile pyramid (navigate/heatmap.py, manage.py compact_heatmap_tiles nightly)
+    'use_tiles': True,
+    'tile_resolutions': (0.001, 0.01, 0.1),  # degrees; re-run compaction after changing
+    'recompact_days': 2,         # nightly job also rebuilds this many previous days (late samples)
+}
+
+# Live location viewport queries (in-memory grid index, navigate/live_index.py)
+LIVE_LOCATION_CONFIG = {
+    'grid_cell_degrees': 0.01,  # ~1.1 km cells
+    'refresh_interval': 2,      # seconds - re-read positions updated since the last refresh
+    'rebuild_interval': 300,    # seconds - full rebuild (vehicle type/owner changes, deletions)
+    'max_radius': 50000,        # meters
+    'cursor_overlap': 2,        # seconds - since-cursor re-read for rows committed late
+}
+
+# Live location streaming (SSE/WebSocket, ASGI only) - see navigate/streaming.py
+# Needs an ASGI server (uvicorn/daphne yatri_backend.asgi:application) for the
+# stream endpoints; when enabled every ingest publishes to Redis pub/sub
+LIVE_STREAM_CONFIG = {
+    'enabled': os.environ.get('LIVE_STREAM_ENABLED', '').lower() in ('1', 'true', 'yes'),
+    'redis_url': os.environ.get('LIVE_STREAM_REDIS_URL', f'{REDIS_URL}/2'),  # pub/sub fan-out between processes
+    'tile_degrees': 0.1,         # ~11 km channel tiles
+    'max_tiles': 64,             # largest viewport a client may subscribe to
+    'max_vehicles': 100,         # vehicle-set subscriptions
+    'live_minutes': 5,           # snapshot window, same default as live-locations
+    'keepalive_interval': 15,    # seconds between SSE keep-alive comments
+    'client_queue_size': 100,    # pending deltas per client before dropping
+}
+
+# Per-device minute/hour telemetry rollups (navigate/rollups.py)
+TELEMETRY_ROLLUP_CONFIG = {
+    'flush_interval': 30,        # seconds - merge pending aggregates into the rollup tables
+    'max_gap_seconds': 300,      # longer gaps between samples add no distance
+    'backfill_batch_size': 5000, # rows per fetch/insert in backfill_telemetry_rollups
+}
+
+# Telemetry ingestion
+TELEMETRY_INGEST_CONFIG = {
+    'max_batch_size': 500,     # Samples per POST /api/navigate/telemetry/batch/
+    'registry_local_ttl': 30,  # seconds - device registry entries in process memory
+    'registry_cache_ttl': 3600,  # seconds - device registry entries in Redis
+    'sample_buffer_size': 32,  # Recent samples kept per device for crash/theft detection
+    'sample_buffer_ttl': 600,  # seconds - idle devices are re-seeded from the database
+    'reorder_lateness_seconds': 0,  # Hold samples this long for out-of-order arrivals (0 = release at once)
+    'sample_buffer_lock_timeout': 5,  # seconds - per-device buffer lock expiry (crashed holders)
+    'heartbeat_flush_interval': 30,  # seconds - coalesced Device.last_ping writes
+    'heartbeat_cache_ttl': 3600,  # seconds - unflushed heartbeats visible via Redis
+    'active_journey_local_ttl': 5,  # seconds - vehicle -> ongoing journey entries in process memory
+    'active_journey_cache_ttl': 3600,  # seconds - same entries in Redis (invalidated on journey changes)
+    
+    # Asynchronous ingestion: HTTP only validates + spools, workers do the rest
+    # (python manage.py run_ingest_workers)
+    'async_ingest': False,
+    'spool_path': BASE_DIR / 'spool' / 'telemetry_spool.sqlite3',
+    'spool_synchronous': 'NORMAL',  # SQLite fsync level: NORMAL (WAL-safe) or FULL
+    'spool_partitions': 64,    # Devices are hashed into partitions owned by one worker each
+    'worker_processes': 2,
+    'worker_batch_size': 500,
+    'worker_poll_interval': 0.5,  # seconds
+    'spool_max_attempts': 5,   # Failed attempts before a sample is moved to the dead-letter table
 }